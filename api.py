@@ -0,0 +1,242 @@
+# api.py
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from core.cache import generate_content_cached
+from core.database import create_db_and_tables, session_scope
+from core.generation import generate_posts
+from core.history import HISTORY_PAGE_SIZE, list_generations, save_generation
+from core.metrics import metrics
+from core.multi_persona import generate_multi_persona
+from core.persona_repository import PersonaDuplicadaError, persona_repository
+from core.prompt_builder import PLATAFORMAS, build_topics_prompt
+from core.response_parser import parse_topics
+
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", 8))
+API_QUEUE_TIMEOUT_SECONDS = float(os.getenv("API_QUEUE_TIMEOUT_SECONDS", 10))
+API_GENERATION_DEADLINE_SECONDS = float(os.getenv("API_GENERATION_DEADLINE_SECONDS", 90))
+API_TOPICS_DEADLINE_SECONDS = float(os.getenv("API_TOPICS_DEADLINE_SECONDS", 30))
+
+# As chamadas ao LLM são bloqueantes: rodam neste pool, fora do event loop,
+# e o semáforo limita quantas podem estar em andamento ao mesmo tempo.
+_executor = ThreadPoolExecutor(max_workers=API_MAX_CONCURRENCY, thread_name_prefix="api-llm")
+_semaphore = None
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Cria o semáforo no primeiro uso, já dentro do event loop (com ou sem lifespan)."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(API_MAX_CONCURRENCY)
+    return _semaphore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    _get_semaphore()
+    await asyncio.to_thread(create_db_and_tables)
+    metrics.start_snapshots()
+    yield
+    _executor.shutdown(wait=False)
+
+
+app = FastAPI(title="PersonaPost AI", lifespan=lifespan)
+
+
+# --- Esquemas ---
+class PersonaIn(BaseModel):
+    session_id: str = Field(min_length=1)
+    nome: str = Field(min_length=1)
+    descricao: str = Field(min_length=1)
+    tom_de_voz: str = Field(min_length=1)
+
+
+class PersonaOut(BaseModel):
+    id: int
+    nome: str
+    descricao: str | None
+    tom_de_voz: str | None
+
+
+class TopicsIn(BaseModel):
+    session_id: str
+    persona_id: int
+    refresh: bool = False
+
+
+class TopicsOut(BaseModel):
+    temas: list[str]
+    do_cache: bool
+
+
+class GenerateIn(BaseModel):
+    session_id: str
+    persona_id: int
+    objetivo: str = ""
+    tema: str = Field(min_length=1)
+    redes_sociais: list[str] = Field(min_length=1)
+    refresh: bool = False
+
+
+class GenerateMultiIn(BaseModel):
+    session_id: str
+    persona_ids: list[int] = Field(min_length=1)
+    objetivo: str = ""
+    tema: str = Field(min_length=1)
+    redes_sociais: list[str] = Field(min_length=1)
+    refresh: bool = False
+
+
+class GenerationOut(BaseModel):
+    id: int
+    criado_em: datetime
+    tema: str | None
+    do_cache: bool
+    duracao_ms: int | None
+    resultado: dict
+
+
+# --- Execução das chamadas ao LLM ---
+async def run_llm(deadline_seconds: float, fn, *args, **kwargs):
+    """Executa `fn` no pool de threads respeitando o limite global de concorrência e o prazo.
+
+    Se o prazo estourar, a requisição responde 504, mas a vaga só é liberada
+    quando a thread termina, para que o limite continue valendo de fato.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + deadline_seconds
+    semaphore = _get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=min(API_QUEUE_TIMEOUT_SECONDS, deadline_seconds))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Serviço ocupado. Tente novamente em instantes.")
+
+    future = loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+    future.add_done_callback(lambda _: semaphore.release())
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="A geração excedeu o prazo.")
+
+
+def _find_persona(session_id: str, persona_id: int) -> dict:
+    # Consulta direta: o cache por sessão do repositório é local a cada processo.
+    persona = persona_repository.get(session_id, persona_id)
+    if persona is not None:
+        return persona
+    raise HTTPException(status_code=404, detail="Persona não encontrada.")
+
+
+def _generate_and_save(request: GenerateIn, persona: dict):
+    """Gera os posts e grava a geração; roda dentro do pool de threads."""
+    start = time.perf_counter()
+    raw_response, from_cache = generate_posts(persona, request.objetivo, request.tema, request.redes_sociais, refresh=request.refresh)
+    if not raw_response:
+        return None
+    duracao_ms = int((time.perf_counter() - start) * 1000)
+    with session_scope() as db:
+        return save_generation(db, request.session_id, persona, request.objetivo, request.tema,
+                               request.redes_sociais, raw_response, from_cache, duracao_ms)
+
+
+def _generate_multi_and_save(request: GenerateMultiIn, personas: list[dict]):
+    """Gera o tema para várias personas em lotes e grava uma geração por persona."""
+    start = time.perf_counter()
+    resultados = generate_multi_persona(personas, request.objetivo, request.tema, request.redes_sociais, refresh=request.refresh)
+    duracao_ms = int((time.perf_counter() - start) * 1000)
+    items = []
+    with session_scope() as db:
+        for resultado in resultados:
+            if resultado.resposta:
+                items.append(save_generation(db, request.session_id, resultado.persona, request.objetivo, request.tema,
+                                             request.redes_sociais, resultado.resposta, resultado.do_cache, duracao_ms))
+    return items
+
+
+def _generation_out(item) -> GenerationOut:
+    return GenerationOut(id=item.id, criado_em=item.criado_em, tema=item.tema, do_cache=item.do_cache,
+                         duracao_ms=item.duracao_ms, resultado=item.resultado.to_dict())
+
+
+# --- Endpoints ---
+@app.get("/personas", response_model=list[PersonaOut])
+async def list_personas(session_id: str):
+    return await asyncio.to_thread(persona_repository.list_for_session, session_id)
+
+
+@app.post("/personas", response_model=PersonaOut, status_code=201)
+async def create_persona(persona: PersonaIn):
+    try:
+        return await asyncio.to_thread(persona_repository.create, persona.session_id, persona.nome, persona.descricao, persona.tom_de_voz)
+    except PersonaDuplicadaError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.post("/topics", response_model=TopicsOut)
+async def suggest_topics(request: TopicsIn):
+    persona = await asyncio.to_thread(_find_persona, request.session_id, request.persona_id)
+    prompt = build_topics_prompt(persona)
+    raw_response, from_cache = await run_llm(
+        API_TOPICS_DEADLINE_SECONDS, generate_content_cached, prompt, refresh=request.refresh, task="topics"
+    )
+    temas = parse_topics(raw_response) if raw_response else []
+    if not temas and from_cache:
+        # Resposta em cache sem nenhum tema aproveitável: pede de novo à IA.
+        raw_response, from_cache = await run_llm(
+            API_TOPICS_DEADLINE_SECONDS, generate_content_cached, prompt, refresh=True, task="topics"
+        )
+        temas = parse_topics(raw_response) if raw_response else []
+    if not temas:
+        raise HTTPException(status_code=502, detail="A IA não retornou sugestões.")
+    return TopicsOut(temas=temas, do_cache=from_cache)
+
+
+@app.post("/generate", response_model=GenerationOut)
+async def generate(request: GenerateIn):
+    invalidas = set(request.redes_sociais) - set(PLATAFORMAS)
+    if invalidas:
+        raise HTTPException(status_code=422, detail=f"Redes sociais inválidas: {', '.join(sorted(invalidas))}")
+    persona = await asyncio.to_thread(_find_persona, request.session_id, request.persona_id)
+    item = await run_llm(API_GENERATION_DEADLINE_SECONDS, _generate_and_save, request, persona)
+    if item is None:
+        raise HTTPException(status_code=502, detail="A IA não retornou conteúdo.")
+    return _generation_out(item)
+
+
+@app.post("/generate/multi", response_model=list[GenerationOut])
+async def generate_multi(request: GenerateMultiIn):
+    invalidas = set(request.redes_sociais) - set(PLATAFORMAS)
+    if invalidas:
+        raise HTTPException(status_code=422, detail=f"Redes sociais inválidas: {', '.join(sorted(invalidas))}")
+    personas = await asyncio.to_thread(lambda: [_find_persona(request.session_id, pid) for pid in request.persona_ids])
+    items = await run_llm(API_GENERATION_DEADLINE_SECONDS, _generate_multi_and_save, request, personas)
+    if not items:
+        raise HTTPException(status_code=502, detail="A IA não retornou conteúdo.")
+    return [_generation_out(item) for item in items]
+
+
+@app.get("/generations", response_model=list[GenerationOut])
+async def generations(session_id: str, before_criado_em: datetime | None = None, before_id: int | None = None,
+                      limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=50)):
+    before = (before_criado_em, before_id) if before_criado_em is not None and before_id is not None else None
+
+    def load():
+        with session_scope() as db:
+            return list_generations(db, session_id, before=before, limit=limit)
+
+    return [_generation_out(item) for item in await asyncio.to_thread(load)]
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.export_prometheus(), media_type="text/plain; version=0.0.4")
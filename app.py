@@ -1,33 +1,40 @@
 # app.py
 
 import streamlit as st
-import requests
-import json
 import time
 import uuid
-import os
 from streamlit_local_storage import LocalStorage
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 from dotenv import load_dotenv
 
-# --- Importações Diretas da Lógica de Back-end ---
-# (Assumindo que todos os arquivos core/*.py estão corretos)
-from core.database import SessionLocal, create_db_and_tables, get_db
-from core.models import Persona
-from core.llm_client import configure_llm, generate_content
-from core.prompt_builder import build_prompt
-from core import prompt_templates
-
 # --- Configuração da Página (deve ser o primeiro comando st) ---
 st.set_page_config(page_title="PersonaPost AI", page_icon="🤖", layout="wide")
 
+#---- Título ----  
+# Renderizado antes de qualquer inicialização para que a página não fique em branco no cold start.
+st.title("🤖 PersonaPost AI")
+st.markdown("### Gere conteúdos para redes sociais baseados em personas.")
+
+# --- Importações Diretas da Lógica de Back-end ---
+# (Importadas após o título: SQLAlchemy e afins carregam com a página já visível)
+from core.database import create_db_and_tables, session_scope
+from core.persona_repository import PersonaDuplicadaError, persona_repository
+from core.llm_client import configure_llm
+from core.cache import generate_content_cached
+from core.multi_persona import generate_multi_persona
+from core.history import HISTORY_PAGE_SIZE, find_similar_generation, get_generation, list_generations, save_generation
+from core.jobs import CONCLUIDO, FALHOU, JOB_EMBEDDED_WORKERS, JOB_POLL_SECONDS, JobWorkerPool, get_job, list_active_jobs, submit_job
+from core.prompt_builder import build_topics_prompt
+from core.response_parser import OpcaoPost, parse_topics
+from core.topic_prefetch import topic_prefetcher
+from core.metrics import metrics
+
 # --- Configurar Banco de Dados e API de IA (Executa apenas uma vez) ---
 @st.cache_resource
 def init_connections():
-    """Cria tabelas do BD e configura a API do Gemini uma vez."""
+    """Cria tabelas do BD e registra a chave do Gemini uma vez (o SDK é carregado no primeiro uso)."""
     print("Iniciando: Criando tabelas do BD...")
     create_db_and_tables()
+    metrics.start_snapshots()
     
     print("Iniciando: Configurando API do Gemini...")
     try:
@@ -46,6 +53,14 @@ def init_connections():
 
 init_connections()
 
+@st.cache_resource
+def start_job_workers():
+    """Inicia os workers da fila dentro do processo (uma vez); com JOB_EMBEDDED_WORKERS=0 use o worker.py."""
+    if JOB_EMBEDDED_WORKERS > 0:
+        return JobWorkerPool(JOB_EMBEDDED_WORKERS).start()
+
+start_job_workers()
+
 # --- URLs da API (Apenas para referência futura, não mais usadas) ---
 # API_BASE_URL = ... (removido)
 
@@ -57,85 +72,66 @@ if not session_id:
     localS.setItem("session_id", session_id)
         
 # --- Estado da Sessão para UI (Histórico e Sugestões) ---
-if 'generation_history' not in st.session_state:
-    st.session_state.generation_history = []
+def load_history(sid: str, before: tuple | None = None) -> list:
+    """Carrega uma página do histórico de gerações já analisadas do BD."""
+    with session_scope() as db:
+        return list_generations(db, sid, before=before)
+
+# O histórico é lido do BD uma vez por sessão; reruns apenas reaproveitam os itens carregados.
+if st.session_state.get('history_session_id') != session_id:
+    st.session_state.generation_history = load_history(session_id)
+    st.session_state.history_exhausted = len(st.session_state.generation_history) < HISTORY_PAGE_SIZE
+    # Jobs ainda em andamento (ex.: a aba foi fechada durante a geração) voltam a ser acompanhados.
+    with session_scope() as db:
+        st.session_state.active_jobs = list_active_jobs(db, session_id)
+    st.session_state.history_session_id = session_id
 if 'suggested_topics' not in st.session_state:
     st.session_state.suggested_topics = []
+if 'last_request' not in st.session_state:
+    st.session_state.last_request = None
+if 'topics_from_cache' not in st.session_state:
+    st.session_state.topics_from_cache = False
+if 'last_topics_persona' not in st.session_state:
+    st.session_state.last_topics_persona = None
+if 'similar_offer' not in st.session_state:
+    st.session_state.similar_offer = None
+if 'job_failures' not in st.session_state:
+    st.session_state.job_failures = []
 
 # --- Funções ---
-def parse_ai_response(text: str) -> dict:
-    """Analisa a resposta de texto da IA e a estrutura em um dicionário."""
-    parsed_data = {}
-    plataformas = text.split('[SAÍDA PARA ')
-    for plataforma_bloco in plataformas:
-        if ']' not in plataforma_bloco:
-            continue
-        nome_plataforma, conteudo = plataforma_bloco.split(']', 1)
-        nome_plataforma = nome_plataforma.strip()
-        opcoes = []
-        blocos_opcao = conteudo.split('[OPÇÃO ')
-        for i, bloco_opcao in enumerate(blocos_opcao):
-            if i == 0: continue
-            opcao_data = {}
-            if "Legenda:" in bloco_opcao:
-                opcao_data['legenda'] = bloco_opcao.split("Legenda:", 1)[1].split("Sugestão de Mídia:", 1)[0].strip()
-            elif "Tweet:" in bloco_opcao:
-                 opcao_data['legenda'] = bloco_opcao.split("Tweet:", 1)[1].split("Hashtags:", 1)[0].strip()
-            elif "Texto do Post:" in bloco_opcao:
-                 opcao_data['legenda'] = bloco_opcao.split("Texto do Post:", 1)[1].split("Hashtags:", 1)[0].strip()
-            if "Sugestão de Mídia:" in bloco_opcao:
-                opcao_data['sugestao'] = bloco_opcao.split("Sugestão de Mídia:", 1)[1].split("Hashtags:", 1)[0].strip()
-            if "Hashtags:" in bloco_opcao:
-                opcao_data['hashtags'] = bloco_opcao.split("Hashtags:", 1)[1].strip()
-            opcoes.append(opcao_data)
-        parsed_data[nome_plataforma] = opcoes
-    return parsed_data
-
-# --- NOVAS Funções de Lógica (Conexão Direta com BD) ---
-def get_personas_from_db(sid: str, db: Session):
-    """Busca as personas direto do banco de dados."""
-    if not sid: return []
-    try:
-        personas = db.query(Persona).filter(Persona.session_id == sid).all()
-        # Converte objetos SQLAlchemy para dicts
-        return [{"id": p.id, "nome": p.nome, "descricao": p.descricao, "tom_de_voz": p.tom_de_voz, "session_id": p.session_id} for p in personas]
-    except Exception as e:
-        st.sidebar.error(f"Erro ao carregar personas: {e}")
-        return []
-
-def create_persona_in_db(sid: str, nome: str, descricao: str, tom_de_voz: str, db: Session):
-    """Cria uma nova persona direto no banco de dados."""
-    persona_data = Persona(
-        nome=nome,
-        descricao=descricao,
-        tom_de_voz=tom_de_voz,
-        session_id=sid
-    )
-    try:
-        db.add(persona_data)
-        db.commit()
-        return True
-    except IntegrityError:
-        db.rollback()
-        st.error(f"Erro: Uma persona com o nome '{nome}' já existe.")
-        return False
-    except Exception as e:
-        db.rollback()
-        st.error(f"Erro ao salvar persona: {e}")
-        return False
+def render_opcao(opcao: OpcaoPost):
+    """Renderiza uma opção de post com legenda, sugestão de mídia e hashtags."""
+    st.markdown(opcao.legenda)
+    if opcao.sugestao:
+        with st.expander("🎨 Ver Sugestão de Mídia"):
+            st.write(opcao.sugestao)
+    if opcao.hashtags:
+        st.code(" ".join(opcao.hashtags), language='bash')
 
-#---- Título ----  
-st.title("🤖 PersonaPost AI")
-st.markdown("### Gere conteúdos para redes sociais baseados em personas.")
+def render_plataforma_parcial(plataforma: str, opcoes: list):
+    """Renderiza as opções de uma plataforma que já chegaram durante o streaming."""
+    st.subheader(f"📱 {plataforma.title()}")
+    tabs = st.tabs([f"Opção {i+1}" for i in range(len(opcoes))])
+    for tab, opcao in zip(tabs, opcoes):
+        with tab:
+            render_opcao(opcao)
+
+def save_to_history(request_data: dict, raw_response: str, from_cache: bool, duracao_ms: int):
+    """Grava a geração no BD e a coloca no topo do histórico da sessão."""
+    with session_scope() as db:
+        item = save_generation(db, session_id, request_data["persona"], request_data["objetivo"], request_data["tema"],
+                               request_data["redes_sociais"], raw_response, from_cache, duracao_ms)
+    st.session_state.generation_history.insert(0, item)
 
 # ---- BARRA LATERAL (CONTROLES) ----
 with st.sidebar:
     st.header("1. Selecione ou Crie uma Persona")
     
-    # Obtém uma sessão de banco de dados para usar na barra lateral
-    db = next(get_db())
-    
-    personas_list = get_personas_from_db(session_id, db)
+    try:
+        personas_list = persona_repository.list_for_session(session_id)
+    except Exception as e:
+        st.sidebar.error(f"Erro ao carregar personas: {e}")
+        personas_list = []
     persona_options = {}
     selected_persona_name = ""
 
@@ -147,6 +143,9 @@ with st.sidebar:
             options=[""] + nomes_das_personas,
             format_func=lambda x: "Selecione uma persona" if x == "" else x
         )
+        if selected_persona_name:
+            # Pré-calcula as sugestões de temas em segundo plano (no-op se já existirem).
+            topic_prefetcher.schedule(persona_options[selected_persona_name])
     else:
         st.info("Nenhuma persona salva. Crie uma nova abaixo.")
 
@@ -158,13 +157,43 @@ with st.sidebar:
             submitted = st.form_submit_button("Salvar Persona")
             if submitted:
                 if new_name and new_description and new_tone:
-                    success = create_persona_in_db(session_id, new_name, new_description, new_tone, db)
-                    if success:
+                    try:
+                        nova_persona = persona_repository.create(session_id, new_name, new_description, new_tone)
+                        topic_prefetcher.schedule(nova_persona)
+                    except PersonaDuplicadaError as e:
+                        st.error(f"Erro: {e}")
+                    except Exception as e:
+                        st.error(f"Erro ao salvar persona: {e}")
+                    else:
                         st.success(f"Persona '{new_name}' criada!")
                         time.sleep(1)
                         st.rerun()
                 else:
                     st.error("Preencha todos os campos.")
+
+    if selected_persona_name:
+        persona_atual = persona_options[selected_persona_name]
+        with st.expander("✏️ Editar Persona"):
+            with st.form("edit_persona_form"):
+                edit_name = st.text_input("Nome da Persona", value=persona_atual['nome'])
+                edit_description = st.text_area("Descrição da Persona", value=persona_atual['descricao'])
+                edit_tone = st.text_area("Tom de Voz", value=persona_atual['tom_de_voz'])
+                if st.form_submit_button("Salvar Alterações"):
+                    if edit_name and edit_description and edit_tone:
+                        try:
+                            persona_editada = persona_repository.update(
+                                session_id, persona_atual['id'], nome=edit_name, descricao=edit_description, tom_de_voz=edit_tone
+                            )
+                            # Nova versão da persona: as sugestões antigas deixam de valer.
+                            topic_prefetcher.schedule(persona_editada)
+                        except PersonaDuplicadaError as e:
+                            st.error(f"Erro: {e}")
+                        except Exception as e:
+                            st.error(f"Erro ao salvar persona: {e}")
+                        else:
+                            st.rerun()
+                    else:
+                        st.error("Preencha todos os campos.")
                 
     st.header("2. Defina o Conteúdo")
     objetivo = st.text_input("Objetivo do Post", placeholder="Ex: Aumentar o engajamento")
@@ -174,21 +203,30 @@ with st.sidebar:
             with st.spinner("Buscando inspiração..."):
                 selected_persona_details = persona_options[selected_persona_name]
                 try:
-                    # Chama a lógica de IA diretamente
-                    prompt = prompt_templates.SUGGEST_TOPICS_PROMPT_TEMPLATE.format(
-                        nome_da_persona=selected_persona_details.get('nome'),
-                        descricao_da_persona=selected_persona_details.get('descricao')
-                    )
-                    raw_response = generate_content(prompt)
-                    if raw_response:
-                        topics = [line.split('. ', 1)[1] for line in raw_response.strip().split('\n') if '. ' in line]
+                    # Usa as sugestões pré-calculadas; só chama a IA se ainda não existirem
+                    topics = topic_prefetcher.get(selected_persona_details)
+                    from_cache = topics is not None
+                    if topics is None:
+                        prompt = build_topics_prompt(selected_persona_details)
+                        raw_response, from_cache = generate_content_cached(prompt, task="topics")
+                        topics = parse_topics(raw_response) if raw_response else None
+                        if not topics and from_cache:
+                            # Resposta em cache sem nenhum tema aproveitável: pede de novo à IA.
+                            raw_response, from_cache = generate_content_cached(prompt, refresh=True, task="topics")
+                            topics = parse_topics(raw_response) if raw_response else None
+                        if topics:
+                            topic_prefetcher.save(selected_persona_details, topics)
+                    if topics:
                         st.session_state.suggested_topics = topics
-                        st.session_state.generation_history = []
-                        st.rerun()
+                        st.session_state.topics_from_cache = from_cache
+                        st.session_state.last_topics_persona = selected_persona_details
                     else:
                         st.warning("A IA não retornou sugestões.")
                 except Exception as e:
                     st.error(f"Erro ao sugerir temas: {e}")
+                else:
+                    if topics:
+                        st.rerun()
         else:
             st.warning("Selecione uma persona para obter sugestões.")
 
@@ -200,8 +238,10 @@ with st.sidebar:
     )
     
     submit_button = st.button("Gerar Posts ✨", type="primary", use_container_width=True)
-    
-    db.close() # Fecha a sessão do banco de dados no final da renderização da sidebar
+
+    with st.expander("👥 Gerar para várias personas"):
+        multi_personas = st.multiselect("Personas", options=list(persona_options.keys()))
+        multi_submit = st.button("Gerar para as personas selecionadas", use_container_width=True)
 
 # ---- PÁGINA PRINCIPAL (RESULTADOS) ----
 st.header("🚀 Posts Gerados")
@@ -210,71 +250,173 @@ if st.session_state.suggested_topics:
     st.info("Aqui estão algumas sugestões! Copie e cole uma no campo 'Tema Central' ao lado.")
     topics_markdown = "- " + "\n- ".join(st.session_state.suggested_topics)
     st.markdown(topics_markdown)
+    if st.session_state.topics_from_cache:
+        st.caption("♻️ Sugestões recuperadas do cache.")
+        if st.button("🔄 Novas sugestões"):
+            with st.spinner("Buscando inspiração..."):
+                raw_response, _ = generate_content_cached(build_topics_prompt(st.session_state.last_topics_persona), refresh=True, task="topics")
+            novos_temas = parse_topics(raw_response) if raw_response else []
+            if novos_temas:
+                st.session_state.suggested_topics = novos_temas
+                topic_prefetcher.save(st.session_state.last_topics_persona, novos_temas)
+                st.session_state.topics_from_cache = False
+                st.rerun()
+            else:
+                st.warning("A IA não retornou sugestões.")
     st.markdown("---")
 
+def submit_generation(request_data: dict, refresh: bool = False):
+    """Enfileira a geração; o resultado é acompanhado por polling e sobrevive a reruns e recarregamentos."""
+    try:
+        with session_scope() as db:
+            job_id = submit_job(db, session_id, request_data["persona"], request_data["objetivo"], request_data["tema"],
+                                request_data["redes_sociais"], refresh=refresh)
+    except Exception as e:
+        st.error(f"Ocorreu um erro inesperado: {e}")
+        return
+    st.session_state.active_jobs.append(job_id)
+    st.session_state.suggested_topics = []
+    st.rerun()
+
 if submit_button:
+    st.session_state.similar_offer = None
     if not selected_persona_name:
         st.error("Por favor, selecione uma persona na lista.")
     elif not tema or not redes_sociais:
         st.error("Por favor, preencha o tema e selecione ao menos uma rede social.")
     else:
-        with st.spinner("Gerando conteúdo... 🧠"):
-            selected_persona_details = persona_options[selected_persona_name]
-            request_data = {
-                "persona": selected_persona_details,
-                "objetivo": objetivo,
-                "tema": tema,
-                "redes_sociais": redes_sociais
-            }
+        selected_persona_details = persona_options[selected_persona_name]
+        request_data = {
+            "persona": selected_persona_details,
+            "objetivo": objetivo,
+            "tema": tema,
+            "redes_sociais": redes_sociais
+        }
+        # Antes de pagar por uma nova chamada, oferece um resultado anterior parecido.
+        try:
+            with session_scope() as db:
+                similar = find_similar_generation(db, session_id, selected_persona_details, objetivo, tema, redes_sociais)
+        except Exception as e:
+            print(f"Erro na busca por gerações parecidas: {e}")
+            similar = None
+        if similar:
+            st.session_state.similar_offer = {"request": request_data, "similar": similar}
+        else:
+            submit_generation(request_data)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress():
+    """Acompanha os jobs da sessão: só este trecho é reexecutado a cada polling.
+
+    Quando algum job termina, a página inteira é redesenhada para mostrar o
+    resultado no histórico (ou o erro).
+    """
+    with session_scope() as db:
+        jobs = [get_job(db, session_id, job_id) for job_id in st.session_state.active_jobs]
+        finished = False
+        for job in jobs:
+            if job is None:
+                continue
+            if job.status == CONCLUIDO:
+                finished = True
+                item = get_generation(db, session_id, job.generation_id)
+                if item is not None:
+                    st.session_state.generation_history.insert(0, item)
+                    st.session_state.last_request = job.request.request_data
+            elif job.status == FALHOU:
+                finished = True
+                st.session_state.job_failures.append(f"A geração de '{job.tema}' falhou: {job.erro}")
+    st.session_state.active_jobs = [job.id for job in jobs if job is not None and job.status not in (CONCLUIDO, FALHOU)]
+    if finished:
+        st.rerun()
+    for job in jobs:
+        if job is not None and job.id in st.session_state.active_jobs:
+            st.info(f"Gerando conteúdo para '{job.tema}'... 🧠" if job.parcial else f"'{job.tema}' na fila de geração... ⏳")
+            for plataforma, opcoes in job.parcial.items():
+                render_plataforma_parcial(plataforma, opcoes)
+
+for erro in st.session_state.job_failures:
+    st.error(erro)
+st.session_state.job_failures = []
+if st.session_state.active_jobs:
+    job_progress()
+
+if multi_submit:
+    if not multi_personas:
+        st.error("Por favor, selecione ao menos uma persona.")
+    elif not tema or not redes_sociais:
+        st.error("Por favor, preencha o tema e selecione ao menos uma rede social.")
+    else:
+        with st.spinner(f"Gerando conteúdo para {len(multi_personas)} personas... 🧠"):
+            inicio = time.perf_counter()
             try:
-                # Chama a lógica de IA diretamente
-                final_prompt = build_prompt(request_data["persona"], request_data["objetivo"], request_data["tema"], request_data["redes_sociais"])
-                raw_response = generate_content(final_prompt)
-                
-                if raw_response:
-                    st.session_state.suggested_topics = []
-                    st.session_state.generation_history.insert(0, raw_response)
-                    st.session_state.generation_history = st.session_state.generation_history[:5]
-                    st.rerun()
-                else:
-                    st.error(f"Erro da API: A IA não retornou conteúdo.")
+                resultados = generate_multi_persona([persona_options[nome] for nome in multi_personas], objetivo, tema, redes_sociais)
             except Exception as e:
                 st.error(f"Ocorreu um erro inesperado: {e}")
+                resultados = []
+            duracao_ms = int((time.perf_counter() - inicio) * 1000)
+        falhas = []
+        for resultado in resultados:
+            if not resultado.resposta:
+                falhas.append(resultado.persona['nome'])
+                continue
+            request_data = {"persona": resultado.persona, "objetivo": objetivo, "tema": tema, "redes_sociais": redes_sociais}
+            save_to_history(request_data, resultado.resposta, resultado.do_cache, duracao_ms)
+            st.session_state.last_request = request_data
+        if falhas:
+            st.error(f"A IA não retornou conteúdo para: {', '.join(falhas)}.")
+        elif resultados:
+            st.session_state.suggested_topics = []
+            st.rerun()
+
+if st.session_state.similar_offer:
+    offer = st.session_state.similar_offer
+    similar = offer["similar"]
+    st.info(f"♻️ Você já gerou posts parecidos: **{similar.item.tema}** "
+            f"({similar.item.criado_em:%d/%m/%Y %H:%M}, {similar.similaridade:.0%} de similaridade).")
+    col_reuse, col_new = st.columns(2)
+    if col_reuse.button("Usar este resultado", use_container_width=True):
+        st.session_state.similar_offer = None
+        st.session_state.suggested_topics = []
+        st.session_state.last_request = offer["request"]
+        save_to_history(offer["request"], similar.resposta, True, 0)
+        st.rerun()
+    if col_new.button("Gerar novo mesmo assim ✨", use_container_width=True):
+        st.session_state.similar_offer = None
+        submit_generation(offer["request"])
+    st.markdown("---")
 
 if st.session_state.generation_history:
     st.markdown("### Resultado Mais Recente")
     latest_result = st.session_state.generation_history[0]
-    parsed_content = parse_ai_response(latest_result)
-    for plataforma, opcoes in parsed_content.items():
-        st.subheader(f"📱 {plataforma.title()}")
-        if len(opcoes) >= 2:
-            tab1, tab2 = st.tabs(["Opção 1", "Opção 2"])
-            with tab1:
-                st.markdown(opcoes[0].get('legenda', ''))
-                if 'sugestao' in opcoes[0]:
-                    with st.expander("🎨 Ver Sugestão de Mídia"):
-                        st.write(opcoes[0]['sugestao'])
-                if 'hashtags' in opcoes[0]:
-                    st.code(opcoes[0]['hashtags'], language='bash')
-            with tab2:
-                st.markdown(opcoes[1].get('legenda', ''))
-                if 'sugestao' in opcoes[1]:
-                    with st.expander("🎨 Ver Sugestão de Mídia"):
-                        st.write(opcoes[1]['sugestao'])
-                if 'hashtags' in opcoes[1]:
-                    st.code(opcoes[1]['hashtags'], language='bash')
+    if latest_result.do_cache and st.session_state.last_request:
+        st.caption("♻️ Este resultado foi recuperado do cache de uma geração idêntica anterior.")
+        if st.button("🔄 Gerar nova versão"):
+            submit_generation(st.session_state.last_request, refresh=True)
+    for plataforma, opcoes in latest_result.resultado.plataformas.items():
+        # Mostra as opções que existirem, mesmo que o reparo não tenha completado a seção.
+        if opcoes:
+            render_plataforma_parcial(plataforma, opcoes)
+    if latest_result.resultado.faltando:
+        st.caption(f"⚠️ Partes ausentes na resposta: {'; '.join(latest_result.resultado.faltando)}")
     
     if len(st.session_state.generation_history) > 1:
         st.markdown("---")
         st.markdown("### Histórico de Gerações Anteriores")
-        for i, old_content in enumerate(st.session_state.generation_history[1:]):
-            with st.expander(f"📜 Histórico {i+1}"):
-                parsed_old_content = parse_ai_response(old_content)
-                for plataforma, opcoes in parsed_old_content.items():
+        for old_item in st.session_state.generation_history[1:]:
+            with st.expander(f"📜 {old_item.tema} ({old_item.criado_em:%d/%m/%Y %H:%M})"):
+                for plataforma, opcoes in old_item.resultado.plataformas.items():
+                    if not opcoes:
+                        continue
                     st.subheader(f"📱 {plataforma.title()}")
-                    if len(opcoes) >= 2:
-                        tab1, tab2 = st.tabs([f"Opção 1", f"Opção 2"])
-                        with tab1:
-                            st.markdown(opcoes[0].get('legenda', ''))
-                        with tab2:
-                            st.markdown(opcoes[1].get('legenda', ''))
\ No newline at end of file
+                    tabs = st.tabs([f"Opção {opcao.numero}" for opcao in opcoes])
+                    for tab, opcao in zip(tabs, opcoes):
+                        with tab:
+                            st.markdown(opcao.legenda)
+
+    if not st.session_state.history_exhausted:
+        if st.button("Carregar gerações mais antigas"):
+            page = load_history(session_id, before=st.session_state.generation_history[-1].cursor)
+            st.session_state.generation_history.extend(page)
+            st.session_state.history_exhausted = len(page) < HISTORY_PAGE_SIZE
+            st.rerun()
@@ -0,0 +1,197 @@
+# batch_generate.py
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+from core.llm_client import configure_llm, generate_content
+from core.prompt_builder import build_prompt
+from core.response_parser import parse_response
+
+
+def read_rows(path: str):
+    """Lê as linhas de entrada (CSV ou JSONL) uma a uma, sem carregar o arquivo inteiro.
+
+    No JSONL cada linha é entregue como texto; a decodificação fica em
+    `normalize_row`, para que uma linha inválida falhe sozinha.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for i, line in enumerate(f):
+                if line.strip():
+                    yield i, line
+        else:
+            for i, row in enumerate(csv.DictReader(f)):
+                yield i, row
+
+
+def normalize_row(index: int, row) -> dict:
+    """Converte uma linha de entrada nos argumentos de `build_prompt`."""
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+    if not isinstance(row, dict):
+        raise ValueError("a linha não é um objeto JSON")
+    persona = row.get("persona")
+    if not isinstance(persona, dict):
+        persona = {
+            "nome": row.get("nome", ""),
+            "descricao": row.get("descricao", ""),
+            "tom_de_voz": row.get("tom_de_voz", ""),
+        }
+    redes = row.get("redes_sociais") or "instagram"
+    if isinstance(redes, str):
+        redes = [r.strip() for r in redes.replace(";", ",").split(",") if r.strip()]
+    if not row.get("tema"):
+        raise ValueError("campo 'tema' vazio")
+    return {
+        "id": str(row.get("id") or index),
+        "persona": persona,
+        "objetivo": row.get("objetivo", ""),
+        "tema": row["tema"],
+        "redes_sociais": redes,
+    }
+
+
+def load_checkpoint(path: str) -> set:
+    """Retorna os ids já concluídos em execuções anteriores."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def load_invalid_lines(path: str) -> set:
+    """Retorna as linhas de entrada já recusadas na validação em execuções anteriores."""
+    if not os.path.exists(path):
+        return set()
+    invalid = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and isinstance(entry.get("linha"), int):
+                invalid.add(entry["linha"])
+    return invalid
+
+
+def process_row(item: dict) -> dict:
+    """Gera o conteúdo de uma linha.
+
+    O limite de chamadas e as novas tentativas de erros transitórios ficam a
+    cargo do `llm_client` (GEMINI_RPM, GEMINI_TPM e GEMINI_MAX_RETRIES); uma
+    resposta vazia aqui já é uma falha definitiva.
+    """
+    prompt = build_prompt(item["persona"], item["objetivo"], item["tema"], item["redes_sociais"])
+    start = time.monotonic()
+    response = generate_content(prompt)
+    if not response:
+        raise RuntimeError("sem resposta da API")
+    return {
+        **item,
+        "duracao_s": round(time.monotonic() - start, 3),
+        "resposta": response,
+        "resultado": parse_response(response).to_dict(),
+    }
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int):
+    """Processa o arquivo de entrada, gravando resultados e checkpoint à medida que as linhas terminam."""
+    checkpoint_path = output_path + ".checkpoint"
+    errors_path = output_path + ".erros.jsonl"
+    done = load_checkpoint(checkpoint_path)
+    # Linhas recusadas na validação já estão no arquivo de erros; não são regravadas.
+    invalid = load_invalid_lines(errors_path)
+    if done:
+        print(f"Retomando execução: {len(done)} linhas já concluídas serão ignoradas.")
+
+    ok = failed = skipped = 0
+    started = time.monotonic()
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+         open(checkpoint_path, "a", encoding="utf-8") as ckpt, \
+         open(errors_path, "a", encoding="utf-8") as errs, \
+         ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        pending = {}
+
+        def collect(futures):
+            nonlocal ok, failed
+            for future in futures:
+                item = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    errs.write(json.dumps({"id": item["id"], "erro": str(e)}, ensure_ascii=False) + "\n")
+                    errs.flush()
+                    print(f"[{item['id']}] falhou: {e}")
+                    continue
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                # O checkpoint só é gravado depois do resultado, garantindo que nenhuma linha se perca.
+                ckpt.write(item["id"] + "\n")
+                ckpt.flush()
+                ok += 1
+                if ok % 50 == 0:
+                    elapsed = time.monotonic() - started
+                    print(f"{ok} linhas concluídas ({ok / elapsed:.2f} linhas/s).")
+
+        for index, row in read_rows(input_path):
+            if index in invalid:
+                skipped += 1
+                continue
+            try:
+                item = normalize_row(index, row)
+            except ValueError as e:
+                failed += 1
+                row_id = row.get("id") if isinstance(row, dict) else None
+                errs.write(json.dumps({"id": str(row_id or index), "linha": index, "erro": str(e)}, ensure_ascii=False) + "\n")
+                errs.flush()
+                print(f"[linha {index}] inválida: {e}")
+                continue
+            if item["id"] in done:
+                skipped += 1
+                continue
+            # Mantém um número limitado de linhas em andamento para não ler o arquivo todo para a memória.
+            while len(pending) >= concurrency * 2:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            pending[executor.submit(process_row, item)] = item
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(finished)
+
+    elapsed = time.monotonic() - started
+    print("---------------------------------------")
+    print(f"Concluídas: {ok} | Falhas: {failed} | Ignoradas (checkpoint): {skipped} | Tempo: {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geração de posts em lote a partir de um arquivo CSV ou JSONL.")
+    parser.add_argument("input", help="Arquivo de entrada (.csv ou .jsonl)")
+    parser.add_argument("output", help="Arquivo JSONL de saída")
+    parser.add_argument("--concurrency", type=int, default=4, help="Número de linhas processadas em paralelo")
+    args = parser.parse_args()
+
+    load_dotenv()
+    try:
+        configure_llm()
+    except ValueError as ve:
+        print(ve)
+        return
+
+    run_batch(args.input, args.output, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
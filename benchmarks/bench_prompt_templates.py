@@ -0,0 +1,100 @@
+# benchmarks/bench_prompt_templates.py
+
+"""Compara a montagem de prompts do registro pré-compilado com o construtor anterior.
+
+O construtor anterior (seis `str.replace` sobre o template inteiro e um
+`str.format`) é reproduzido aqui como referência. Mede cada combinação de redes,
+uma persona com descrição muito longa (que passa pela compactação) e a
+estimativa de tokens sem montar o prompt. Exemplo:
+
+    python benchmarks/bench_prompt_templates.py --iterations 20000 --json prompts.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import prompt_templates
+from core.prompt_builder import PLATAFORMAS, build_prompt
+from core.template_registry import template_registry
+
+PERSONA = {
+    "nome": "Clínica Odontológica",
+    "descricao": "Clínica odontológica em Fortaleza-CE que deseja um conteúdo jovem e irreverente.",
+    "tom_de_voz": "Inspirador e motivacional",
+}
+PERSONA_LONGA = {**PERSONA, "descricao": "Atendimento humanizado, tecnologia de ponta e preços acessíveis. " * 400}
+OBJETIVO = "Aumentar o engajamento nas redes sociais"
+TEMA = "Uso de aparelhos ortodônticos"
+
+
+def legacy_build_prompt(persona: dict, objetivo: str, tema: str, redes_sociais: list[str]) -> str:
+    """Construtor anterior ao registro: substitui os blocos e formata o template inteiro a cada chamada."""
+    prompt = prompt_templates.PROMPT_TEMPLATE
+    for rede, bloco in prompt_templates.PLATFORM_BLOCKS.items():
+        if rede in redes_sociais:
+            prompt = prompt.replace(f"{{bloco_{rede}}}", bloco)
+    for rede in prompt_templates.PLATFORM_BLOCKS:
+        prompt = prompt.replace(f"{{bloco_{rede}}}", "")
+    return prompt.format(
+        nome_da_persona=persona.get('nome', ''),
+        descricao_da_persona=persona.get('descricao', ''),
+        tom_de_voz=persona.get('tom_de_voz', ''),
+        objetivo=objetivo,
+        tema=tema,
+    )
+
+
+def per_call_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--json", help="Arquivo de saída dos resultados")
+    args = parser.parse_args()
+
+    results = {"template_version": template_registry.version, "budget_tokens": template_registry.budget_tokens, "cases": {}}
+    combos = [list(c) for n in range(1, len(PLATAFORMAS) + 1) for c in combinations(PLATAFORMAS, n)]
+    cases = {"+".join(redes): (PERSONA, redes) for redes in combos}
+    cases["persona longa (instagram)"] = (PERSONA_LONGA, ["instagram"])
+
+    print(f"{'caso':<34} {'anterior µs':>12} {'registro µs':>12} {'ganho':>7} {'tokens':>8}")
+    for name, (persona, redes) in cases.items():
+        if persona is PERSONA:
+            # O registro deve produzir exatamente o mesmo prompt quando não há compactação.
+            assert build_prompt(persona, OBJETIVO, TEMA, redes) == legacy_build_prompt(persona, OBJETIVO, TEMA, redes)
+        legacy = per_call_us(lambda: legacy_build_prompt(persona, OBJETIVO, TEMA, redes), args.iterations)
+        registry = per_call_us(lambda: build_prompt(persona, OBJETIVO, TEMA, redes), args.iterations)
+        tokens_antes = template_registry.estimate_tokens(persona, OBJETIVO, TEMA, redes)
+        tokens_depois = len(build_prompt(persona, OBJETIVO, TEMA, redes)) // 4 + 1
+        results["cases"][name] = {
+            "legacy_us": round(legacy, 3),
+            "registry_us": round(registry, 3),
+            "speedup": round(legacy / registry, 2),
+            "tokens_estimate": tokens_antes,
+            "tokens_sent": tokens_depois,
+        }
+        print(f"{name:<34} {legacy:>12.2f} {registry:>12.2f} {legacy / registry:>6.2f}x {tokens_depois:>8}")
+
+    estimate = per_call_us(lambda: template_registry.estimate_tokens(PERSONA, OBJETIVO, TEMA, ["instagram", "linkedin"]), args.iterations)
+    results["estimate_tokens_us"] = round(estimate, 3)
+    print(f"\nEstimativa de tokens sem montar o prompt: {estimate:.2f} µs")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_similarity.py
+
+"""Mede o índice de similaridade: construção, abertura a frio, inserção incremental e busca.
+
+Usa um arquivo temporário com pedidos sintéticos, sem banco nem rede. Exemplo:
+
+    python benchmarks/bench_similarity.py --entries 100000 --queries 500
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.prompt_builder import PLATAFORMAS
+from core.similarity import SIMILARITY_DIM, SimilarityIndex
+
+PALAVRAS = [
+    "aparelho", "ortodôntico", "clareamento", "dental", "criança", "escova", "fio", "cárie", "sorriso", "implante",
+    "marketing", "digital", "vendas", "empresa", "cliente", "produto", "lançamento", "promoção", "equipe", "carreira",
+    "receita", "bolo", "chocolate", "saudável", "treino", "corrida", "viagem", "praia", "livro", "leitura",
+    "finanças", "investimento", "economia", "tecnologia", "inteligência", "artificial", "dados", "segurança", "nuvem", "café",
+]
+OBJETIVOS = ["", "Aumentar o engajamento", "Gerar vendas", "Educar o público", "Divulgar evento"]
+
+
+def synthetic_request(rng: random.Random, personas: int) -> tuple:
+    tema = " ".join(rng.sample(PALAVRAS, rng.randint(2, 6)))
+    redes = rng.sample(PLATAFORMAS, rng.randint(1, len(PLATAFORMAS)))
+    return rng.randint(1, personas), redes, rng.choice(OBJETIVOS), tema
+
+
+def percentiles(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice de similaridade.")
+    parser.add_argument("--entries", type=int, default=100_000, help="Quantidade de gerações indexadas")
+    parser.add_argument("--queries", type=int, default=500, help="Quantidade de buscas medidas")
+    parser.add_argument("--personas", type=int, default=1000, help="Quantidade de personas distintas")
+    parser.add_argument("--dim", type=int, default=SIMILARITY_DIM, help="Dimensão dos vetores")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Arquivo onde salvar o resultado em JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = {"entries": args.entries, "dim": args.dim, "personas": args.personas}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.idx")
+        index = SimilarityIndex(path, args.dim)
+
+        start = time.perf_counter()
+        batch = []
+        for generation_id in range(1, args.entries + 1):
+            batch.append((generation_id, *synthetic_request(rng, args.personas)))
+            if len(batch) == 10_000:
+                index.add_many(batch)
+                batch = []
+        index.add_many(batch)
+        build = time.perf_counter() - start
+        results["build_s"] = round(build, 2)
+        results["build_entries_per_s"] = round(args.entries / build)
+        results["file_mb"] = round(os.path.getsize(path) / 1e6, 1)
+
+        start = time.perf_counter()
+        cold = SimilarityIndex(path, args.dim)
+        entries = len(cold)
+        results["cold_open_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        assert entries == args.entries
+
+        inserts = []
+        for generation_id in range(args.entries + 1, args.entries + 101):
+            start = time.perf_counter()
+            cold.add(generation_id, *synthetic_request(rng, args.personas))
+            inserts.append(time.perf_counter() - start)
+        results["incremental_insert"] = percentiles(inserts)
+
+        for label, personas in (("search", args.personas), ("search_single_persona", 1)):
+            samples = []
+            hits = 0
+            for _ in range(args.queries):
+                persona_id, redes, objetivo, tema = synthetic_request(rng, personas)
+                start = time.perf_counter()
+                hits += bool(cold.search(persona_id, redes, objetivo, tema))
+                samples.append(time.perf_counter() - start)
+            results[label] = {**percentiles(samples), "hit_rate": round(hits / args.queries, 3)}
+
+    print(f"Índice com {args.entries} entradas (dim={args.dim}, {results['file_mb']} MB):")
+    print(f"  construção:          {results['build_s']:.2f} s ({results['build_entries_per_s']} entradas/s)")
+    print(f"  abertura a frio:     {results['cold_open_ms']:.3f} ms")
+    print(f"  inserção incremental p50={results['incremental_insert']['p50_ms']} ms  p95={results['incremental_insert']['p95_ms']} ms")
+    for label in ("search", "search_single_persona"):
+        r = results[label]
+        print(f"  {label:21s} p50={r['p50_ms']} ms  p95={r['p95_ms']} ms  p99={r['p99_ms']} ms  acertos={r['hit_rate']:.0%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# benchmarks/load_test_app.py
+
+"""Teste de carga do app.py com várias sessões simultâneas, via `streamlit.testing` (AppTest).
+
+Cada sessão simulada executa o script real do app em um processo só, como o
+servidor do Streamlit faz: carrega a página, cria uma persona, seleciona-a, pede
+sugestões de temas e gera posts algumas vezes. O Gemini é substituído pelo LLM
+local (core/fake_llm.py) e o BD é um SQLite temporário. Para cada nível de
+concorrência são medidos a latência de cada interação (um `run` do AppTest,
+incluindo os `st.rerun` que ela provocar), o tempo de cada geração, do clique
+até o resultado (o AppTest não executa o `run_every` do fragmento que acompanha
+os jobs, então o acompanhamento é feito com um `run` a cada JOB_POLL_SECONDS),
+as consultas ao BD feitas pelo script em cada interação, a memória por sessão e
+a vazão. Exemplo:
+
+    python benchmarks/load_test_app.py --sessions 1,4,16,32 --latency-ms 800 --json carga.json
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+APP = os.path.join(ROOT, "app.py")
+
+# Chave que identifica a sessão simulada no session_state, lida pelo contador de consultas.
+MARCADOR = "loadtest_session"
+# Chave usada pelo streamlit_local_storage; preenchida como se o navegador já tivesse respondido.
+LOCAL_STORAGE_KEY = "storage_init"
+ESTADO_APP = ("generation_history", "suggested_topics", "last_request", "active_jobs", "similar_offer", "last_topics_persona")
+PALAVRAS = "sorriso clareamento aparelho implante escova promoção evento equipe dica rotina cuidado família".split()
+
+
+class QueryCounter:
+    """Conta as consultas SQL feitas pelo script de cada sessão (threads de workers não entram)."""
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def install(self, engine):
+        from sqlalchemy import event
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            ctx = get_script_run_ctx(suppress_warning=True)
+            if ctx is None or MARCADOR not in ctx.session_state:
+                return
+            with self._lock:
+                self._counts[ctx.session_state[MARCADOR]] += 1
+
+    def take(self, session: str) -> int:
+        with self._lock:
+            return self._counts.pop(session, 0)
+
+
+def share_apptest_globals():
+    """Deixa os `run` concorrentes do AppTest compartilharem o estado global do Streamlit.
+
+    Cada `run` instala um Runtime simulado no singleton da classe e o zera ao
+    terminar; com várias sessões em threads, o fim de um run derrubaria o Runtime
+    dos outros ("Runtime hasn't been created!"). Cada `run` também cria um
+    ScriptCache próprio e recompila o app.py, e compilações simultâneas quebram o
+    `ast.parse` do Python 3.11. Por fim, a opção `global.appTest` é ligada só
+    durante cada `run` e restaurada ao final, e um run concorrente ficaria sem
+    ela (o selectbox deixa de registrar o `format_func`). Como no servidor real,
+    todas as sessões passam a usar um único Runtime (o último instalado) e um
+    único ScriptCache, com a opção ligada o tempo todo.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    ultimo = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            ultimo[:] = [cls._instance]
+        if not ultimo:
+            raise RuntimeError("Runtime hasn't been created!")
+        return ultimo[0]
+
+    def exists(cls):
+        return cls._instance is not None or bool(ultimo)
+
+    config.set_option("global.appTest", True)
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+    script_cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+
+def rss_mb() -> float:
+    """Memória residente atual do processo (Linux); nos demais sistemas, o pico."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SimulatedSession:
+    """Um usuário: um AppTest com sua própria sessão, dirigido pelos mesmos widgets da interface."""
+
+    def __init__(self, name: str, counter: QueryCounter, timeout: float, rng: random.Random, poll_seconds: float = 1.0):
+        from streamlit.testing.v1 import AppTest
+
+        self.name = name
+        self.counter = counter
+        self.timeout = timeout
+        self.rng = rng
+        self.poll_seconds = poll_seconds
+        self.samples = []
+        self.errors = []
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.at.session_state[MARCADOR] = name
+        self.at.session_state[LOCAL_STORAGE_KEY] = {"session_id": str(uuid.uuid4())}
+
+    def _run(self, action: str, element=None):
+        self.counter.take(self.name)
+        start = time.perf_counter()
+        try:
+            (element or self.at).run(timeout=self.timeout)
+            error = self.at.exception[0].message if self.at.exception else None
+        except Exception as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+        self.samples.append((action, elapsed, self.counter.take(self.name)))
+        if error:
+            self.errors.append(f"{action}: {error}")
+        return error is None
+
+    def _widget(self, kind: str, label: str):
+        for widget in getattr(self.at, kind):
+            if widget.label == label:
+                return widget
+        raise LookupError(f"{kind} '{label}' não encontrado na página")
+
+    def scenario(self, generations: int):
+        try:
+            self._scenario(generations)
+        except LookupError as e:
+            self.errors.append(str(e))
+
+    def _scenario(self, generations: int):
+        if not self._run("carregar"):
+            return
+        nome = f"Persona {self.name}"
+        self._widget("text_input", "Nome da Persona").input(nome)
+        self._widget("text_area", "Descrição da Persona").input("Clínica odontológica com público jovem e irreverente.")
+        self._widget("text_area", "Tom de Voz").input("Inspirador e motivacional")
+        if not self._run("criar_persona", self._widget("button", "Salvar Persona").click()):
+            return
+        if not self._run("selecionar_persona", self._widget("selectbox", "Personas Salvas").select(nome)):
+            return
+        self._run("sugerir_temas", self._widget("button", "💡 Sugerir Temas").click())
+        for i in range(generations):
+            self._widget("text_input", "Objetivo do Post").input("Aumentar o engajamento")
+            tema = " ".join(self.rng.sample(PALAVRAS, 4)) + f" {self.name}-{i}"
+            self._widget("text_input", "Tema Central do Post").input(tema)
+            self._widget("multiselect", "Selecione as Redes Sociais").set_value(
+                self.rng.sample(["instagram", "linkedin", "twitter_x"], self.rng.randint(1, 3))
+            )
+            inicio = time.perf_counter()
+            if not self._run("enviar_geracao", self._widget("button", "Gerar Posts ✨").click()):
+                return
+            # Tema parecido com um anterior: o app oferece o resultado antigo antes de gerar.
+            oferta = [b for b in self.at.button if b.label == "Gerar novo mesmo assim ✨"]
+            if oferta and not self._run("enviar_geracao", oferta[0].click()):
+                return
+            if not self._wait_jobs(inicio):
+                return
+
+    def _wait_jobs(self, inicio: float) -> bool:
+        """Acompanha os jobs da sessão como o fragmento da página faria, até todos terminarem.
+
+        Registra "gerar_posts" com o tempo do clique até o resultado e as consultas
+        de todas as verificações feitas no caminho.
+        """
+        consultas = 0
+        while self.at.session_state["active_jobs"]:
+            time.sleep(self.poll_seconds)
+            if not self._run("acompanhar"):
+                return False
+            consultas += self.samples[-1][2]
+            if time.perf_counter() - inicio > self.timeout:
+                self.errors.append("gerar_posts: tempo esgotado aguardando o job")
+                return False
+        self.samples.append(("gerar_posts", time.perf_counter() - inicio, consultas))
+        return True
+
+    def session_state_kb(self) -> float:
+        estado = {k: self.at.session_state[k] for k in ESTADO_APP if k in self.at.session_state}
+        return len(pickle.dumps(estado)) / 1024
+
+
+def percentiles(values: list[float]) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 1)
+
+    return {"n": len(ordered), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+def run_level(sessions: int, args, counter: QueryCounter, poll_seconds: float) -> dict:
+    rng = random.Random(args.seed + sessions)
+    rss_antes = rss_mb()
+    simulated = [SimulatedSession(f"s{sessions}-{i}", counter, args.run_timeout, random.Random(rng.random()), poll_seconds)
+                 for i in range(sessions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(lambda s: s.scenario(args.generations), simulated))
+    elapsed = time.perf_counter() - start
+
+    samples = [sample for s in simulated for sample in s.samples]
+    por_acao = defaultdict(list)
+    consultas = defaultdict(list)
+    for action, seconds, queries in samples:
+        por_acao[action].append(seconds)
+        consultas[action].append(queries)
+    # "gerar_posts" resume várias interações (envio e acompanhamento); as demais são um rerun cada.
+    interacoes = [sample for sample in samples if sample[0] != "gerar_posts"]
+    reruns = [seconds for _, seconds, _ in interacoes]
+    errors = [e for s in simulated for e in s.errors]
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 2),
+        "interactions": len(interacoes),
+        "interactions_per_s": round(len(interacoes) / elapsed, 2),
+        "generations_per_s": round(len(por_acao["gerar_posts"]) / elapsed, 3),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "reruns": percentiles(reruns),
+        "by_action": {
+            action: {**percentiles(values), "db_queries_mean": round(statistics.fmean(consultas[action]), 1),
+                     "db_queries_max": max(consultas[action])}
+            for action, values in por_acao.items()
+        },
+        "db_queries_per_interaction": round(statistics.fmean(q for _, _, q in interacoes), 1) if interacoes else 0,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_per_session_mb": round((rss_mb() - rss_antes) / sessions, 2),
+        "session_state_kb": round(statistics.fmean(s.session_state_kb() for s in simulated), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", default="1,4,16", help="Níveis de sessões simultâneas")
+    parser.add_argument("--generations", type=int, default=3, help="Gerações de posts por sessão")
+    parser.add_argument("--latency-ms", type=float, default=800, help="Latência média do LLM local")
+    parser.add_argument("--jitter-ms", type=float, default=200, help="Desvio padrão da latência")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fração de chamadas com erro 503")
+    parser.add_argument("--job-workers", type=int, help="JOB_EMBEDDED_WORKERS do app (padrão: o do app)")
+    parser.add_argument("--poll-seconds", type=float, help="JOB_POLL_SECONDS do app (padrão: o do app)")
+    parser.add_argument("--run-timeout", type=float, default=120, help="Tempo máximo de cada interação")
+    parser.add_argument("--slo-ms", type=float, default=1500, help="p95 máximo aceitável dos reruns (sem contar a geração)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Arquivo de saída dos resultados")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="personapost-load-")
+    # Lido na importação do core pelo próprio app.py: BD descartável e LLM local.
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.jitter_ms),
+        "FAKE_LLM_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+    })
+    if args.job_workers is not None:
+        os.environ["JOB_EMBEDDED_WORKERS"] = str(args.job_workers)
+    if args.poll_seconds is not None:
+        os.environ["JOB_POLL_SECONDS"] = str(args.poll_seconds)
+    os.environ.setdefault("GEMINI_RPM", "1000000")
+    os.environ.setdefault("GEMINI_TPM", "1000000000")
+
+    from core.database import get_engine
+    from core.jobs import JOB_POLL_SECONDS
+
+    counter = QueryCounter()
+    counter.install(get_engine())
+    share_apptest_globals()
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "levels": [],
+        "breaking_point": None,
+    }
+
+    # Aquece os recursos compartilhados (tabelas, workers, imports) para não contá-los no primeiro nível.
+    SimulatedSession("aquecimento", counter, args.run_timeout, random.Random(args.seed))._run("carregar")
+
+    print(f"{'sessões':>8} {'rerun p50':>10} {'p95':>8} {'p99':>8} {'gerar p50':>10} {'p95':>8} "
+          f"{'SQL/int':>8} {'int/s':>7} {'ger/s':>7} {'MB/sessão':>10} {'erros':>6}")
+    for level in (int(n) for n in args.sessions.split(",")):
+        stats = run_level(level, args, counter, JOB_POLL_SECONDS)
+        results["levels"].append(stats)
+        gerar = stats["by_action"].get("gerar_posts", {})
+        print(f"{level:>8} {stats['reruns'].get('p50_ms', 0):>10.0f} {stats['reruns'].get('p95_ms', 0):>8.0f} "
+              f"{stats['reruns'].get('p99_ms', 0):>8.0f} {gerar.get('p50_ms', 0):>10.0f} {gerar.get('p95_ms', 0):>8.0f} "
+              f"{stats['db_queries_per_interaction']:>8.1f} {stats['interactions_per_s']:>7.2f} "
+              f"{stats['generations_per_s']:>7.3f} {stats['rss_per_session_mb']:>10.2f} {stats['errors']:>6}")
+        if results["breaking_point"] is None and (stats["errors"] or stats["reruns"].get("p95_ms", 0) > args.slo_ms):
+            results["breaking_point"] = level
+
+    if results["breaking_point"] is not None:
+        print(f"\nLimite: com {results['breaking_point']} sessões o p95 dos reruns passou de {args.slo_ms:.0f} ms ou houve erros.")
+    else:
+        print(f"\nNenhum nível passou do p95 de {args.slo_ms:.0f} ms nos reruns.")
+    for stats in results["levels"]:
+        for error in stats["error_samples"]:
+            print(f"  [{stats['sessions']} sessões] {error}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+        print(f"Resultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
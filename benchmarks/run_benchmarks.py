@@ -0,0 +1,212 @@
+# benchmarks/run_benchmarks.py
+
+"""Suíte de benchmarks com o LLM local (core/fake_llm.py), sem gastar cota do Gemini.
+
+Mede a montagem do prompt, a análise da resposta, leituras e escritas de
+personas em um SQLite temporário e a geração de ponta a ponta com 1, 8 e 64
+chamadores simultâneos. Os resultados são salvos em JSON para comparar commits:
+
+    python benchmarks/run_benchmarks.py --json antes.json
+    python benchmarks/run_benchmarks.py --json depois.json --compare antes.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PERSONA = {
+    "nome": "Clínica Odontológica",
+    "descricao": "Clínica odontológica em Fortaleza-CE que deseja um conteúdo jovem e irreverente.",
+    "tom_de_voz": "Inspirador e motivacional",
+}
+OBJETIVO = "Aumentar o engajamento nas redes sociais"
+TEMA = "Uso de aparelhos ortodônticos"
+REDES = ["instagram", "linkedin", "twitter_x"]
+
+
+def summarize(samples: list[float], elapsed: float) -> dict:
+    """Estatísticas de latência (ms) e vazão (operações/s) de uma série de amostras em segundos."""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 4)
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "ops_per_s": round(len(ordered) / elapsed, 2) if elapsed else None,
+    }
+
+
+def timed(fn, iterations: int) -> dict:
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def bench_prompt_and_parse(iterations: int) -> dict:
+    from core.fake_llm import fake_response_text
+    from core.prompt_builder import build_prompt
+    from core.response_parser import StreamingParser, parse_response
+
+    prompt = build_prompt(PERSONA, OBJETIVO, TEMA, REDES)
+    text = fake_response_text(prompt)
+    assert not parse_response(text).faltando, "a resposta do LLM local não segue os templates"
+
+    def stream(_):
+        parser = StreamingParser()
+        for i in range(0, len(text), 80):
+            parser.feed(text[i:i + 80])
+        parser.close()
+
+    return {
+        "build_prompt": timed(lambda _: build_prompt(PERSONA, OBJETIVO, TEMA, REDES), iterations),
+        "parse_response": timed(lambda _: parse_response(text), iterations),
+        "parse_stream": timed(stream, iterations),
+    }
+
+
+def bench_personas(rows: int) -> dict:
+    from core.persona_repository import persona_repository
+
+    session_id = "benchmark-personas"
+    write = timed(lambda i: persona_repository.create(session_id, f"Persona {i}", PERSONA["descricao"], PERSONA["tom_de_voz"]), rows)
+
+    def read_cold(_):
+        persona_repository.invalidate(session_id)
+        persona_repository.list_for_session(session_id)
+
+    return {
+        "persona_write": write,
+        "persona_read_cold": timed(read_cold, max(10, rows // 10)),
+        "persona_read_cached": timed(lambda _: persona_repository.list_for_session(session_id), rows),
+    }
+
+
+def bench_end_to_end(concurrency: int, requests: int, errors: list) -> dict:
+    from core.generation import generate_posts
+
+    def one(i):
+        # Um tema por pedido, para que nenhum deles seja atendido pelo cache de respostas.
+        start = time.perf_counter()
+        try:
+            text, _ = generate_posts(PERSONA, OBJETIVO, f"{TEMA} #{concurrency}-{i}", REDES)
+            if not text:
+                errors.append(i)
+        except Exception:
+            errors.append(i)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(requests)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def git_commit() -> str | None:
+    proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def compare(results: dict, baseline_path: str):
+    """Mostra a variação de p50 e vazão em relação a um resultado anterior."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparação com {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for name, atual in results["benchmarks"].items():
+        anterior = baseline["benchmarks"].get(name)
+        if not anterior:
+            continue
+        delta = (atual["p50_ms"] - anterior["p50_ms"]) / anterior["p50_ms"] * 100 if anterior["p50_ms"] else 0.0
+        print(f"  {name:<28} p50 {anterior['p50_ms']:>10.3f} -> {atual['p50_ms']:>10.3f} ms ({delta:+6.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000, help="Repetições de build_prompt e da análise")
+    parser.add_argument("--personas", type=int, default=500, help="Personas gravadas no benchmark de BD")
+    parser.add_argument("--requests", type=int, default=64, help="Gerações por nível de concorrência")
+    parser.add_argument("--concurrency", default="1,8,64", help="Níveis de chamadores simultâneos")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Latência média do LLM local")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Desvio padrão da latência")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fração de chamadas com erro 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Arquivo de saída dos resultados")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para comparar")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="personapost-bench-")
+    # Configuração lida na importação do core: BD descartável e limitador sem efeito, para medir o código do app.
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.jitter_ms),
+        "FAKE_LLM_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_LLM_SEED": str(args.seed),
+    })
+    os.environ.setdefault("GEMINI_RPM", "1000000")
+    os.environ.setdefault("GEMINI_TPM", "1000000000")
+
+    from core.database import create_db_and_tables
+    from core.generation import FANOUT_MAX_WORKERS
+    from core.llm_client import get_client_stats, get_genai
+
+    create_db_and_tables()
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fanout_max_workers": FANOUT_MAX_WORKERS,
+            "args": vars(args),
+        },
+        "benchmarks": {},
+    }
+
+    print("Montagem do prompt e análise da resposta...")
+    results["benchmarks"].update(bench_prompt_and_parse(args.iterations))
+    print("Personas no SQLite...")
+    results["benchmarks"].update(bench_personas(args.personas))
+    for level in (int(c) for c in args.concurrency.split(",")):
+        print(f"Geração de ponta a ponta com {level} chamador(es)...")
+        errors = []
+        stats = bench_end_to_end(level, args.requests, errors)
+        stats["errors"] = len(errors)
+        results["benchmarks"][f"end_to_end_c{level}"] = stats
+    results["meta"]["llm_calls"] = get_genai().stats()
+    results["meta"]["client"] = {k: v for k, v in get_client_stats().items() if k != "models"}
+
+    print(f"\n{'benchmark':<28} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for name, s in results["benchmarks"].items():
+        print(f"{name:<28} {s['n']:>6} {s['p50_ms']:>10.3f} {s['p95_ms']:>10.3f} {s['p99_ms']:>10.3f} {s['ops_per_s']:>10.1f}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/startup_benchmark.py
+
+"""Mede o custo de inicialização dos pontos de entrada, com detalhamento por módulo.
+
+Cada ponto de entrada tem suas importações executadas em um processo novo com
+`python -X importtime`, o que reproduz um cold start. Exemplo:
+
+    python benchmarks/startup_benchmark.py --top 15 --runs 3
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_POINTS = ["app.py", "main.py", "debug_db.py", "list_models.py", "batch_generate.py"]
+
+# Trabalho adiado para o primeiro uso, medido separadamente em processos novos.
+FIRST_USE = {
+    "engine + create_all (SQLite em memória)": (
+        "import core.database as d; d.create_db_and_tables()",
+        {"DATABASE_URL": "sqlite:///:memory:"},
+    ),
+    "SDK do Gemini (import + configure)": (
+        "import core.llm_client as c; c.configure_llm('chave-de-benchmark'); c.get_genai()",
+        {},
+    ),
+}
+
+
+def top_level_imports(script: str) -> list[str]:
+    """Lista os módulos importados no nível superior do script (sem executá-lo)."""
+    with open(os.path.join(ROOT, script), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules: list[str]) -> tuple[float, list[tuple[str, int, int, int]]]:
+    """Importa os módulos em um processo novo. Retorna (tempo_total_s, [(módulo, nível, self_us, cumulativo_us)])."""
+    code = "\n".join(f"import {m}" for m in modules) or "pass"
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "erro desconhecido"
+        raise RuntimeError(last_line)
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # A indentação do nome indica a profundidade da importação (1 espaço = nível superior).
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return elapsed, entries
+
+
+def measure_first_use(setup: str, env: dict) -> float:
+    """Mede, em um processo novo, o custo de uma inicialização adiada (sem o custo das importações do core)."""
+    code = (
+        "import time, core.database, core.llm_client\n"
+        "start = time.perf_counter()\n"
+        f"{setup}\n"
+        "print(time.perf_counter() - start)"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                          env={**os.environ, **env})
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "erro desconhecido")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de inicialização por ponto de entrada.")
+    parser.add_argument("--top", type=int, default=10, help="Quantidade de módulos mais caros exibidos")
+    parser.add_argument("--runs", type=int, default=3, help="Repetições por ponto de entrada (vale a mediana)")
+    parser.add_argument("--json", help="Arquivo onde salvar o resultado em JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for script in ENTRY_POINTS:
+        modules = top_level_imports(script)
+        try:
+            runs = [measure(modules) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{script}: falhou ao importar ({e})\n")
+            results[script] = {"erro": str(e)}
+            continue
+
+        totals = [elapsed for elapsed, _ in runs]
+        _, entries = runs[-1]
+        top_level = sorted((e for e in entries if e[1] == 0), key=lambda e: e[3], reverse=True)
+        heavy = sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]
+        loaded = {name for name, _, _, _ in entries}
+
+        print(f"== {script} ==  mediana: {statistics.median(totals) * 1000:.0f} ms  "
+              f"({len(entries)} módulos; streamlit={'sim' if 'streamlit' in loaded else 'não'}, "
+              f"google.generativeai={'sim' if 'google.generativeai' in loaded else 'não'})")
+        print("  Importações diretas (cumulativo):")
+        for name, _, _, cumulative in top_level:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        print(f"  Top {args.top} módulos por custo próprio:")
+        for name, _, self_us, _ in heavy:
+            print(f"    {self_us / 1000:8.1f} ms  {name}")
+        print()
+
+        results[script] = {
+            "median_ms": round(statistics.median(totals) * 1000, 1),
+            "runs_ms": [round(t * 1000, 1) for t in totals],
+            "modules": len(entries),
+            "top_level": {name: round(c / 1000, 2) for name, _, _, c in top_level},
+            "heaviest_self": {name: round(s / 1000, 2) for name, _, s, _ in heavy},
+        }
+
+    print("== Inicialização adiada (primeiro uso) ==")
+    results["first_use"] = {}
+    for label, (setup, env) in FIRST_USE.items():
+        try:
+            elapsed = statistics.median(measure_first_use(setup, env) for _ in range(args.runs))
+        except RuntimeError as e:
+            print(f"    {label}: falhou ({e})")
+            results["first_use"][label] = {"erro": str(e)}
+            continue
+        print(f"    {elapsed * 1000:8.1f} ms  {label}")
+        results["first_use"][label] = round(elapsed * 1000, 1)
+    print()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# core/cache.py
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from .database import session_scope
+from .metrics import metrics
+from .llm_client import generate_content, model_for, request_key
+from .models import LLMCacheEntry
+from .prompt_templates import TEMPLATE_VERSION
+
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 5000))
+CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", 256))
+CACHE_EVICT_EVERY = int(os.getenv("LLM_CACHE_EVICT_EVERY", 100))
+
+
+def cache_key(model_name: str, prompt: str) -> str:
+    """Gera a chave do cache a partir do modelo, da versão dos templates e do prompt."""
+    return request_key(f"{model_name}@v{TEMPLATE_VERSION}", prompt)
+
+
+class ResponseCache:
+    """Cache de respostas do LLM em dois níveis: LRU em memória e tabela no BD."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int, memory_entries: int, evict_every: int = CACHE_EVICT_EVERY):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.evict_every = max(1, evict_every)
+        self._writes = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_db = 0
+        self.misses = 0
+
+    def _remember(self, key: str, text: str, expires_at: datetime):
+        with self._lock:
+            self._memory[key] = (text, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """Retorna a resposta armazenada ou None se ausente/expirada."""
+        now = datetime.utcnow()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                text, expires_at = item
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    metrics.inc("cache_requests_total", result="hit_memory")
+                    return text
+                del self._memory[key]
+
+        try:
+            with session_scope() as db:
+                entry = db.get(LLMCacheEntry, key)
+                if entry is None or entry.criado_em + self.ttl <= now:
+                    text = None
+                else:
+                    entry.acessado_em = now
+                    text, expires_at = entry.resposta, entry.criado_em + self.ttl
+        except Exception as e:
+            print(f"Erro ao ler o cache de respostas: {e}")
+            text = None
+        if text is None:
+            with self._lock:
+                self.misses += 1
+            metrics.inc("cache_requests_total", result="miss")
+            return None
+
+        self._remember(key, text, expires_at)
+        with self._lock:
+            self.hits_db += 1
+        metrics.inc("cache_requests_total", result="hit_db")
+        return text
+
+    def set(self, key: str, model_name: str, text: str):
+        """Armazena a resposta nos dois níveis e aplica as regras de despejo."""
+        now = datetime.utcnow()
+        self._remember(key, text, now + self.ttl)
+
+        try:
+            with session_scope() as db:
+                entry = db.get(LLMCacheEntry, key)
+                if entry is None:
+                    db.add(LLMCacheEntry(chave=key, modelo=model_name, resposta=text, criado_em=now, acessado_em=now))
+                else:
+                    entry.resposta = text
+                    entry.criado_em = now
+                    entry.acessado_em = now
+                db.commit()
+                if self._due_for_eviction():
+                    self._evict(db, now)
+        except IntegrityError:
+            # Outro worker gravou a mesma chave ao mesmo tempo; a resposta dele serve.
+            pass
+        except Exception as e:
+            print(f"Erro ao gravar no cache de respostas: {e}")
+
+    def _due_for_eviction(self) -> bool:
+        """Conta as gravações; o despejo roda uma vez a cada `evict_every`."""
+        with self._lock:
+            self._writes += 1
+            return self._writes % self.evict_every == 0
+
+    def _evict(self, db, now: datetime):
+        """Remove entradas expiradas e as menos acessadas além do limite.
+
+        Um único DELETE limitado pelo índice de `acessado_em`, sem contar a tabela.
+        """
+        db.query(LLMCacheEntry).filter(LLMCacheEntry.criado_em <= now - self.ttl).delete(synchronize_session=False)
+        keep = db.query(LLMCacheEntry.chave).order_by(LLMCacheEntry.acessado_em.desc()).limit(self.max_entries)
+        db.query(LLMCacheEntry).filter(LLMCacheEntry.chave.not_in(keep.scalar_subquery())).delete(synchronize_session=False)
+        db.commit()
+
+    def stats(self) -> dict:
+        """Retorna os contadores de acertos e falhas do cache."""
+        with self._lock:
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_db": self.hits_db,
+                "misses": self.misses,
+                "memory_size": len(self._memory),
+            }
+
+
+response_cache = ResponseCache(CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES, CACHE_MEMORY_ENTRIES)
+
+
+def generate_content_cached(full_prompt: str, model_name: str | None = None, refresh: bool = False, task: str = "posts"):
+    """Gera conteúdo usando o cache. Retorna (texto, veio_do_cache).
+
+    Com refresh=True o cache é ignorado e a nova resposta substitui a anterior.
+    A chave usa o modelo principal da rota, mesmo que a resposta venha do hedge.
+    """
+    key = cache_key(model_name or model_for(task), full_prompt)
+    if not refresh:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, True
+
+    text = generate_content(full_prompt, model_name, task=task)
+    if text:
+        response_cache.set(key, model_name or model_for(task), text)
+    return text, False
@@ -0,0 +1,184 @@
+# core/context_cache.py
+
+"""Cache de contexto no provedor para o prefixo estável dos prompts.
+
+Os prompts começam pelas instruções e blocos de formatação (ver
+`prompt_builder.static_prefixes`). Quando um prompt começa por um desses
+prefixos, o prefixo é registrado uma vez no provedor e as chamadas seguintes
+enviam só o restante (persona e pedido), pagando o prefixo como tokens em cache.
+
+`GeminiContextCache` usa a API de cached content do Gemini; `InMemoryContextCache`
+implementa a mesma interface localmente, para testes e para o LLM local.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import timedelta
+
+from .llm_client import estimate_tokens
+from .metrics import metrics
+from .prompt_builder import static_prefixes
+
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", 3600))
+# O Gemini recusa conteúdo em cache abaixo de um mínimo de tokens (que varia por modelo).
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", 1024))
+# Renova o registro um pouco antes de expirar, para nunca usar um cache vencido.
+_MARGEM_SEGUNDOS = 60
+
+
+class ContextCache(ABC):
+    """Interface: `create` registra um prefixo e `bind` devolve o modelo que já o contém."""
+
+    min_tokens = 0
+
+    def __init__(self, ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._create_lock = threading.Lock()
+        self._prefixes = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @abstractmethod
+    def create(self, model_name: str, prefix: str) -> str:
+        """Registra o prefixo no provedor e retorna o identificador do cache."""
+
+    @abstractmethod
+    def bind(self, model_name: str, handle: str, model):
+        """Retorna o modelo a ser chamado com o restante do prompt, ou None se o registro já foi descartado."""
+
+    def discard(self, handle: str):
+        """Esquece um registro substituído; no provedor ele expira sozinho pelo TTL."""
+
+    def _match(self, prompt: str) -> str | None:
+        if self._prefixes is None:
+            # Do mais longo para o mais curto: vale o prefixo mais específico.
+            self._prefixes = sorted(
+                (p for p in static_prefixes() if estimate_tokens(p) >= self.min_tokens), key=len, reverse=True
+            )
+        return next((p for p in self._prefixes if prompt.startswith(p)), None)
+
+    def resolve(self, model_name: str, prompt: str, model):
+        """Retorna (modelo, conteúdo a enviar). Sem prefixo conhecido, o prompt vai inteiro ao modelo original."""
+        prefix = self._match(prompt)
+        if prefix is None:
+            return model, prompt
+        key = (model_name, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+        handle, fresh = self._lookup(key)
+        if not fresh:
+            # Um registro por vez: quem chega enquanto outro registra espera e reaproveita o resultado.
+            with self._create_lock:
+                handle, fresh = self._lookup(key)
+                if not fresh:
+                    handle = self._register(key, model_name, prefix)
+        if handle is None:
+            return model, prompt
+        bound = self.bind(model_name, handle, model)
+        if bound is None:
+            # O registro foi renovado por outra thread entre a consulta e o uso.
+            return model, prompt
+        return bound, prompt[len(prefix):]
+
+    def _lookup(self, key) -> tuple[str | None, bool]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None, False
+            if entry[0] is not None:
+                self.hits += 1
+        if entry[0] is not None:
+            metrics.inc("context_cache_requests_total", result="hit")
+        return entry[0], True
+
+    def _register(self, key, model_name: str, prefix: str) -> str | None:
+        now = time.monotonic()
+        try:
+            handle = self.create(model_name, prefix)
+            expires_at = now + max(self.ttl_seconds - _MARGEM_SEGUNDOS, self.ttl_seconds / 2)
+        except Exception as e:
+            # Após uma falha, o prefixo segue sem cache até o próximo TTL.
+            print(f"Não foi possível registrar o cache de contexto: {e}")
+            handle, expires_at = None, now + self.ttl_seconds
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = (handle, expires_at)
+            if handle is None:
+                self.errors += 1
+            else:
+                self.misses += 1
+        if previous is not None and previous[0] is not None:
+            self.discard(previous[0])
+        metrics.inc("context_cache_requests_total", result="miss" if handle else "error")
+        return handle
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class GeminiContextCache(ContextCache):
+    """Registra os prefixos com `genai.caching.CachedContent`."""
+
+    min_tokens = CONTEXT_CACHE_MIN_TOKENS
+
+    def __init__(self, get_genai, ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self._get_genai = get_genai
+        self._handles = {}
+
+    def create(self, model_name: str, prefix: str) -> str:
+        genai = self._get_genai()
+        cached = genai.caching.CachedContent.create(
+            model=f"models/{model_name}", contents=[prefix], ttl=timedelta(seconds=self.ttl_seconds)
+        )
+        self._handles[cached.name] = genai.GenerativeModel.from_cached_content(cached_content=cached)
+        return cached.name
+
+    def bind(self, model_name: str, handle: str, model):
+        return self._handles.get(handle)
+
+    def discard(self, handle: str):
+        self._handles.pop(handle, None)
+
+
+class _PrefixedModel:
+    """Modelo do cache local: envia prefixo + restante e informa o prefixo como tokens em cache."""
+
+    def __init__(self, model, prefix: str):
+        self._model = model
+        self._prefix = prefix
+        self._cached_tokens = estimate_tokens(prefix)
+
+    def generate_content(self, contents: str, **kwargs):
+        response = self._model.generate_content(self._prefix + contents, **kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and hasattr(usage, "cached_content_token_count"):
+            usage.cached_content_token_count = self._cached_tokens
+        return response
+
+
+class InMemoryContextCache(ContextCache):
+    """Substituto local do cache do provedor, com a mesma contabilidade de registros e acertos."""
+
+    def __init__(self, ttl_seconds: int = CONTEXT_CACHE_TTL_SECONDS, min_tokens: int = 0):
+        super().__init__(ttl_seconds)
+        self.min_tokens = min_tokens
+        self.created = {}
+
+    def create(self, model_name: str, prefix: str) -> str:
+        handle = f"cachedContents/local-{uuid.uuid4().hex[:12]}"
+        self.created[handle] = prefix
+        return handle
+
+    def bind(self, model_name: str, handle: str, model):
+        prefix = self.created.get(handle)
+        return None if prefix is None else _PrefixedModel(model, prefix)
+
+    def discard(self, handle: str):
+        self.created.pop(handle, None)
@@ -1,38 +1,185 @@
 # core/database.py
+import logging
 import os
-import streamlit as st
-from sqlalchemy import create_engine
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, func, select
 from sqlalchemy.orm import sessionmaker
+from .metrics import instrument_engine
 from .models import Base
-from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
 
-load_dotenv()
+_dotenv_loaded = False
 
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+def get_setting(name: str, default=None):
+    """Lê uma configuração das variáveis de ambiente ou, na falta delas, do st.secrets.
 
+    O .env só é lido na primeira consulta, e o st.secrets só é usado quando o
+    Streamlit já foi carregado pelo processo (scripts de linha de comando não o importam).
+    """
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+    value = os.getenv(name)
+    if value is None and "streamlit" in sys.modules:
+        try:
+            value = sys.modules["streamlit"].secrets.get(name)
+        except (FileNotFoundError, AttributeError):
+            value = None
+    return default if value is None else value
 
-if not DATABASE_URL:
-    try:
-        DATABASE_URL = st.secrets.get("DATABASE_URL")
-    except (FileNotFoundError, AttributeError):
-        DATABASE_URL = None 
+
+def _bool(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "sim", "on")
+
+
+# Estatísticas do pool, atualizadas pelos eventos do SQLAlchemy e por session_scope.
+_pool_stats = {
+    "connects": 0,
+    "checkouts": 0,
+    "checkins": 0,
+    "invalidated": 0,
+    "waits": 0,
+    "total_wait_s": 0.0,
+    "max_wait_s": 0.0,
+}
+_pool_stats_lock = threading.Lock()
+
+
+def _count(key: str):
+    with _pool_stats_lock:
+        _pool_stats[key] += 1
+
+
+def _instrument_pool(engine):
+    event.listen(engine, "connect", lambda *args: _count("connects"))
+    event.listen(engine, "checkout", lambda *args: _count("checkouts"))
+    event.listen(engine, "checkin", lambda *args: _count("checkins"))
+    event.listen(engine, "invalidate", lambda *args: _count("invalidated"))
+
+
+def _sqlite_pragmas(journal_mode: str, synchronous: str, busy_timeout_ms: int):
+    """Cria o listener que configura cada nova conexão SQLite."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL permite leituras concorrentes com uma escrita em andamento.
+        cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        cursor.close()
+    return on_connect
+
+
+def build_engine(url: str):
+    """Cria o engine conforme o perfil de desempenho configurado (env ou st.secrets)."""
+    if url.startswith("sqlite"):
+        busy_timeout_ms = int(get_setting("SQLITE_BUSY_TIMEOUT_MS", 5000))
+        engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": busy_timeout_ms / 1000})
+        event.listen(engine, "connect", _sqlite_pragmas(
+            get_setting("SQLITE_JOURNAL_MODE", "WAL"),
+            get_setting("SQLITE_SYNCHRONOUS", "NORMAL"),
+            busy_timeout_ms,
+        ))
+    else:
+        engine = create_engine(
+            url,
+            pool_size=int(get_setting("DB_POOL_SIZE", 5)),
+            max_overflow=int(get_setting("DB_MAX_OVERFLOW", 10)),
+            pool_timeout=float(get_setting("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(get_setting("DB_POOL_RECYCLE", 1800)),
+            pool_pre_ping=_bool(get_setting("DB_POOL_PRE_PING", "true")),
+        )
+    _instrument_pool(engine)
+    instrument_engine(engine)
+    return engine
+
+
+def get_database_url() -> str:
+    """Resolve a URL do banco, usando SQLite local quando nenhuma estiver configurada."""
+    url = get_setting("DATABASE_URL")
+    if not url:
+        return "sqlite:///./personapost.db"
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    return url
 
 
-if not DATABASE_URL:
-    DATABASE_URL = "sqlite:///./personapost.db"
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    if DATABASE_URL.startswith("postgres://"):
-        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    engine = create_engine(DATABASE_URL)
+_engine = None
+_engine_lock = threading.Lock()
+_sessionmaker = sessionmaker(autocommit=False, autoflush=False)
+
+
+def get_engine():
+    """Retorna o engine, criando-o no primeiro uso."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = build_engine(get_database_url())
+                _sessionmaker.configure(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def SessionLocal():
+    """Abre uma nova sessão ORM (o engine é criado na primeira chamada)."""
+    get_engine()
+    return _sessionmaker()
+
+
+def __getattr__(name):
+    # Mantém `from core.database import engine` funcionando sem criar o engine na importação.
+    if name == "engine":
+        return get_engine()
+    if name == "DATABASE_URL":
+        return get_database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _duplicate_groups(engine, index) -> int:
+    """Quantos grupos de linhas repetem os valores das colunas do índice."""
+    grupos = select(*index.columns).group_by(*index.columns).having(func.count() > 1).subquery()
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(grupos)).scalar_one()
+    except Exception:
+        return -1
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def create_db_and_tables():
+    """Cria as tabelas e os índices que faltam.
 
+    Um índice único que não pode ser criado (linhas repetidas já gravadas)
+    interrompe a inicialização: o app depende dele para barrar duplicatas,
+    como em `PersonaDuplicadaError`.
+    """
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    # create_all não adiciona índices novos a tabelas que já existem.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                if not index.unique:
+                    logger.warning("Não foi possível criar o índice %s da tabela %s: %s", index.name, table.name, e)
+                    continue
+                colunas = ", ".join(c.name for c in index.columns)
+                grupos = _duplicate_groups(engine, index)
+                logger.warning(
+                    "Não foi possível criar o índice único %s da tabela %s (%s); grupos de linhas repetidas: %s. %s",
+                    index.name, table.name, colunas, grupos if grupos >= 0 else "?", e,
+                )
+                raise RuntimeError(
+                    f"O índice único {index.name} da tabela {table.name} não pôde ser criado. "
+                    f"Remova ou renomeie as linhas com ({colunas}) repetidos e inicie o app novamente."
+                ) from e
 
 def get_db():
     ""
@@ -40,4 +187,40 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@contextmanager
+def session_scope():
+    """Abre uma sessão, faz commit ao final (ou rollback em caso de erro) e sempre a fecha.
+
+    A conexão é obtida logo na entrada para medir o tempo de espera pelo pool.
+    """
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        db.connection()
+        waited = time.perf_counter() - start
+        with _pool_stats_lock:
+            _pool_stats["waits"] += 1
+            _pool_stats["total_wait_s"] += waited
+            _pool_stats["max_wait_s"] = max(_pool_stats["max_wait_s"], waited)
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def get_pool_stats() -> dict:
+    """Retorna o estado atual do pool e os contadores de checkout e espera."""
+    pool = get_engine().pool
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    stats["avg_wait_s"] = stats["total_wait_s"] / stats["waits"] if stats["waits"] else 0.0
+    for attr in ("size", "checkedout", "overflow"):
+        method = getattr(pool, attr, None)
+        if callable(method):
+            stats[attr] = method()
+    stats["status"] = pool.status()
+    return stats
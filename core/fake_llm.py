@@ -0,0 +1,199 @@
+# core/fake_llm.py
+
+"""Substituto local e determinístico do SDK do Gemini, para benchmarks e testes sem gastar cota.
+
+Ativado com `LLM_BACKEND=fake` (ou `llm_client.set_backend(FakeGenAI(...))`).
+As respostas seguem os blocos de formatação presentes no próprio prompt, então
+passam pelo `parse_response` como uma resposta real. O texto depende apenas do
+prompt e da semente; a latência e as falhas vêm de um gerador com a mesma
+semente, compartilhado pelas chamadas.
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", 800))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", 200))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", 0.0))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", 0))
+FAKE_LLM_CHUNK_CHARS = int(os.getenv("FAKE_LLM_CHUNK_CHARS", 80))
+# Parte da latência gasta antes do primeiro trecho no modo streaming.
+FAKE_LLM_FIRST_CHUNK_FRACTION = float(os.getenv("FAKE_LLM_FIRST_CHUNK_FRACTION", 0.3))
+
+_SECAO = re.compile(r"^\*\*\[SAÍDA PARA ([^\]\n]+)\]\*\*\s*$", re.MULTILINE)
+_OPCAO = re.compile(r"^\*\*\[OPÇÃO (\d+)\]\*\*\s*$", re.MULTILINE)
+_CAMPO = re.compile(r"^- \*\*([^*:]+):\*\* \[([^\]\n]*)\]", re.MULTILINE)
+_PERSONA = re.compile(r"^\*\*\[PERSONA (\d+)\]\*\*", re.MULTILINE)
+_ASSUNTO = re.compile(r"\*\*Assunto:\*\* (.+)")
+_QUANTIDADE = re.compile(r"(\d+) hashtags")
+
+_PALAVRAS = (
+    "conteúdo estratégia público engajamento ideia dica rotina resultado marca história "
+    "comunidade confiança novidade desafio conquista inspiração cuidado qualidade futuro "
+    "experiência detalhe equipe cliente momento escolha energia caminho valor hoje"
+).split()
+
+
+class FakeLLMError(Exception):
+    """Falha simulada; `code` segue os status HTTP que o llm_client trata como transitórios."""
+
+    def __init__(self, code: int = 503, message: str = "falha simulada do LLM local"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+def _timeout_error() -> FakeLLMError:
+    # Como o DeadlineExceeded do SDK quando `request_options["timeout"]` se esgota.
+    return FakeLLMError(504, "tempo limite da requisição esgotado")
+
+
+@dataclass(slots=True)
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+    total_token_count: int
+    cached_content_token_count: int = 0
+
+
+@dataclass(slots=True)
+class FakeChunk:
+    text: str
+
+
+class FakeResponse:
+    """Imita a resposta do SDK: `text`, `usage_metadata` e, no streaming, iteração pelos trechos."""
+
+    def __init__(self, text: str, usage: FakeUsage, chunks: list[str] | None = None, delays: list[float] | None = None,
+                 deadline: float | None = None):
+        self.text = text
+        self.usage_metadata = usage
+        self._chunks = chunks or []
+        self._delays = delays or []
+        self._deadline = deadline
+
+    def __iter__(self):
+        for chunk, delay in zip(self._chunks, self._delays):
+            if self._deadline is not None and time.monotonic() + delay > self._deadline:
+                time.sleep(max(0.0, self._deadline - time.monotonic()))
+                raise _timeout_error()
+            time.sleep(delay)
+            yield FakeChunk(chunk)
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _frase(rng: random.Random, tema: str, palavras: int) -> str:
+    return f"{tema}: " + " ".join(rng.choice(_PALAVRAS) for _ in range(palavras)) + "."
+
+
+def _campo(rng: random.Random, tema: str, nome: str, instrucao: str) -> str:
+    if nome == "Hashtags":
+        m = _QUANTIDADE.search(instrucao)
+        return " ".join(f"#{rng.choice(_PALAVRAS)}{i}" for i in range(int(m.group(1)) if m else 3))
+    if nome == "Sugestão de Mídia":
+        return _frase(rng, "Imagem", 12)
+    return _frase(rng, tema, 25 if nome == "Tweet" else 60)
+
+
+def _secoes(prompt: str, rng: random.Random, tema: str) -> str:
+    """Responde aos blocos de formatação do prompt, na ordem em que aparecem."""
+    partes = []
+    marcadores = list(_SECAO.finditer(prompt))
+    for i, secao in enumerate(marcadores):
+        fim = marcadores[i + 1].start() if i + 1 < len(marcadores) else len(prompt)
+        bloco = prompt[secao.end():fim]
+        linhas = [f"**[SAÍDA PARA {secao.group(1)}]**"]
+        opcoes = list(_OPCAO.finditer(bloco))
+        for j, opcao in enumerate(opcoes):
+            corpo = bloco[opcao.end():opcoes[j + 1].start() if j + 1 < len(opcoes) else len(bloco)]
+            linhas.append(f"**[OPÇÃO {opcao.group(1)}]**")
+            linhas.extend(f"- **{nome}:** {_campo(rng, tema, nome, instrucao)}" for nome, instrucao in _CAMPO.findall(corpo))
+        partes.append("\n".join(linhas))
+    return "\n---\n".join(partes)
+
+
+def fake_response_text(prompt: str, seed: int = FAKE_LLM_SEED) -> str:
+    """Texto de resposta para o prompt: posts, várias personas ou lista de temas."""
+    rng = random.Random(hashlib.sha256(f"{seed}\0{prompt}".encode("utf-8")).digest())
+    m = _ASSUNTO.search(prompt)
+    tema = m.group(1).strip() if m else "Tema"
+    if not _SECAO.search(prompt):
+        return "\n".join(f"{i}. {_frase(rng, 'Ideia', 5).removesuffix('.')}" for i in range(1, 6))
+    numeros = _PERSONA.findall(prompt)
+    if "[INÍCIO PERSONA" in prompt and numeros:
+        return "\n".join(
+            f"[INÍCIO PERSONA {n}]\n{_secoes(prompt, rng, tema)}\n[FIM PERSONA {n}]" for n in numeros
+        )
+    return _secoes(prompt, rng, tema)
+
+
+class FakeModel:
+    def __init__(self, backend: "FakeGenAI", model_name: str):
+        self.backend = backend
+        self.model_name = model_name
+
+    def generate_content(self, prompt: str, stream: bool = False, request_options: dict | None = None):
+        latency, falhou = self.backend._draw()
+        text = fake_response_text(prompt, self.backend.seed)
+        usage = FakeUsage(_tokens(prompt), _tokens(text), _tokens(prompt) + _tokens(text))
+        timeout = (request_options or {}).get("timeout")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        primeira = latency if not stream else latency * FAKE_LLM_FIRST_CHUNK_FRACTION
+        if timeout is not None and primeira > timeout:
+            time.sleep(max(0.0, timeout))
+            raise _timeout_error()
+        if not stream:
+            time.sleep(latency)
+            if falhou:
+                raise FakeLLMError()
+            return FakeResponse(text, usage)
+        # No streaming a falha acontece ao abrir a chamada, como um erro de status da API.
+        time.sleep(primeira)
+        if falhou:
+            raise FakeLLMError()
+        size = self.backend.chunk_chars
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        restante = latency * (1 - FAKE_LLM_FIRST_CHUNK_FRACTION) / max(1, len(chunks))
+        return FakeResponse(text, usage, chunks, [0.0] + [restante] * (len(chunks) - 1), deadline)
+
+
+class FakeGenAI:
+    """Mesma interface usada do `google.generativeai`: `configure` e `GenerativeModel`."""
+
+    def __init__(self, latency_ms: float = FAKE_LLM_LATENCY_MS, jitter_ms: float = FAKE_LLM_JITTER_MS,
+                 failure_rate: float = FAKE_LLM_FAILURE_RATE, seed: int = FAKE_LLM_SEED,
+                 chunk_chars: int = FAKE_LLM_CHUNK_CHARS):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def configure(self, api_key=None, **kwargs):
+        pass
+
+    def GenerativeModel(self, model_name: str) -> FakeModel:
+        return FakeModel(self, model_name)
+
+    def _draw(self) -> tuple[float, bool]:
+        """Sorteia a latência (segundos) e se a chamada falha."""
+        with self._lock:
+            self.calls += 1
+            latency = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000 if self.jitter_ms else self.latency_ms / 1000
+            falhou = self._rng.random() < self.failure_rate
+            self.failures += falhou
+        return latency, falhou
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "failures": self.failures}
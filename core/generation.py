@@ -0,0 +1,114 @@
+# core/generation.py
+
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import cache_key, generate_content_cached, response_cache
+from .llm_client import generate_content_stream, model_for
+from .metrics import metrics
+from .prompt_builder import build_platform_prompts, build_prompt
+from .repair import repair_response
+from .response_parser import StreamingParser
+
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", 6))
+
+# Pool compartilhado por todas as sessões, limitando as chamadas simultâneas ao Gemini.
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+_FIM = object()
+
+
+def submit_call(fn, *args, **kwargs):
+    """Agenda `fn` no pool de fan-out, que limita as chamadas simultâneas ao Gemini de todo o processo."""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def _build_prompts(persona: dict, objetivo: str, tema: str, redes_sociais: list[str], fan_out: bool) -> list[str]:
+    with metrics.span("build_prompt"):
+        if not fan_out or len(redes_sociais) <= 1:
+            return [build_prompt(persona, objetivo, tema, redes_sociais)]
+        return list(build_platform_prompts(persona, objetivo, tema, redes_sociais).values())
+
+
+def _merge(results: list):
+    """Concatena as respostas parciais na ordem dos prompts. Retorna (texto, veio_do_cache)."""
+    textos = [text.strip() for text, _ in results if text]
+    if not textos:
+        return None, False
+    return "\n\n".join(textos), all(from_cache for text, from_cache in results if text)
+
+
+def generate_posts(persona: dict, objetivo: str, tema: str, redes_sociais: list[str], fan_out: bool = True, refresh: bool = False):
+    """Gera os posts das redes selecionadas. Retorna (texto, veio_do_cache).
+
+    No modo fan-out cada rede recebe seu próprio prompt e as chamadas rodam em
+    paralelo; as respostas são concatenadas na ordem do template, de modo que
+    `parse_response` produz o mesmo resultado do prompt único. Redes ou opções
+    que faltarem na resposta são pedidas em uma chamada de reparo.
+    """
+    with metrics.span("generate_posts", mode="batch"):
+        prompts = _build_prompts(persona, objetivo, tema, redes_sociais, fan_out)
+        if len(prompts) == 1:
+            text, from_cache = generate_content_cached(prompts[0], refresh=refresh)
+        else:
+            futures = [_executor.submit(generate_content_cached, prompt, refresh=refresh) for prompt in prompts]
+            text, from_cache = _merge([future.result() for future in futures])
+        return repair_response(text, persona, objetivo, tema, redes_sociais, refresh), from_cache
+
+
+def _stream_one(prompt: str, events: queue.Queue, refresh: bool):
+    """Consome o stream de um prompt, publicando cada opção completa na fila."""
+    model_name = model_for("posts")
+    key = cache_key(model_name, prompt)
+    cached = None if refresh else response_cache.get(key)
+    parser = StreamingParser()
+    partes = []
+    parse_seconds = 0.0
+    try:
+        chunks = [cached] if cached is not None else generate_content_stream(prompt, model_name)
+        for chunk in chunks:
+            partes.append(chunk)
+            inicio = time.perf_counter()
+            novos = parser.feed(chunk)
+            parse_seconds += time.perf_counter() - inicio
+            for event in novos:
+                events.put(event)
+        for event in parser.close():
+            events.put(event)
+        # Tempo total gasto no parser incremental, somado entre os trechos recebidos.
+        metrics.observe("stage_seconds", parse_seconds, stage="parse_stream", status="ok")
+    except Exception as e:
+        print(f"Ocorreu um erro ao chamar a API: {e}")
+        return None, False
+    finally:
+        events.put(_FIM)
+
+    text = "".join(partes)
+    if cached is None and text:
+        response_cache.set(key, model_name, text)
+    return text, cached is not None
+
+
+def stream_posts(persona: dict, objetivo: str, tema: str, redes_sociais: list[str], on_option, fan_out: bool = True, refresh: bool = False):
+    """Gera os posts em streaming. Retorna (texto, veio_do_cache) como `generate_posts`.
+
+    `on_option(plataforma, indice, opcao)` é chamado na thread de quem invocou
+    esta função sempre que uma opção fica completa, o que permite ao Streamlit
+    renderizar cada rede enquanto as demais ainda estão sendo geradas.
+    """
+    with metrics.span("generate_posts", mode="stream"):
+        prompts = _build_prompts(persona, objetivo, tema, redes_sociais, fan_out)
+        events = queue.Queue()
+        futures = [_executor.submit(_stream_one, prompt, events, refresh) for prompt in prompts]
+
+        pendentes = len(futures)
+        while pendentes:
+            event = events.get()
+            if event is _FIM:
+                pendentes -= 1
+            else:
+                on_option(*event)
+        text, from_cache = _merge([future.result() for future in futures])
+        return repair_response(text, persona, objetivo, tema, redes_sociais, refresh), from_cache
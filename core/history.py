@@ -0,0 +1,157 @@
+# core/history.py
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from .cache import cache_key
+from .llm_client import model_for
+from .metrics import metrics
+from .models import Generation
+from .prompt_builder import build_prompt
+from .response_parser import RespostaAnalisada, parse_response
+
+HISTORY_PAGE_SIZE = 5
+
+_sync_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class GenerationItem:
+    id: int
+    criado_em: datetime
+    tema: str
+    resultado: RespostaAnalisada
+    do_cache: bool
+    duracao_ms: int | None
+
+    @property
+    def cursor(self) -> tuple:
+        return self.criado_em, self.id
+
+
+@dataclass(slots=True)
+class SimilarGeneration:
+    item: GenerationItem
+    resposta: str
+    similaridade: float
+
+
+def _to_item(generation: Generation) -> GenerationItem:
+    return GenerationItem(
+        id=generation.id,
+        criado_em=generation.criado_em,
+        tema=generation.tema,
+        resultado=RespostaAnalisada.from_dict(generation.resultado),
+        do_cache=generation.do_cache,
+        duracao_ms=generation.duracao_ms,
+    )
+
+
+def save_generation(db: Session, session_id: str, persona: dict, objetivo: str, tema: str, redes_sociais: list[str],
+                    resposta: str, do_cache: bool = False, duracao_ms: int | None = None) -> GenerationItem:
+    """Analisa a resposta uma única vez e grava a geração com seus metadados."""
+    with metrics.span("parse"):
+        resultado = parse_response(resposta)
+    generation = Generation(
+        session_id=session_id,
+        persona_id=persona.get("id"),
+        prompt_hash=cache_key(model_for("posts"), build_prompt(persona, objetivo, tema, redes_sociais)),
+        modelo=model_for("posts"),
+        objetivo=objetivo,
+        tema=tema,
+        redes_sociais=list(redes_sociais),
+        resposta=resposta,
+        resultado=resultado.to_dict(),
+        do_cache=do_cache,
+        duracao_ms=duracao_ms,
+        criado_em=datetime.utcnow(),
+    )
+    db.add(generation)
+    db.commit()
+    if not do_cache:
+        _index_generation(generation)
+    return GenerationItem(generation.id, generation.criado_em, tema, resultado, do_cache, duracao_ms)
+
+
+def get_generation(db: Session, session_id: str, generation_id: int) -> GenerationItem | None:
+    generation = db.query(Generation).filter(Generation.id == generation_id, Generation.session_id == session_id).first()
+    return _to_item(generation) if generation is not None else None
+
+
+def list_generations(db: Session, session_id: str, before: tuple | None = None, limit: int = HISTORY_PAGE_SIZE) -> list[GenerationItem]:
+    """Retorna as gerações mais recentes da sessão, paginando por cursor (criado_em, id).
+
+    O custo de cada página é constante, independentemente do tamanho do histórico.
+    """
+    query = db.query(Generation).filter(Generation.session_id == session_id)
+    if before is not None:
+        criado_em, generation_id = before
+        query = query.filter(or_(
+            Generation.criado_em < criado_em,
+            and_(Generation.criado_em == criado_em, Generation.id < generation_id),
+        ))
+    rows = query.order_by(Generation.criado_em.desc(), Generation.id.desc()).limit(limit).all()
+    return [_to_item(row) for row in rows]
+
+
+def _index_generation(generation: Generation):
+    """Acrescenta a geração ao índice de similaridade; falhas no índice nunca impedem a gravação."""
+    # Importado sob demanda: o NumPy só é carregado quando o índice é usado.
+    from .similarity import SIMILARITY_ENABLED, similarity_index
+    if not SIMILARITY_ENABLED:
+        return
+    try:
+        similarity_index.add(generation.id, generation.persona_id, generation.redes_sociais, generation.objetivo, generation.tema)
+    except Exception as e:
+        print(f"Não foi possível indexar a geração {generation.id}: {e}")
+
+
+def sync_similarity_index(db: Session, batch_size: int = 1000) -> int:
+    """Acrescenta ao índice de similaridade as gerações gravadas que ainda não estão nele.
+
+    O número de registros do índice é comparado com o de gerações no BD: o
+    arquivo pode ter sido criado por um worker antes de existir um índice das
+    gerações anteriores, ou ter perdido anexações que falharam. Só as gerações
+    ausentes são vetorizadas; as anexações concorrentes não geram duplicatas.
+    """
+    from .similarity import similarity_index
+    base = db.query(Generation.id).filter(Generation.do_cache.is_(False))
+    if len(similarity_index) >= base.with_entities(func.count(Generation.id)).scalar():
+        return 0
+    with _sync_lock:
+        indexed = set(similarity_index.ids().tolist())
+        query = db.query(Generation.id, Generation.persona_id, Generation.redes_sociais, Generation.objetivo, Generation.tema)
+        query = query.filter(Generation.do_cache.is_(False)).order_by(Generation.id).yield_per(batch_size)
+        total = 0
+        batch = []
+        for row in query:
+            if row.id in indexed:
+                continue
+            batch.append(tuple(row))
+            if len(batch) >= batch_size:
+                total += similarity_index.add_many(batch)
+                batch = []
+        total += similarity_index.add_many(batch)
+        return total
+
+
+def find_similar_generation(db: Session, session_id: str, persona: dict, objetivo: str, tema: str,
+                            redes_sociais: list[str], threshold: float | None = None) -> SimilarGeneration | None:
+    """Procura uma geração anterior parecida (mesma persona e redes sociais) antes de chamar o Gemini."""
+    from .similarity import SIMILARITY_ENABLED, SIMILARITY_THRESHOLD, similarity_index
+    if not SIMILARITY_ENABLED or not persona.get("id"):
+        return None
+    sync_similarity_index(db)
+    matches = similarity_index.search(persona["id"], redes_sociais, objetivo, tema,
+                                      threshold=SIMILARITY_THRESHOLD if threshold is None else threshold)
+    if not matches:
+        return None
+    generation_id, similaridade = matches[0]
+    generation = db.query(Generation).filter(Generation.id == generation_id, Generation.session_id == session_id).first()
+    if generation is None:
+        return None
+    return SimilarGeneration(_to_item(generation), generation.resposta, similaridade)
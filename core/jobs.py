@@ -0,0 +1,367 @@
+# core/jobs.py
+
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from .database import session_scope
+from .generation import stream_posts
+from .history import save_generation
+from .metrics import metrics
+from .models import Generation, GenerationJob
+from .response_parser import OpcaoPost
+
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+# Intervalo de renovação do prazo enquanto o job roda (um terço do prazo, por padrão).
+JOB_LEASE_RENEW_SECONDS = float(os.getenv("JOB_LEASE_RENEW_SECONDS", JOB_LEASE_SECONDS / 3))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1.0))
+# Workers rodando dentro do processo do app; use 0 quando houver um worker.py separado.
+JOB_EMBEDDED_WORKERS = int(os.getenv("JOB_EMBEDDED_WORKERS", 2))
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+FALHOU = "falhou"
+ATIVOS = (PENDENTE, EXECUTANDO)
+
+
+class LeaseLostError(RuntimeError):
+    """O job deixou de pertencer a este worker (prazo vencido e reservado por outro, ou finalizado)."""
+
+
+@dataclass(slots=True)
+class JobRequest:
+    id: int
+    session_id: str
+    persona: dict
+    objetivo: str
+    tema: str
+    redes_sociais: list[str]
+    refresh: bool
+    tentativas: int
+    worker: str | None = None
+
+    @property
+    def request_data(self) -> dict:
+        return {"persona": self.persona, "objetivo": self.objetivo, "tema": self.tema, "redes_sociais": self.redes_sociais}
+
+
+@dataclass(slots=True)
+class JobStatus:
+    id: int
+    status: str
+    tema: str
+    erro: str | None
+    generation_id: int | None
+    parcial: dict[str, list[OpcaoPost]]
+    request: JobRequest
+
+
+def _request(job: GenerationJob) -> JobRequest:
+    return JobRequest(job.id, job.session_id, job.persona, job.objetivo, job.tema, job.redes_sociais, job.refresh,
+                      job.tentativas, job.worker)
+
+
+def submit_job(db: Session, session_id: str, persona: dict, objetivo: str, tema: str, redes_sociais: list[str],
+               refresh: bool = False) -> int:
+    """Enfileira uma geração e retorna o id do job. A persona é gravada como foi enviada."""
+    job = GenerationJob(
+        session_id=session_id,
+        status=PENDENTE,
+        persona=dict(persona),
+        objetivo=objetivo,
+        tema=tema,
+        redes_sociais=list(redes_sociais),
+        refresh=refresh,
+        tentativas=0,
+        criado_em=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    metrics.inc("jobs_total", event="submitted")
+    return job.id
+
+
+def get_job(db: Session, session_id: str, job_id: int) -> JobStatus | None:
+    job = db.query(GenerationJob).filter(GenerationJob.id == job_id, GenerationJob.session_id == session_id).first()
+    if job is None:
+        return None
+    parcial = {plataforma: [OpcaoPost(**o) for o in opcoes] for plataforma, opcoes in (job.parcial or {}).items()}
+    return JobStatus(job.id, job.status, job.tema, job.erro, job.generation_id, parcial, _request(job))
+
+
+def list_active_jobs(db: Session, session_id: str) -> list[int]:
+    """Ids dos jobs ainda em andamento da sessão (para retomar o acompanhamento após recarregar a página)."""
+    rows = (
+        db.query(GenerationJob.id)
+        .filter(GenerationJob.session_id == session_id, GenerationJob.status.in_(ATIVOS))
+        .order_by(GenerationJob.id)
+        .all()
+    )
+    return [row.id for row in rows]
+
+
+def _claimable(now: datetime):
+    # Jobs pendentes, ou em execução cujo worker parou de renovar o prazo (caiu ou foi reiniciado).
+    return or_(
+        GenerationJob.status == PENDENTE,
+        and_(GenerationJob.status == EXECUTANDO, GenerationJob.lease_expira_em < now,
+             GenerationJob.tentativas < JOB_MAX_ATTEMPTS),
+    )
+
+
+def claim_job(db: Session, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> JobRequest | None:
+    """Reserva o job mais antigo disponível para este worker.
+
+    No PostgreSQL usa SELECT ... FOR UPDATE SKIP LOCKED, de modo que workers
+    concorrentes nunca esperam uns pelos outros. Nos demais bancos (SQLite) a
+    reserva é um UPDATE condicional: só um worker consegue mudar o status.
+    """
+    now = datetime.utcnow()
+    claimed = {
+        GenerationJob.status: EXECUTANDO,
+        GenerationJob.worker: worker_id,
+        GenerationJob.tentativas: GenerationJob.tentativas + 1,
+        GenerationJob.iniciado_em: now,
+        GenerationJob.lease_expira_em: now + timedelta(seconds=lease_seconds),
+    }
+    order = (GenerationJob.criado_em, GenerationJob.id)
+
+    if db.get_bind().dialect.name == "postgresql":
+        job = db.query(GenerationJob).filter(_claimable(now)).order_by(*order).with_for_update(skip_locked=True).first()
+        if job is None:
+            db.rollback()
+            return None
+        for column, value in claimed.items():
+            setattr(job, column.key, value)
+        db.commit()
+        return _request(job)
+
+    for _ in range(5):
+        candidate = db.query(GenerationJob.id).filter(_claimable(now)).order_by(*order).first()
+        if candidate is None:
+            return None
+        updated = (
+            db.query(GenerationJob)
+            .filter(GenerationJob.id == candidate.id, _claimable(now))
+            .update(claimed, synchronize_session=False)
+        )
+        db.commit()
+        if updated:
+            return _request(db.get(GenerationJob, candidate.id))
+        # Outro worker levou este job; tenta o próximo.
+    return None
+
+
+def _owned(job_id: int, worker_id: str):
+    # Só o worker que detém a reserva pode mexer no job; os demais recebem rowcount 0.
+    return and_(GenerationJob.id == job_id, GenerationJob.worker == worker_id, GenerationJob.status == EXECUTANDO)
+
+
+def update_progress(db: Session, job_id: int, worker_id: str, parcial: dict):
+    """Publica as opções já prontas e renova o prazo de reserva do job.
+
+    Levanta LeaseLostError se o job já não pertence a este worker.
+    """
+    updated = db.query(GenerationJob).filter(_owned(job_id, worker_id)).update(
+        {
+            GenerationJob.parcial: parcial,
+            GenerationJob.lease_expira_em: datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    if not updated:
+        raise LeaseLostError(f"O job {job_id} não pertence mais a {worker_id}.")
+
+
+def renew_lease(db: Session, job_id: int, worker_id: str, lease_seconds: float = JOB_LEASE_SECONDS) -> bool:
+    """Estende o prazo de reserva de um job em execução. Retorna False se ele já não pertence a este worker."""
+    updated = (
+        db.query(GenerationJob)
+        .filter(_owned(job_id, worker_id))
+        .update({GenerationJob.lease_expira_em: datetime.utcnow() + timedelta(seconds=lease_seconds)},
+                synchronize_session=False)
+    )
+    db.commit()
+    return bool(updated)
+
+
+@contextmanager
+def keep_lease(job_id: int, worker_id: str, interval: float = JOB_LEASE_RENEW_SECONDS,
+               lease_seconds: float = JOB_LEASE_SECONDS):
+    """Renova o prazo do job em uma thread enquanto o bloco roda.
+
+    O progresso só é publicado quando uma opção termina; sem a renovação
+    periódica, um primeiro trecho demorado deixaria o prazo vencer e outro
+    worker assumiria o mesmo job.
+    """
+    stop = threading.Event()
+
+    def renew():
+        while not stop.wait(interval):
+            try:
+                with session_scope() as db:
+                    if not renew_lease(db, job_id, worker_id, lease_seconds):
+                        return
+            except Exception as e:
+                print(f"Não foi possível renovar o prazo do job {job_id}: {e}")
+
+    thread = threading.Thread(target=renew, name=f"job-lease-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def complete_job(db: Session, job_id: int, worker_id: str, generation_id: int) -> bool:
+    """Marca o job como concluído. Retorna False (sem alterar nada) se ele já não pertence a este worker."""
+    updated = db.query(GenerationJob).filter(_owned(job_id, worker_id)).update(
+        {
+            GenerationJob.status: CONCLUIDO,
+            GenerationJob.generation_id: generation_id,
+            GenerationJob.parcial: None,
+            GenerationJob.concluido_em: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    if updated:
+        metrics.inc("jobs_total", event="completed")
+    return bool(updated)
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, erro: str) -> bool:
+    """Devolve o job à fila ou, esgotadas as tentativas, marca-o como falho.
+
+    Retorna False se o job já não pertence a este worker (outro o assumiu).
+    """
+    job = db.query(GenerationJob).filter(_owned(job_id, worker_id)).with_for_update().first()
+    if job is None:
+        db.rollback()
+        return False
+    job.erro = erro
+    job.parcial = None
+    job.lease_expira_em = None
+    if job.tentativas >= JOB_MAX_ATTEMPTS:
+        job.status = FALHOU
+        job.concluido_em = datetime.utcnow()
+        metrics.inc("jobs_total", event="failed")
+    else:
+        job.status = PENDENTE
+        metrics.inc("jobs_total", event="retried")
+    db.commit()
+    return True
+
+
+def expire_stale_jobs(db: Session) -> int:
+    """Marca como falhos os jobs cujo worker caiu depois da última tentativa permitida."""
+    now = datetime.utcnow()
+    updated = (
+        db.query(GenerationJob)
+        .filter(GenerationJob.status == EXECUTANDO, GenerationJob.lease_expira_em < now,
+                GenerationJob.tentativas >= JOB_MAX_ATTEMPTS)
+        .update({GenerationJob.status: FALHOU, GenerationJob.erro: "Tempo esgotado.", GenerationJob.concluido_em: now},
+                synchronize_session=False)
+    )
+    db.commit()
+    return updated
+
+
+def run_job(job: JobRequest):
+    """Executa a geração de um job, publicando o progresso, e grava o resultado no histórico.
+
+    Levanta LeaseLostError se outro worker assumir o job no meio do caminho;
+    nesse caso o resultado deste worker é descartado.
+    """
+    parcial = {}
+
+    def on_option(plataforma, indice, opcao):
+        parcial.setdefault(plataforma, []).append(asdict(opcao))
+        with session_scope() as db:
+            update_progress(db, job.id, job.worker, parcial)
+
+    with metrics.span("job"), keep_lease(job.id, job.worker):
+        inicio = time.perf_counter()
+        raw_response, from_cache = stream_posts(job.persona, job.objetivo, job.tema, job.redes_sociais, on_option,
+                                                refresh=job.refresh)
+        if not raw_response:
+            raise RuntimeError("A IA não retornou conteúdo.")
+        duracao_ms = int((time.perf_counter() - inicio) * 1000)
+        with session_scope() as db:
+            # Confere a reserva (e a estende) antes de gravar, para não criar uma geração órfã.
+            if not renew_lease(db, job.id, job.worker):
+                raise LeaseLostError(f"O job {job.id} não pertence mais a {job.worker}.")
+            item = save_generation(db, job.session_id, job.persona, job.objetivo, job.tema, job.redes_sociais,
+                                   raw_response, from_cache, duracao_ms)
+            if not complete_job(db, job.id, job.worker, item.id):
+                db.query(Generation).filter(Generation.id == item.id).delete(synchronize_session=False)
+                db.commit()
+                raise LeaseLostError(f"O job {job.id} não pertence mais a {job.worker}.")
+
+
+class JobWorkerPool:
+    """Threads que consomem a fila de jobs. Usado pelo worker.py e, opcionalmente, dentro do próprio app."""
+
+    def __init__(self, workers: int, poll_seconds: float = JOB_POLL_SECONDS, name: str | None = None):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, args=(f"{self.name}:{i}",), name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def request_stop(self):
+        self._stop.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Aguarda até `timeout` segundos; retorna True se a parada foi pedida."""
+        return self._stop.wait(timeout)
+
+    def stop(self, timeout: float | None = None):
+        """Pede a parada; cada thread termina o job em andamento antes de sair."""
+        self.request_stop()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                with session_scope() as db:
+                    job = claim_job(db, worker_id)
+                    if job is None:
+                        expire_stale_jobs(db)
+            except Exception as e:
+                print(f"[{worker_id}] Erro ao buscar jobs: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_seconds)
+                continue
+            try:
+                run_job(job)
+            except LeaseLostError as e:
+                metrics.inc("jobs_total", event="lease_lost")
+                print(f"[{worker_id}] Resultado descartado: {e}")
+            except Exception as e:
+                print(f"[{worker_id}] Job {job.id} falhou: {e}")
+                try:
+                    with session_scope() as db:
+                        fail_job(db, job.id, worker_id, str(e))
+                except Exception as db_error:
+                    print(f"[{worker_id}] Não foi possível registrar a falha do job {job.id}: {db_error}")
@@ -1,26 +1,405 @@
 # core/llm_client.py
 
+import hashlib
 import os
-import google.generativeai as genai
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
+from .metrics import TOKEN_BUCKETS, metrics
+from .rate_limiter import TokenBucketLimiter
+from .singleflight import SingleFlight
+
+MODEL_NAME = 'gemini-pro-latest'
+FAST_MODEL_NAME = os.getenv("GEMINI_FAST_MODEL", "gemini-flash-latest")
+
+REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_RPM", 60))
+TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TPM", 1_000_000))
+OUTPUT_TOKENS_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKENS_ESTIMATE", 1024))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 4))
+BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", 1.0))
+BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", 30.0))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Hedge: se a chamada passar do p95 observado do modelo, um segundo pedido vai ao modelo reserva.
+HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", 95))
+LATENCY_WINDOW = int(os.getenv("GEMINI_LATENCY_WINDOW", 200))
+# Sem amostras suficientes o percentil não é confiável e o hedge não é enviado.
+LATENCY_MIN_SAMPLES = int(os.getenv("GEMINI_LATENCY_MIN_SAMPLES", 20))
+MAX_CONCURRENT_CALLS = int(os.getenv("GEMINI_MAX_CONCURRENT_CALLS", 32))
+
+# "gemini" (padrão) ou "fake", o LLM local de core/fake_llm.py, que não precisa de chave nem de rede.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+# Cache do prefixo estável dos prompts no provedor: "gemini", "memory" (substituto local) ou "off".
+CONTEXT_CACHE_BACKEND = os.getenv("CONTEXT_CACHE_BACKEND", "memory" if LLM_BACKEND == "fake" else "gemini")
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    model: str
+    hedge_model: str | None
+    deadline_seconds: float
+
+
+def _route(task: str, model: str, hedge_model: str, deadline_seconds: float) -> Route:
+    """Rota de um tipo de tarefa, ajustável por GEMINI_MODEL_<TAREFA>, GEMINI_HEDGE_MODEL_<TAREFA> e GEMINI_DEADLINE_SECONDS_<TAREFA>."""
+    sufixo = task.upper()
+    model = os.getenv(f"GEMINI_MODEL_{sufixo}", model)
+    hedge_model = os.getenv(f"GEMINI_HEDGE_MODEL_{sufixo}", hedge_model) or None
+    return Route(model, hedge_model if hedge_model != model else None,
+                 float(os.getenv(f"GEMINI_DEADLINE_SECONDS_{sufixo}", deadline_seconds)))
+
+
+# Modelo de cada tipo de tarefa: um modelo rápido para a lista curta de temas e o mais forte para os posts.
+ROUTES = {
+    "posts": _route("posts", MODEL_NAME, FAST_MODEL_NAME, 90),
+    "repair": _route("repair", MODEL_NAME, FAST_MODEL_NAME, 60),
+    "topics": _route("topics", FAST_MODEL_NAME, MODEL_NAME, 20),
+}
+
+
+def model_for(task: str) -> str:
+    """Modelo principal usado para o tipo de tarefa (também compõe as chaves de cache)."""
+    return ROUTES[task].model
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    pass
+
+
+class LatencyTracker:
+    """Janela móvel das latências de cada modelo, usada para decidir quando enviar o hedge."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = LATENCY_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(model_name)
+            if samples is None:
+                samples = self._samples[model_name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def _percentile(self, samples: list[float], p: float) -> float | None:
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+    def percentile(self, model_name: str, p: float) -> float | None:
+        """Percentil `p` das latências recentes do modelo, ou None se ainda há poucas amostras."""
+        with self._lock:
+            samples = sorted(self._samples.get(model_name, ()))
+        return self._percentile(samples, p)
+
+    def stats(self) -> dict:
+        with self._lock:
+            copies = {model: sorted(samples) for model, samples in self._samples.items()}
+        return {
+            model: {"p50": self._percentile(samples, 50), "p95": self._percentile(samples, 95), "samples": len(samples)}
+            for model, samples in copies.items()
+        }
+
+
+# Limitador compartilhado por todas as sessões e threads do processo.
+rate_limiter = TokenBucketLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+# Pedidos idênticos simultâneos (mesmo modelo e prompt) compartilham uma única chamada.
+inflight = SingleFlight()
+latency_tracker = LatencyTracker()
+# Threads das chamadas síncronas ao SDK; permitem aplicar o prazo e disparar o hedge em paralelo.
+_call_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS, thread_name_prefix="llm")
+# Contadores alterados por várias threads ao mesmo tempo, sempre sob `_stats_lock`.
+_stats = {"retries": 0, "hedges": 0, "hedge_wins": 0}
+_stats_lock = threading.Lock()
+
+_models = {}
+_models_lock = threading.Lock()
+_api_key = None
+_genai = None
+_context_cache = None
+
 def configure_llm(api_key=None):
-    """Configura a chave de API para o cliente Gemini."""
+    """Configura a chave de API para o cliente Gemini.
+
+    O SDK só é importado e configurado na primeira chamada ao modelo.
+    """
+    global _api_key, _genai
     if api_key is None:
         load_dotenv()
         api_key = os.getenv("GEMINI_API_KEY")
 
     if not api_key:
+        if LLM_BACKEND == "fake":
+            return
         raise ValueError("Chave de API do Gemini não encontrada.")
-    
-    genai.configure(api_key=api_key)
 
-def generate_content(full_prompt: str) -> str:
-    """Chama a API do Gemini para gerar conteúdo."""
-    model = genai.GenerativeModel('gemini-pro-latest') 
+    with _models_lock:
+        _api_key = api_key
+        if _genai is not None:
+            _genai.configure(api_key=api_key)
+
+def set_backend(backend):
+    """Substitui o SDK do Gemini por um objeto com a mesma interface (ex.: `fake_llm.FakeGenAI`)."""
+    global _genai
+    with _models_lock:
+        _genai = backend
+        _models.clear()
+
+def get_genai():
+    """Importa e configura o SDK do Gemini no primeiro uso."""
+    global _genai
+    if _genai is None and LLM_BACKEND == "fake":
+        from .fake_llm import FakeGenAI
+        with _models_lock:
+            if _genai is None:
+                _genai = FakeGenAI()
+    if _genai is None:
+        if _api_key is None:
+            configure_llm()
+        with _models_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=_api_key)
+                _genai = genai
+    return _genai
+
+def set_context_cache(cache):
+    """Substitui o cache de contexto (ex.: `context_cache.InMemoryContextCache()`); None desliga."""
+    global _context_cache
+    with _models_lock:
+        _context_cache = cache
+
+def get_context_cache():
+    """Cria o cache de contexto configurado em CONTEXT_CACHE_BACKEND no primeiro uso."""
+    global _context_cache
+    if _context_cache is None and CONTEXT_CACHE_BACKEND != "off":
+        from .context_cache import GeminiContextCache, InMemoryContextCache
+        with _models_lock:
+            if _context_cache is None:
+                _context_cache = InMemoryContextCache() if CONTEXT_CACHE_BACKEND == "memory" else GeminiContextCache(get_genai)
+    return _context_cache
+
+def _resolve_model(model_name: str, full_prompt: str):
+    """Retorna (modelo, conteúdo); com o prefixo em cache no provedor, só o restante do prompt é enviado."""
+    model = get_model(model_name)
+    cache = get_context_cache()
+    if cache is None:
+        return model, full_prompt
+    return cache.resolve(model_name, full_prompt, model)
+
+def get_model(model_name: str = MODEL_NAME):
+    """Retorna o objeto de modelo do Gemini, criado uma única vez por nome."""
+    model = _models.get(model_name)
+    if model is None:
+        genai = get_genai()
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                _models[model_name] = model
+    return model
+
+def request_key(model_name: str, prompt: str) -> str:
+    """Identifica um pedido pelo modelo e pelo hash do prompt."""
+    return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (cerca de 4 caracteres por token)."""
+    return len(text) // 4 + 1
+
+def _is_retryable(error: Exception) -> bool:
+    """Erros de cota (429) e falhas do servidor (5xx) merecem nova tentativa."""
+    code = getattr(error, "code", None)
+    if callable(code):
+        code = code()
+    return isinstance(code, int) and code in RETRYABLE_STATUS
+
+def _backoff(attempt: int) -> float:
+    """Backoff exponencial com jitter completo."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+def _count(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+def _request_options(timeout: float | None) -> dict:
+    """Opções do SDK: o tempo restante do prazo vira o timeout da própria requisição."""
+    return {} if timeout is None else {"timeout": timeout}
+
+def _call_with_retry(call, full_prompt: str, background: bool = False, deadline: float | None = None):
+    """Executa a chamada respeitando o limitador global e repetindo erros transitórios.
+
+    `call` recebe o tempo restante até `deadline` (time.monotonic), ou None sem
+    prazo; a espera no limitador e as novas tentativas também param no prazo.
+    Retorna (resposta, estimativa de tokens, time.perf_counter() do envio que
+    deu certo), para que a latência medida seja só a do SDK.
+    """
+    estimate = estimate_tokens(full_prompt) + OUTPUT_TOKENS_ESTIMATE
+    for attempt in range(MAX_RETRIES + 1):
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            waited = rate_limiter.acquire(estimate, background=background, timeout=remaining)
+        except TimeoutError:
+            raise LLMDeadlineExceeded("O prazo da chamada terminou aguardando o limitador.")
+        metrics.observe("rate_limiter_wait_seconds", waited, priority="background" if background else "interactive")
+        timeout = None if deadline is None else deadline - time.monotonic()
+        if timeout is not None and timeout <= 0:
+            raise LLMDeadlineExceeded("O prazo da chamada terminou antes do envio.")
+        sent_at = time.perf_counter()
+        try:
+            return call(timeout), estimate, sent_at
+        except Exception as e:
+            delay = _backoff(attempt)
+            sem_tempo = deadline is not None and time.monotonic() + delay >= deadline
+            if attempt == MAX_RETRIES or not _is_retryable(e) or sem_tempo:
+                metrics.inc("llm_errors_total", retryable=_is_retryable(e))
+                raise
+            _count("retries")
+            metrics.inc("llm_retries_total")
+            print(f"Erro transitório da API ({e}). Nova tentativa em {delay:.1f}s...")
+            time.sleep(delay)
+
+def _settle_tokens(response, estimate: int, model_name: str = MODEL_NAME):
+    """Ajusta o saldo do limitador com o consumo real informado pela API e registra os tokens usados."""
+    usage = getattr(response, "usage_metadata", None)
+    total = getattr(usage, "total_token_count", None)
+    if total:
+        rate_limiter.adjust(total - estimate)
+    for kind, attr in (("prompt", "prompt_token_count"), ("response", "candidates_token_count"), ("cached", "cached_content_token_count")):
+        count = getattr(usage, attr, None)
+        if count:
+            metrics.inc("llm_tokens_total", count, model=model_name, kind=kind)
+            metrics.observe("llm_call_tokens", count, buckets=TOKEN_BUCKETS, model=model_name, kind=kind)
+
+def _generate_text(full_prompt: str, model_name: str, background: bool, deadline: float | None = None) -> str:
+    model, contents = _resolve_model(model_name, full_prompt)
+    with metrics.span("llm_call", model=model_name):
+        response, estimate, sent_at = _call_with_retry(
+            lambda timeout: model.generate_content(contents, request_options=_request_options(timeout)),
+            full_prompt, background, deadline,
+        )
+        text = response.text
+    # Só a chamada que deu certo: a espera no limitador e o backoff não entram no p95 do hedge.
+    latency_tracker.record(model_name, time.perf_counter() - sent_at)
+    _settle_tokens(response, estimate, model_name)
+    return text
+
+def _routed_call(full_prompt: str, route: Route, task: str, background: bool) -> str:
+    """Executa a chamada dentro do prazo da rota, enviando o hedge se ela passar do p95 do modelo.
+
+    Vale a primeira resposta bem-sucedida. As chamadas que ainda esperam na
+    fila do pool são canceladas ao fim (com resposta ou prazo esgotado), para
+    não gastarem cota de quem já desistiu; as que já estão no SDK terminam no
+    máximo no prazo, que é repassado como timeout da requisição.
+    """
+    deadline = time.monotonic() + route.deadline_seconds
+    primary = _call_executor.submit(_generate_text, full_prompt, route.model, background, deadline)
+    models = {primary: route.model}
+
+    # Chamadas de segundo plano não têm usuário esperando: não vale pagar por um hedge.
+    hedge_after = None
+    if HEDGE_ENABLED and route.hedge_model and not background:
+        hedge_after = latency_tracker.percentile(route.model, HEDGE_PERCENTILE)
+    if hedge_after is not None:
+        done, _ = wait([primary], timeout=min(hedge_after, route.deadline_seconds))
+        if not done and time.monotonic() < deadline:
+            _count("hedges")
+            metrics.inc("llm_hedges_total", task=task, model=route.hedge_model)
+            models[_call_executor.submit(_generate_text, full_prompt, route.hedge_model, background, deadline)] = route.hedge_model
+
+    pending = set(models)
+    error = None
     try:
-        response = model.generate_content(full_prompt)
-        return response.text
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if models[future] != route.model:
+                    _count("hedge_wins")
+                    metrics.inc("llm_hedge_wins_total", task=task, model=models[future])
+                return future.result()
+        if error is not None and not pending:
+            raise error
+        metrics.inc("llm_deadline_exceeded_total", task=task)
+        raise LLMDeadlineExceeded(f"A chamada ({task}) excedeu o prazo de {route.deadline_seconds:.0f}s.")
+    finally:
+        for future in pending:
+            future.cancel()
+
+def generate_content(full_prompt: str, model_name: str | None = None, background: bool = False, task: str = "posts") -> str:
+    """Chama a API do Gemini para gerar conteúdo.
+
+    Sem `model_name`, o modelo, o modelo de hedge e o prazo vêm da rota da
+    tarefa (`ROUTES`). Com background=True a chamada usa a prioridade mínima do
+    limitador global.
+    """
+    route = ROUTES[task]
+    if model_name is not None and model_name != route.model:
+        route = Route(model_name, None, route.deadline_seconds)
+    # A prioridade faz parte da chave: uma chamada interativa nunca espera por uma de segundo plano.
+    key = (request_key(route.model, full_prompt), background)
+    try:
+        return inflight.do(key, _routed_call, full_prompt, route, task, background)
     except Exception as e:
         print(f"Ocorreu um erro ao chamar a API: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def generate_content_stream(full_prompt: str, model_name: str | None = None, task: str = "posts"):
+    """Chama a API do Gemini em modo streaming, produzindo os trechos de texto conforme chegam.
+
+    Diferente de `generate_content`, os erros são propagados para quem consome o
+    stream. O prazo da rota vai como timeout da requisição ao SDK (um stream
+    parado não segura o worker para sempre) e também é verificado a cada trecho
+    recebido; não há hedge.
+    """
+    model_name = model_name or model_for(task)
+    model, contents = _resolve_model(model_name, full_prompt)
+    start = time.perf_counter()
+    deadline = ROUTES[task].deadline_seconds
+    response, estimate, sent_at = _call_with_retry(
+        lambda timeout: model.generate_content(contents, stream=True, request_options=_request_options(timeout)),
+        full_prompt, deadline=time.monotonic() + deadline,
+    )
+    first_chunk = True
+    for chunk in response:
+        if first_chunk:
+            metrics.observe("llm_first_chunk_seconds", time.perf_counter() - start, model=model_name)
+            first_chunk = False
+        if time.perf_counter() - start > deadline:
+            metrics.inc("llm_deadline_exceeded_total", task=task)
+            raise LLMDeadlineExceeded(f"O stream ({task}) excedeu o prazo de {deadline:.0f}s.")
+        if chunk.text:
+            yield chunk.text
+    metrics.observe("stage_seconds", time.perf_counter() - start, stage="llm_stream", model=model_name, status="ok")
+    latency_tracker.record(model_name, time.perf_counter() - sent_at)
+    _settle_tokens(response, estimate, model_name)
+
+
+def get_client_stats() -> dict:
+    """Retorna estatísticas do limitador global e do pool de modelos."""
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        **rate_limiter.stats(),
+        "retries": stats["retries"],
+        "coalesced": inflight.stats()["coalesced"],
+        "hedges": stats["hedges"],
+        "hedge_wins": stats["hedge_wins"],
+        "context_cache": _context_cache.stats() if _context_cache is not None else None,
+        "latency": latency_tracker.stats(),
+        "models": sorted(_models),
+    }
@@ -0,0 +1,242 @@
+# core/metrics.py
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "sim", "on")
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", 1024))
+METRICS_SNAPSHOT_PATH = os.getenv("METRICS_SNAPSHOT_PATH")
+METRICS_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS", 60))
+
+PREFIX = "personapost_"
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+class _Histogram:
+    """Histograma cumulativo (formato Prometheus) mais uma janela recente para percentis."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "window")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.window = deque(maxlen=METRICS_WINDOW)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.window.append(value)
+
+    def percentile(self, q: float) -> float | None:
+        if not self.window:
+            return None
+        ordered = sorted(self.window)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Noop:
+    """Span vazio usado quando as métricas estão desligadas."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Span:
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = dict(self.labels, stage=self.name, status="error" if exc_type else "ok")
+        self.registry.observe("stage_seconds", time.perf_counter() - self.start, **labels)
+        return False
+
+
+class MetricsRegistry:
+    """Contadores e histogramas em memória, exportados em texto Prometheus ou JSON.
+
+    Com `enabled=False` cada chamada retorna logo na primeira linha, sem
+    alocar nada, de modo que a instrumentação pode ficar no caminho crítico.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = DURATION_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def span(self, name: str, **labels):
+        """Mede a duração de um trecho: `with metrics.span("parse"): ...`."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def export_prometheus(self) -> str:
+        """Exporta todas as métricas no formato de texto do Prometheus."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            histograms = [(key, h.buckets, list(h.counts), h.sum, h.count) for key, h in histograms]
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+        for (name, labels), buckets, counts, total, count in histograms:
+            metric = f"{PREFIX}{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{metric}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Retorna as métricas como dicionário, com p50/p95/p99 da janela recente de cada histograma."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "p50": h.percentile(0.50),
+                    "p95": h.percentile(0.95),
+                    "p99": h.percentile(0.99),
+                }
+                for (name, labels), h in sorted(self._histograms.items(), key=lambda item: item[0])
+            ]
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def write_snapshot(self, path: str):
+        """Grava o snapshot em JSON de forma atômica (arquivo temporário + rename)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def start_snapshots(self, path: str | None = METRICS_SNAPSHOT_PATH,
+                        interval_seconds: float = METRICS_SNAPSHOT_INTERVAL_SECONDS) -> bool:
+        """Inicia (uma única vez) a thread que grava snapshots periódicos. Sem caminho configurado, não faz nada."""
+        if not self.enabled or not path:
+            return False
+        with self._lock:
+            if self._snapshot_thread is not None:
+                return False
+            self._snapshot_thread = threading.Thread(
+                target=self._snapshot_loop, args=(path, interval_seconds), name="metrics-snapshot", daemon=True
+            )
+        self._snapshot_thread.start()
+        return True
+
+    def _snapshot_loop(self, path: str, interval_seconds: float):
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                self.write_snapshot(path)
+            except Exception as e:
+                print(f"Erro ao gravar snapshot de métricas: {e}")
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def instrument_engine(engine):
+    """Registra a duração de cada consulta SQL (por operação) usando os eventos do SQLAlchemy."""
+    from sqlalchemy import event
+
+    if not metrics.enabled:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            metrics.observe("db_query_seconds", time.perf_counter() - starts.pop(), operation=operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        metrics.inc("db_errors_total")
+
+
+# Registro compartilhado por todo o processo.
+metrics = MetricsRegistry()
@@ -1,14 +1,84 @@
 # core/models.py
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Column, DateTime, Index, Integer, String, Text
 from sqlalchemy.orm import declarative_base 
 
 Base = declarative_base()
 
 class Persona(Base):
     __tablename__ = "personas"
+    __table_args__ = (
+        Index("uq_personas_session_nome", "session_id", "nome", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, index=True) 
     descricao = Column(Text)
     tom_de_voz = Column(Text)
     session_id = Column(String, index=True, nullable=False)
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    chave = Column(String(64), primary_key=True)
+    modelo = Column(String, nullable=False)
+    resposta = Column(Text, nullable=False)
+    criado_em = Column(DateTime, nullable=False, index=True)
+    acessado_em = Column(DateTime, nullable=False, index=True)
+
+class Generation(Base):
+    __tablename__ = "generations"
+    __table_args__ = (
+        # Índice da paginação por cursor do histórico: (session_id, criado_em, id).
+        Index("ix_generations_session_criado", "session_id", "criado_em", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False)
+    persona_id = Column(Integer, index=True)
+    prompt_hash = Column(String(64), index=True, nullable=False)
+    modelo = Column(String, nullable=False)
+    objetivo = Column(Text)
+    tema = Column(Text)
+    redes_sociais = Column(JSON, nullable=False)
+    resposta = Column(Text, nullable=False)
+    resultado = Column(JSON, nullable=False)
+    do_cache = Column(Boolean, nullable=False, default=False)
+    duracao_ms = Column(Integer)
+    criado_em = Column(DateTime, nullable=False)
+
+class TopicSuggestion(Base):
+    __tablename__ = "topic_suggestions"
+    __table_args__ = (
+        Index("uq_topic_suggestions_persona_versao", "persona_id", "versao", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    persona_id = Column(Integer, nullable=False)
+    versao = Column(String(16), nullable=False)
+    temas = Column(JSON, nullable=False)
+    criado_em = Column(DateTime, nullable=False)
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        # Índice usado pelos workers para encontrar o próximo job da fila.
+        Index("ix_generation_jobs_status_criado", "status", "criado_em", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(String, nullable=False, index=True)
+    status = Column(String(16), nullable=False)
+    persona = Column(JSON, nullable=False)
+    objetivo = Column(Text)
+    tema = Column(Text)
+    redes_sociais = Column(JSON, nullable=False)
+    refresh = Column(Boolean, nullable=False, default=False)
+    tentativas = Column(Integer, nullable=False, default=0)
+    worker = Column(String)
+    erro = Column(Text)
+    parcial = Column(JSON)
+    generation_id = Column(Integer)
+    criado_em = Column(DateTime, nullable=False)
+    iniciado_em = Column(DateTime)
+    lease_expira_em = Column(DateTime)
+    concluido_em = Column(DateTime)
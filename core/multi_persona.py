@@ -0,0 +1,126 @@
+# core/multi_persona.py
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+from .cache import generate_content_cached
+from .generation import submit_call
+from .llm_client import estimate_tokens
+from .metrics import metrics
+from .prompt_builder import build_multi_persona_prompt, build_prompt
+from .repair import find_gaps, repair_response
+from .response_parser import RespostaAnalisada, parse_response
+
+MULTI_PERSONA_OUTPUT_BUDGET = int(os.getenv("MULTI_PERSONA_OUTPUT_BUDGET", 6000))
+MULTI_PERSONA_MAX_BATCH = int(os.getenv("MULTI_PERSONA_MAX_BATCH", 10))
+MULTI_PERSONA_SECTION_TOKENS = int(os.getenv("MULTI_PERSONA_SECTION_TOKENS", 400))
+
+_SECAO = re.compile(r"\[INÍCIO PERSONA (\d+)\](.*?)\[FIM PERSONA \1\]", re.DOTALL)
+# Custo fixo de cada persona na resposta (delimitadores e marcadores).
+_TOKENS_DELIMITADOR = 20
+
+
+@dataclass(slots=True)
+class PersonaGeneration:
+    persona: dict
+    resposta: str | None
+    resultado: RespostaAnalisada | None
+    do_cache: bool
+    em_lote: bool
+
+
+class _SectionTokens:
+    """Média móvel dos tokens de resposta por rede social de cada persona, usada para dimensionar os lotes."""
+
+    def __init__(self, initial: float, alpha: float = 0.2):
+        self.value = float(initial)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+
+    def update(self, tokens: int, sections: int):
+        if sections <= 0:
+            return
+        with self._lock:
+            self.value += self.alpha * (tokens / sections - self.value)
+
+
+section_tokens = _SectionTokens(MULTI_PERSONA_SECTION_TOKENS)
+
+
+def plan_batches(personas: list[dict], redes_sociais: list[str], budget: int = MULTI_PERSONA_OUTPUT_BUDGET,
+                 max_batch: int = MULTI_PERSONA_MAX_BATCH) -> list[list[dict]]:
+    """Agrupa as personas em lotes cuja resposta estimada cabe no orçamento de tokens de saída."""
+    custo = section_tokens.value * len(redes_sociais) + _TOKENS_DELIMITADOR
+    por_lote = max(1, min(max_batch, int(budget // custo)))
+    return [personas[i:i + por_lote] for i in range(0, len(personas), por_lote)]
+
+
+def split_sections(text: str) -> dict[int, str]:
+    """Separa a resposta de um lote por persona: {número da persona: texto no formato de resposta única}."""
+    sections = {}
+    for m in _SECAO.finditer(text or ""):
+        sections.setdefault(int(m.group(1)), m.group(2).strip())
+    return sections
+
+
+def _single(persona: dict, objetivo: str, tema: str, redes_sociais: list[str], refresh: bool):
+    text, from_cache = generate_content_cached(build_prompt(persona, objetivo, tema, redes_sociais), refresh=refresh)
+    return repair_response(text, persona, objetivo, tema, redes_sociais, refresh), from_cache
+
+
+def _repair(section: str, from_cache: bool, persona: dict, objetivo: str, tema: str, redes_sociais: list[str], refresh: bool):
+    return repair_response(section, persona, objetivo, tema, redes_sociais, refresh), from_cache
+
+
+def generate_multi_persona(personas: list[dict], objetivo: str, tema: str, redes_sociais: list[str],
+                           refresh: bool = False) -> list[PersonaGeneration]:
+    """Gera o mesmo tema para várias personas com poucas chamadas. Retorna um resultado por persona, na ordem recebida.
+
+    As personas são agrupadas em lotes (um prompt por lote, em paralelo). As que
+    faltarem na resposta do lote recebem uma chamada individual; as que vierem
+    incompletas recebem apenas uma chamada de reparo com as partes ausentes.
+    """
+    with metrics.span("generate_multi_persona"):
+        batches = plan_batches(personas, redes_sociais)
+        futures = [
+            (batch, submit_call(generate_content_cached, build_multi_persona_prompt(batch, objetivo, tema, redes_sociais), refresh=refresh))
+            for batch in batches
+        ]
+
+        resultados = {}
+        incompletas = {}
+        posicao = 0
+        for batch, future in futures:
+            text, from_cache = future.result()
+            sections = split_sections(text)
+            if text and sections and not from_cache:
+                section_tokens.update(estimate_tokens(text), len(sections) * len(redes_sociais))
+            for numero, persona in enumerate(batch, start=1):
+                section = sections.get(numero)
+                if section:
+                    resultado = parse_response(section)
+                    if not find_gaps(resultado, redes_sociais):
+                        resultados[posicao] = PersonaGeneration(persona, section, resultado, from_cache, True)
+                    elif resultado.plataformas:
+                        incompletas[posicao] = (section, from_cache)
+                posicao += 1
+
+        faltando = [i for i in range(len(personas)) if i not in resultados and i not in incompletas]
+        metrics.inc("multi_persona_personas_total", len(resultados), via="batch")
+        metrics.inc("multi_persona_personas_total", len(incompletas), via="repair")
+        metrics.inc("multi_persona_personas_total", len(faltando), via="fallback")
+        individuais = {
+            i: submit_call(_single, personas[i], objetivo, tema, redes_sociais, refresh)
+            for i in faltando
+        }
+        individuais.update({
+            i: submit_call(_repair, section, from_cache, personas[i], objetivo, tema, redes_sociais, refresh)
+            for i, (section, from_cache) in incompletas.items()
+        })
+        for i, future in individuais.items():
+            text, from_cache = future.result()
+            resultados[i] = PersonaGeneration(personas[i], text, parse_response(text) if text else None, from_cache, i in incompletas)
+
+        return [resultados[i] for i in range(len(personas))]
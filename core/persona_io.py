@@ -0,0 +1,177 @@
+# core/persona_io.py
+
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+
+from .database import get_engine, session_scope
+from .metrics import metrics
+from .models import Persona
+from .persona_repository import persona_repository
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = ("id", "session_id", "nome", "descricao", "tom_de_voz")
+MAX_ERROS_REGISTRADOS = 100
+
+
+@dataclass(slots=True)
+class PersonaImportResult:
+    lidas: int = 0
+    gravadas: int = 0
+    invalidas: int = 0
+    lotes: int = 0
+    duracao_s: float = 0.0
+    erros: list = field(default_factory=list)
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.lidas / self.duracao_s if self.duracao_s else 0.0
+
+
+def read_persona_rows(path: str):
+    """Lê as linhas de um arquivo CSV ou JSONL uma a uma, sem carregar o arquivo inteiro.
+
+    No JSONL cada linha é entregue como texto; a decodificação fica em
+    `validate_persona_row`, para que uma linha inválida falhe sozinha.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield line
+        else:
+            yield from csv.DictReader(f)
+
+
+def validate_persona_row(row) -> dict:
+    """Normaliza uma linha de entrada (dicionário ou linha JSON).
+
+    Levanta ValueError se a linha não for um objeto JSON válido ou se algum
+    campo obrigatório estiver vazio.
+    """
+    if isinstance(row, str):
+        try:
+            row = json.loads(row)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+    if not isinstance(row, dict):
+        raise ValueError("a linha não é um objeto JSON")
+    persona = {}
+    for campo in ("nome", "descricao", "tom_de_voz"):
+        valor = row.get(campo)
+        valor = valor.strip() if isinstance(valor, str) else valor
+        if not valor:
+            raise ValueError(f"campo '{campo}' vazio")
+        if not isinstance(valor, str):
+            raise ValueError(f"campo '{campo}' deve ser texto")
+        persona[campo] = valor
+    return persona
+
+
+def _upsert_statement(dialect_name: str):
+    """INSERT ... ON CONFLICT (session_id, nome) DO UPDATE para os bancos que o suportam."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    stmt = insert(Persona)
+    return stmt.on_conflict_do_update(
+        index_elements=[Persona.session_id, Persona.nome],
+        set_={"descricao": stmt.excluded.descricao, "tom_de_voz": stmt.excluded.tom_de_voz},
+    )
+
+
+def _write_batch(db, stmt, session_id: str, batch: list[dict]):
+    if stmt is not None:
+        # Um único executemany por lote.
+        db.execute(stmt, [{"session_id": session_id, **persona} for persona in batch])
+        return
+    # Bancos sem ON CONFLICT: busca as existentes do lote em uma consulta e atualiza ou insere.
+    existentes = {
+        p.nome: p for p in db.query(Persona).filter(
+            Persona.session_id == session_id, Persona.nome.in_([persona["nome"] for persona in batch])
+        )
+    }
+    for persona in batch:
+        atual = existentes.get(persona["nome"])
+        if atual is None:
+            db.add(Persona(session_id=session_id, **persona))
+        else:
+            atual.descricao = persona["descricao"]
+            atual.tom_de_voz = persona["tom_de_voz"]
+
+
+def import_personas(session_id: str, rows, batch_size: int = IMPORT_BATCH_SIZE) -> PersonaImportResult:
+    """Importa personas em lotes, criando as novas e atualizando as que já existem na sessão (pelo nome).
+
+    `rows` pode ser qualquer iterável de dicionários ou linhas JSON (por exemplo, `read_persona_rows`).
+    Cada lote é gravado em uma transação própria; linhas inválidas são contadas e ignoradas.
+    """
+    if not session_id:
+        raise ValueError("session_id é obrigatório para importar personas.")
+    result = PersonaImportResult()
+    stmt = _upsert_statement(get_engine().dialect.name)
+    start = time.perf_counter()
+    # Chaveado pelo nome: repetições dentro do lote ficam com a última versão
+    # (o ON CONFLICT do PostgreSQL não aceita a mesma chave duas vezes no mesmo comando).
+    batch = {}
+
+    def flush():
+        if not batch:
+            return
+        with metrics.span("persona_import_batch"), session_scope() as db:
+            _write_batch(db, stmt, session_id, list(batch.values()))
+        result.gravadas += len(batch)
+        result.lotes += 1
+        batch.clear()
+
+    try:
+        for linha, row in enumerate(rows, start=1):
+            result.lidas += 1
+            try:
+                persona = validate_persona_row(row)
+            except ValueError as e:
+                result.invalidas += 1
+                if len(result.erros) < MAX_ERROS_REGISTRADOS:
+                    result.erros.append((linha, str(e)))
+                continue
+            batch.pop(persona["nome"], None)
+            batch[persona["nome"]] = persona
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        persona_repository.invalidate(session_id)
+        result.duracao_s = time.perf_counter() - start
+    return result
+
+
+def iter_personas(session_id: str | None = None, batch_size: int = IMPORT_BATCH_SIZE):
+    """Percorre as personas (de uma sessão ou de todas) lendo do BD em blocos com `yield_per`."""
+    with session_scope() as db:
+        query = db.query(Persona.id, Persona.session_id, Persona.nome, Persona.descricao, Persona.tom_de_voz)
+        if session_id:
+            query = query.filter(Persona.session_id == session_id)
+        for row in query.order_by(Persona.id).yield_per(batch_size):
+            yield dict(zip(EXPORT_FIELDS, row))
+
+
+def export_personas(path: str, session_id: str | None = None, batch_size: int = IMPORT_BATCH_SIZE) -> tuple[int, float]:
+    """Grava as personas em CSV ou JSONL (pela extensão) com memória constante. Retorna (linhas, segundos)."""
+    start = time.perf_counter()
+    total = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            for persona in iter_personas(session_id, batch_size):
+                f.write(json.dumps(persona, ensure_ascii=False) + "\n")
+                total += 1
+        else:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for persona in iter_personas(session_id, batch_size):
+                writer.writerow(persona)
+                total += 1
+    return total, time.perf_counter() - start
@@ -0,0 +1,118 @@
+# core/persona_repository.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.exc import IntegrityError
+
+from .database import session_scope
+from .metrics import metrics
+from .models import Persona
+
+PERSONA_CACHE_TTL_SECONDS = float(os.getenv("PERSONA_CACHE_TTL_SECONDS", 300))
+# Sessões mantidas no cache; as usadas há mais tempo são descartadas primeiro.
+PERSONA_CACHE_MAX_SESSIONS = int(os.getenv("PERSONA_CACHE_MAX_SESSIONS", 1024))
+
+
+class PersonaDuplicadaError(Exception):
+    """Já existe uma persona com o mesmo nome nesta sessão."""
+
+
+class PersonaRepository:
+    """Acesso às personas com cache de leitura por sessão.
+
+    O cache é invalidado a cada escrita feita por este processo; o TTL limita
+    por quanto tempo uma escrita feita por outro worker pode passar despercebida.
+    """
+
+    def __init__(self, ttl_seconds: float = PERSONA_CACHE_TTL_SECONDS, max_sessions: int = PERSONA_CACHE_MAX_SESSIONS):
+        self._ttl = ttl_seconds
+        self._max_sessions = max_sessions
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, session_id: str, personas: list[dict]):
+        with self._lock:
+            self._cache[session_id] = (time.monotonic() + self._ttl, personas)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self._max_sessions:
+                self._cache.popitem(last=False)
+
+    def list_for_session(self, session_id: str) -> list[dict]:
+        """Retorna as personas da sessão, consultando o BD apenas quando o cache expira."""
+        if not session_id:
+            return []
+        with self._lock:
+            cached = self._cache.get(session_id)
+            if cached is not None:
+                if cached[0] > time.monotonic():
+                    self._cache.move_to_end(session_id)
+                    return cached[1]
+                del self._cache[session_id]
+
+        with metrics.span("persona_query"), session_scope() as db:
+            rows = (
+                db.query(Persona.id, Persona.nome, Persona.descricao, Persona.tom_de_voz)
+                .filter(Persona.session_id == session_id)
+                .order_by(Persona.id)
+                .all()
+            )
+        personas = [{"id": r.id, "nome": r.nome, "descricao": r.descricao, "tom_de_voz": r.tom_de_voz} for r in rows]
+        self._remember(session_id, personas)
+        return personas
+
+    def get(self, session_id: str, persona_id: int) -> dict | None:
+        """Busca uma persona da sessão direto no BD, sem o cache.
+
+        Usado pela API, em que a persona pode ter sido criada por outra réplica.
+        """
+        with metrics.span("persona_query"), session_scope() as db:
+            row = (
+                db.query(Persona.id, Persona.nome, Persona.descricao, Persona.tom_de_voz)
+                .filter(Persona.id == persona_id, Persona.session_id == session_id)
+                .one_or_none()
+            )
+        if row is None:
+            return None
+        return {"id": row.id, "nome": row.nome, "descricao": row.descricao, "tom_de_voz": row.tom_de_voz}
+
+    def create(self, session_id: str, nome: str, descricao: str, tom_de_voz: str) -> dict:
+        """Cria a persona; nomes duplicados são barrados pelo índice único (session_id, nome)."""
+        try:
+            with session_scope() as db:
+                persona = Persona(nome=nome, descricao=descricao, tom_de_voz=tom_de_voz, session_id=session_id)
+                db.add(persona)
+                db.flush()
+                created = {"id": persona.id, "nome": nome, "descricao": descricao, "tom_de_voz": tom_de_voz}
+        except IntegrityError:
+            raise PersonaDuplicadaError(f"Uma persona com o nome '{nome}' já existe.")
+        self.invalidate(session_id)
+        return created
+
+    def update(self, session_id: str, persona_id: int, **campos) -> dict:
+        """Atualiza os campos informados (nome, descricao, tom_de_voz) de uma persona da sessão."""
+        try:
+            with session_scope() as db:
+                persona = db.query(Persona).filter(Persona.id == persona_id, Persona.session_id == session_id).one()
+                for campo in ("nome", "descricao", "tom_de_voz"):
+                    if campo in campos:
+                        setattr(persona, campo, campos[campo])
+                db.flush()
+                updated = {"id": persona.id, "nome": persona.nome, "descricao": persona.descricao, "tom_de_voz": persona.tom_de_voz}
+        except IntegrityError:
+            raise PersonaDuplicadaError(f"Uma persona com o nome '{campos.get('nome')}' já existe.")
+        self.invalidate(session_id)
+        return updated
+
+    def invalidate(self, session_id: str | None = None):
+        """Descarta o cache de uma sessão (ou de todas)."""
+        with self._lock:
+            if session_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(session_id, None)
+
+
+persona_repository = PersonaRepository()
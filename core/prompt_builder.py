@@ -1,34 +1,99 @@
 # core/prompt_builder.py
 
+from functools import lru_cache
+from itertools import combinations
+
 from . import prompt_templates
+from .template_registry import PromptParts, template_registry
+
+PLATAFORMAS = ["instagram", "linkedin", "twitter_x"]
+# Nome de cada rede nos marcadores `[SAÍDA PARA …]` dos blocos de formatação.
+ROTULOS_PLATAFORMA = {"instagram": "INSTAGRAM", "linkedin": "LINKEDIN", "twitter_x": "TWITTER/X"}
+
+
+def static_prefix(redes: tuple[str, ...]) -> str:
+    """Instruções e blocos de formatação; idêntico para toda combinação igual de redes."""
+    return template_registry.get(redes).prefix
+
+
+@lru_cache(maxsize=None)
+def multi_persona_prefix(redes: tuple[str, ...]) -> str:
+    blocos = prompt_templates.PLATFORM_BLOCKS
+    return prompt_templates.MULTI_PERSONA_PREFIX.replace("{blocos}", "---".join(blocos[rede] for rede in redes))
+
+
+def static_prefixes() -> list[str]:
+    """Todos os prefixos estáveis possíveis (uma ou várias personas, cada combinação de redes)."""
+    combos = [combo for n in range(1, len(PLATAFORMAS) + 1) for combo in combinations(PLATAFORMAS, n)]
+    return [static_prefix(combo) for combo in combos] + [multi_persona_prefix(combo) for combo in combos]
+
+
+def build_prompt_parts(persona: dict, objetivo: str, tema: str, redes_sociais: list[str]) -> PromptParts:
+    """Constrói o prompt em partes: prefixo estável, persona e pedido.
+
+    Usa o template pré-compilado da combinação de redes; campos longos da persona
+    são compactados quando o prompt estimado passa de PROMPT_TOKEN_BUDGET.
+    """
+    return template_registry.build(persona, objetivo, tema, redes_sociais)
+
 
 def build_prompt(persona: dict, objetivo: str, tema: str, redes_sociais: list[str]) -> str:
     """Constrói o prompt final dinamicamente."""
-    
-    prompt = prompt_templates.PROMPT_TEMPLATE
-
-    #Substitui os blocos das redes sociais selecionadas
-    if "instagram" in redes_sociais:
-        prompt = prompt.replace("{bloco_instagram}", prompt_templates.INSTAGRAM_BLOCK)
-    
-    if "linkedin" in redes_sociais:
-        prompt = prompt.replace("{bloco_linkedin}", prompt_templates.LINKEDIN_BLOCK)
-        
-    if "twitter_x" in redes_sociais:
-        prompt = prompt.replace("{bloco_twitter_x}", prompt_templates.TWITTER_X_BLOCK)
-    
-    #Remove os blocos das redes sociais não selecionadas
-    prompt = prompt.replace("{bloco_instagram}", "")
-    prompt = prompt.replace("{bloco_linkedin}", "")
-    prompt = prompt.replace("{bloco_twitter_x}", "")
-
-  
-    final_prompt = prompt.format(
+    return build_prompt_parts(persona, objetivo, tema, redes_sociais).text
+
+
+def build_platform_prompts(persona: dict, objetivo: str, tema: str, redes_sociais: list[str]) -> dict[str, str]:
+    """Constrói um prompt independente para cada rede social selecionada, na ordem do template."""
+    return {
+        rede: build_prompt(persona, objetivo, tema, [rede])
+        for rede in PLATAFORMAS if rede in redes_sociais
+    }
+
+
+def build_multi_persona_prompt(personas: list[dict], objetivo: str, tema: str, redes_sociais: list[str]) -> str:
+    """Constrói um único prompt para várias personas; a resposta de cada uma vem entre delimitadores numerados."""
+    bloco_personas = "".join(
+        prompt_templates.MULTI_PERSONA_ITEM.format(
+            numero=numero,
+            nome_da_persona=persona.get('nome', ''),
+            descricao_da_persona=persona.get('descricao', ''),
+            tom_de_voz=persona.get('tom_de_voz', ''),
+        )
+        for numero, persona in enumerate(personas, start=1)
+    )
+    return multi_persona_prefix(template_registry.get(redes_sociais).redes) + prompt_templates.MULTI_PERSONA_REQUEST.format(
+        bloco_personas=bloco_personas, objetivo=objetivo, tema=tema
+    )
+
+
+def build_repair_prompt(persona: dict, objetivo: str, tema: str, existentes: dict[str, list[str]], faltando: dict[str, list[int]]) -> str:
+    """Constrói o prompt que pede apenas as opções ausentes.
+
+    `existentes` traz, por rede, as legendas já geradas (para evitar repetição);
+    `faltando` traz, por rede, os números das opções que precisam ser geradas.
+    """
+    linhas = [
+        f"- {ROTULOS_PLATAFORMA[rede]}: {legenda[:200]}"
+        for rede, legendas in existentes.items() for legenda in legendas
+    ]
+    blocos = "---\n".join(
+        f"**[SAÍDA PARA {ROTULOS_PLATAFORMA[rede]}]**\n"
+        + "".join(prompt_templates.REPAIR_OPTION_BLOCKS[rede].format(numero=numero) for numero in numeros)
+        for rede, numeros in faltando.items()
+    )
+    return prompt_templates.REPAIR_PROMPT_TEMPLATE.replace("{blocos}", blocos).format(
         nome_da_persona=persona.get('nome', ''),
         descricao_da_persona=persona.get('descricao', ''),
         tom_de_voz=persona.get('tom_de_voz', ''),
         objetivo=objetivo,
-        tema=tema
+        tema=tema,
+        opcoes_existentes="\n".join(linhas) or "- (nenhuma)",
+    )
+
+
+def build_topics_prompt(persona: dict) -> str:
+    """Constrói o prompt de sugestão de temas, que depende apenas do nome e da descrição da persona."""
+    return prompt_templates.SUGGEST_TOPICS_PROMPT_TEMPLATE.format(
+        nome_da_persona=persona.get('nome'),
+        descricao_da_persona=persona.get('descricao')
     )
-        
-    return final_prompt
\ No newline at end of file
@@ -1,21 +1,16 @@
 # core/prompt_templates.py
 
-PROMPT_TEMPLATE = """
-Você é um gerador de conteúdo para redes sociais. Sua tarefa é criar posts com base nas informações fornecidas, seguindo as regras de formatação de forma precisa.
+# Incrementar a cada mudança de template: as chaves do cache de respostas incluem esta versão.
+TEMPLATE_VERSION = 2
 
-**1. Persona (Público-Alvo):**
-- **Nome:** {nome_da_persona}
-- **Descrição:** {descricao_da_persona}
-- **Tom de Voz a ser usado:** {tom_de_voz}
+# O prompt é montado do mais estável para o mais variável: instruções e blocos de formatação
+# (iguais para a mesma combinação de redes), depois a persona (estável na sessão) e por fim o
+# pedido. Assim o prefixo é compartilhado entre pedidos e pode ficar em cache no provedor.
+PROMPT_PREFIX = """
+Você é um gerador de conteúdo para redes sociais. Sua tarefa é criar posts com base na persona, no objetivo e no tema informados ao final, seguindo as regras de formatação de forma precisa.
 
-**2. Objetivo do Post:**
-- **Meta Principal:** {objetivo}
-
-**3. Tema Central do Post:**
-- **Assunto:** {tema}
-
-**4. Instruções de Geração:**
-Com base em TODAS as informações acima, gere o conteúdo para as seções de redes sociais solicitadas abaixo. Para cada seção, forneça **DUAS (2) OPÇÕES CRIATIVAS E DISTINTAS**.
+**Instruções de Geração:**
+Com base em TODAS as informações da persona, do objetivo e do tema, gere o conteúdo para as seções de redes sociais solicitadas abaixo. Para cada seção, forneça **DUAS (2) OPÇÕES CRIATIVAS E DISTINTAS**.
 
 ---
 **REGRAS ESTRITAS DE SAÍDA:**
@@ -28,8 +23,26 @@ Com base em TODAS as informações acima, gere o conteúdo para as seções de r
 {bloco_linkedin}
 ---
 {bloco_twitter_x}
+---
+"""
+
+PROMPT_PERSONA = """
+**1. Persona (Público-Alvo):**
+- **Nome:** {nome_da_persona}
+- **Descrição:** {descricao_da_persona}
+- **Tom de Voz a ser usado:** {tom_de_voz}
 """
 
+PROMPT_REQUEST = """
+**2. Objetivo do Post:**
+- **Meta Principal:** {objetivo}
+
+**3. Tema Central do Post:**
+- **Assunto:** {tema}
+"""
+
+PROMPT_TEMPLATE = PROMPT_PREFIX + PROMPT_PERSONA + PROMPT_REQUEST
+
 INSTAGRAM_BLOCK = """
 **[SAÍDA PARA INSTAGRAM]**
 **[OPÇÃO 1]**
@@ -62,6 +75,13 @@ TWITTER_X_BLOCK = """
 - **Hashtags:** [Sugira 2 hashtags relevantes diferentes para a opção 2]
 """
 
+# Blocos de formatação de cada rede, na ordem em que aparecem no prompt.
+PLATFORM_BLOCKS = {
+    "instagram": INSTAGRAM_BLOCK,
+    "linkedin": LINKEDIN_BLOCK,
+    "twitter_x": TWITTER_X_BLOCK,
+}
+
 SUGGEST_TOPICS_PROMPT_TEMPLATE = """
 Você é um estrategista de conteúdo especialista em brainstorming. Sua tarefa é gerar ideias de posts para redes sociais com base em uma persona.
 
@@ -80,4 +100,83 @@ Exemplo de Saída:
 2. Tema B
 3. Tema C
 
-"""
\ No newline at end of file
+"""
+
+MULTI_PERSONA_PREFIX = """
+Você é um gerador de conteúdo para redes sociais. Sua tarefa é criar posts sobre o MESMO tema para VÁRIAS personas diferentes, informadas ao final junto com o objetivo e o tema, seguindo as regras de formatação de forma precisa.
+
+**Instruções de Geração:**
+Para CADA persona, gere o conteúdo para as seções de redes sociais solicitadas abaixo, usando o tom de voz daquela persona. Para cada seção, forneça **DUAS (2) OPÇÕES CRIATIVAS E DISTINTAS**.
+
+---
+**REGRAS ESTRITAS DE SAÍDA:**
+- NÃO inclua saudações, introduções, despedidas, resumos de estratégia ou qualquer texto que não seja o próprio conteúdo do post formatado.
+- Escreva o conteúdo de cada persona entre as linhas `[INÍCIO PERSONA N]` e `[FIM PERSONA N]`, onde N é o número da persona na lista de personas, respeitando a ordem da lista.
+- Entre esses delimitadores, siga exatamente a estrutura dos blocos de formatação abaixo, sem escrever "Opção 1", "Legenda", "Tweet", etc. fora deles.
+- Sua resposta deve começar DIRETAMENTE com `[INÍCIO PERSONA 1]`.
+---
+{blocos}
+---
+"""
+
+MULTI_PERSONA_REQUEST = """
+**1. Personas (Públicos-Alvo):**
+{bloco_personas}
+**2. Objetivo do Post:**
+- **Meta Principal:** {objetivo}
+
+**3. Tema Central do Post:**
+- **Assunto:** {tema}
+"""
+
+MULTI_PERSONA_ITEM = """
+**[PERSONA {numero}]**
+- **Nome:** {nome_da_persona}
+- **Descrição:** {descricao_da_persona}
+- **Tom de Voz a ser usado:** {tom_de_voz}
+"""
+
+# Cada seção de rede social deve trazer exatamente esta quantidade de opções.
+OPCOES_POR_PLATAFORMA = 2
+
+REPAIR_PROMPT_TEMPLATE = """
+Você é um gerador de conteúdo para redes sociais. Uma resposta anterior ficou incompleta; sua tarefa é gerar SOMENTE as partes que faltaram, seguindo as regras de formatação de forma precisa.
+
+**1. Persona (Público-Alvo):**
+- **Nome:** {nome_da_persona}
+- **Descrição:** {descricao_da_persona}
+- **Tom de Voz a ser usado:** {tom_de_voz}
+
+**2. Objetivo do Post:**
+- **Meta Principal:** {objetivo}
+
+**3. Tema Central do Post:**
+- **Assunto:** {tema}
+
+**4. Opções Já Existentes (NÃO as repita):**
+{opcoes_existentes}
+
+---
+**REGRAS ESTRITAS DE SAÍDA:**
+- Gere APENAS as seções e opções dos blocos de formatação abaixo, cada uma criativa e distinta das opções já existentes.
+- NÃO inclua saudações, introduções, despedidas ou qualquer texto que não seja o próprio conteúdo do post formatado.
+- Sua resposta deve começar DIRETAMENTE com a primeira linha do primeiro bloco abaixo.
+---
+{blocos}
+"""
+
+REPAIR_OPTION_BLOCKS = {
+    "instagram": """**[OPÇÃO {numero}]**
+- **Legenda:** [Escreva aqui a legenda]
+- **Sugestão de Mídia:** [Descreva a sugestão de mídia]
+- **Hashtags:** [Sugira 5 hashtags]
+""",
+    "linkedin": """**[OPÇÃO {numero}]**
+- **Texto do Post:** [Escreva aqui o texto para LinkedIn]
+- **Hashtags:** [Sugira 3 hashtags profissionais]
+""",
+    "twitter_x": """**[OPÇÃO {numero}]**
+- **Tweet:** [Escreva aqui o tweet, conciso e impactante]
+- **Hashtags:** [Sugira 2 hashtags relevantes]
+""",
+}
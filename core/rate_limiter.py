@@ -0,0 +1,115 @@
+# core/rate_limiter.py
+
+import threading
+import time
+from collections import deque
+
+
+class TokenBucketLimiter:
+    """Limitador global de requisições e tokens por minuto.
+
+    Cada chamada consome uma requisição e uma estimativa de tokens. Quem chega
+    primeiro é atendido primeiro (fila FIFO), de modo que sessões concorrentes
+    dividem a cota de forma justa em vez de disputarem cada vaga liberada.
+
+    Chamadas em segundo plano têm prioridade mínima: só são atendidas quando
+    não há chamadas interativas na fila e sobra uma reserva (`background_reserve`,
+    fração do balde) para as próximas chamadas interativas.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, background_reserve: float = 0.2):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.background_reserve = background_reserve
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._background = deque()
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.acquired = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm > 0:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm > 0:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _missing_time(self, tokens: float, reserve: float = 0.0) -> float:
+        """Tempo, em segundos, até haver saldo para a requisição (mais a reserva, se houver)."""
+        wait = 0.0
+        requests_needed = min(self.rpm, 1 + reserve * self.rpm)
+        if self.rpm > 0 and self._requests < requests_needed:
+            wait = max(wait, (requests_needed - self._requests) * 60.0 / self.rpm)
+        if self.tpm > 0:
+            # Uma requisição maior que o balde inteiro espera apenas o balde encher.
+            needed = min(tokens + reserve * self.tpm, self.tpm)
+            if self._tokens < needed:
+                wait = max(wait, (needed - self._tokens) * 60.0 / self.tpm)
+        return wait
+
+    def acquire(self, tokens: float = 0, background: bool = False, timeout: float | None = None) -> float:
+        """Bloqueia até haver cota disponível. Retorna o tempo de espera em segundos.
+
+        Com `timeout`, desiste depois desse tempo levantando TimeoutError, sem
+        consumir cota e liberando o lugar na fila para os próximos.
+        """
+        start = time.monotonic()
+        expires = None if timeout is None else start + timeout
+        ticket = object()
+        queue = self._background if background else self._queue
+        reserve = self.background_reserve if background else 0.0
+        with self._cond:
+            queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = None
+                    if queue[0] is ticket and not (background and self._queue):
+                        wait = self._missing_time(tokens, reserve)
+                        if wait <= 0:
+                            break
+                    if expires is not None:
+                        if now >= expires:
+                            raise TimeoutError("Tempo esgotado aguardando cota do limitador.")
+                        wait = expires - now if wait is None else min(wait, expires - now)
+                    self._cond.wait(wait)
+                self._requests -= 1 if self.rpm > 0 else 0
+                self._tokens -= min(tokens, self.tpm) if self.tpm > 0 else 0
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self.acquired += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def adjust(self, delta_tokens: float):
+        """Corrige o saldo de tokens quando o consumo real difere da estimativa."""
+        if self.tpm <= 0:
+            return
+        with self._cond:
+            self._tokens = min(self.tpm, self._tokens - delta_tokens)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Retorna profundidade da fila, tempos de espera e saldo disponível."""
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "queue_depth": len(self._queue),
+                "background_queue_depth": len(self._background),
+                "acquired": self.acquired,
+                "total_wait_s": round(self.total_wait, 3),
+                "avg_wait_s": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+                "max_wait_s": round(self.max_wait, 3),
+                "requests_available": round(self._requests, 2),
+                "tokens_available": round(self._tokens),
+            }
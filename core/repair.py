@@ -0,0 +1,98 @@
+# core/repair.py
+
+import os
+from dataclasses import dataclass
+
+from .cache import generate_content_cached
+from .metrics import metrics
+from .prompt_builder import PLATAFORMAS, ROTULOS_PLATAFORMA, build_repair_prompt
+from .prompt_templates import OPCOES_POR_PLATAFORMA
+from .response_parser import CAMPOS_OBRIGATORIOS, CAMPOS_PADRAO, OpcaoPost, RespostaAnalisada, parse_response, render_response
+
+REPAIR_ENABLED = os.getenv("REPAIR_ENABLED", "true").strip().lower() in ("1", "true", "yes", "sim", "on")
+
+
+@dataclass(slots=True)
+class Lacuna:
+    rede: str
+    opcoes: list[int]
+
+
+def _completa(opcao: OpcaoPost, rotulo: str) -> bool:
+    return all(getattr(opcao, campo) for campo in CAMPOS_OBRIGATORIOS.get(rotulo, CAMPOS_PADRAO))
+
+
+def find_gaps(resultado: RespostaAnalisada, redes_sociais: list[str]) -> list[Lacuna]:
+    """Compara o resultado com as redes pedidas e o contrato de opções por rede. Retorna o que falta."""
+    lacunas = []
+    for rede in PLATAFORMAS:
+        if rede not in redes_sociais:
+            continue
+        rotulo = ROTULOS_PLATAFORMA[rede]
+        completas = {o.numero for o in resultado.plataformas.get(rotulo, []) if _completa(o, rotulo)}
+        faltando = [n for n in range(1, OPCOES_POR_PLATAFORMA + 1) if n not in completas]
+        if faltando:
+            lacunas.append(Lacuna(rede, faltando))
+    return lacunas
+
+
+def _faltando(plataformas: dict[str, list[OpcaoPost]]) -> list[str]:
+    faltando = [
+        f"{plataforma} / OPÇÃO {opcao.numero}: {campo}"
+        for plataforma, opcoes in plataformas.items() for opcao in opcoes
+        for campo in CAMPOS_OBRIGATORIOS.get(plataforma, CAMPOS_PADRAO) if not getattr(opcao, campo)
+    ]
+    faltando.extend(f"{plataforma}: nenhuma opção" for plataforma, opcoes in plataformas.items() if not opcoes)
+    return faltando
+
+
+def merge_repair(resultado: RespostaAnalisada, reparo: RespostaAnalisada, lacunas: list[Lacuna]) -> RespostaAnalisada:
+    """Encaixa as opções do reparo nas posições que faltavam, mantendo as opções completas originais."""
+    plataformas = {nome: list(opcoes) for nome, opcoes in resultado.plataformas.items()}
+    for lacuna in lacunas:
+        rotulo = ROTULOS_PLATAFORMA[lacuna.rede]
+        novas = reparo.plataformas.get(rotulo, [])
+        # O modelo às vezes renumera as opções; na falta do número pedido, usa a ordem de chegada.
+        por_numero = {o.numero: o for o in novas}
+        sobras = [o for o in novas if o.numero not in lacuna.opcoes]
+        atuais = {o.numero: o for o in plataformas.get(rotulo, [])}
+        for numero in lacuna.opcoes:
+            nova = por_numero.get(numero) or (sobras.pop(0) if sobras else None)
+            if nova is not None and (numero not in atuais or _completa(nova, rotulo)):
+                nova.numero = numero
+                atuais[numero] = nova
+        plataformas[rotulo] = [atuais[n] for n in sorted(atuais)]
+
+    # Mantém a ordem do template para as redes pedidas.
+    ordem = [ROTULOS_PLATAFORMA[rede] for rede in PLATAFORMAS]
+    plataformas = dict(sorted(plataformas.items(), key=lambda item: ordem.index(item[0]) if item[0] in ordem else len(ordem)))
+    return RespostaAnalisada(plataformas, _faltando(plataformas))
+
+
+def repair_response(text: str, persona: dict, objetivo: str, tema: str, redes_sociais: list[str], refresh: bool = False) -> str:
+    """Completa uma resposta parcial pedindo à IA apenas as redes ou opções ausentes.
+
+    Retorna o texto completo (no formato da IA) ou o texto original quando não
+    há nada a reparar ou o reparo falha.
+    """
+    if not REPAIR_ENABLED or not text:
+        return text
+    resultado = parse_response(text)
+    lacunas = find_gaps(resultado, redes_sociais)
+    if not lacunas:
+        return text
+
+    existentes = {
+        rede: [o.legenda for o in resultado.plataformas.get(ROTULOS_PLATAFORMA[rede], []) if o.legenda]
+        for rede in PLATAFORMAS if rede in redes_sociais
+    }
+    prompt = build_repair_prompt(persona, objetivo, tema, existentes, {lacuna.rede: lacuna.opcoes for lacuna in lacunas})
+    with metrics.span("repair"):
+        reparo, _ = generate_content_cached(prompt, refresh=refresh, task="repair")
+    if not reparo:
+        metrics.inc("repair_total", result="failed")
+        return text
+
+    merged = merge_repair(resultado, parse_response(reparo), lacunas)
+    metrics.inc("repair_total", result="complete" if not find_gaps(merged, redes_sociais) else "partial")
+    return render_response(merged)
@@ -0,0 +1,199 @@
+# core/response_parser.py
+
+import re
+from dataclasses import asdict, dataclass, field
+
+# Um único padrão reconhece todos os marcadores; a resposta é percorrida uma só vez.
+_TOKEN = re.compile(
+    r"\[SAÍDA PARA ([^\]\n]*)\]"
+    r"|\[OPÇÃO (\d+)\]"
+    r"|(Legenda|Tweet|Texto do Post|Sugestão de Mídia|Hashtags)(?:\*\*)?:"
+)
+_FRONTEIRA = re.compile(r"\[SAÍDA PARA [^\]\n]*\]|\[OPÇÃO \d+\]")
+# Restos de markdown entre um campo e o próximo marcador (ex.: "\n- **", "\n---\n**").
+_RUIDO_FINAL = re.compile(r"(?:\n[\s*\-]*)+$")
+_SEPARADOR_HASHTAGS = re.compile(r"[\s,]+")
+
+_CAMPOS = {
+    "Legenda": "legenda",
+    "Tweet": "legenda",
+    "Texto do Post": "legenda",
+    "Sugestão de Mídia": "sugestao",
+    "Hashtags": "hashtags",
+}
+CAMPOS_OBRIGATORIOS = {"INSTAGRAM": ("legenda", "sugestao", "hashtags")}
+CAMPOS_PADRAO = ("legenda", "hashtags")
+
+
+@dataclass(slots=True)
+class OpcaoPost:
+    numero: int
+    legenda: str = ""
+    sugestao: str | None = None
+    hashtags: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class RespostaAnalisada:
+    plataformas: dict[str, list[OpcaoPost]]
+    faltando: list[str]
+
+    def to_dict(self) -> dict:
+        """Converte o resultado em estruturas simples, prontas para JSON."""
+        return {
+            "plataformas": {nome: [asdict(o) for o in opcoes] for nome, opcoes in self.plataformas.items()},
+            "faltando": list(self.faltando),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RespostaAnalisada":
+        """Reconstrói o resultado a partir de `to_dict`, sem reprocessar o texto."""
+        plataformas = {nome: [OpcaoPost(**o) for o in opcoes] for nome, opcoes in data["plataformas"].items()}
+        return cls(plataformas, list(data.get("faltando", [])))
+
+
+def _limpar(valor: str) -> str:
+    valor = valor.strip()
+    if valor.startswith("**"):
+        valor = valor[2:].lstrip()
+    return _RUIDO_FINAL.sub("", valor).strip()
+
+
+class _Analisador:
+    """Máquina de estados que consome os marcadores em ordem e monta o resultado."""
+
+    def __init__(self):
+        self.plataformas = {}
+        self.faltando = []
+        self._plataforma = None
+        self._opcao = None
+
+    def consume(self, text: str) -> list:
+        """Processa um trecho que termina logo antes de um marcador (ou no fim da resposta)."""
+        events = []
+        campo = None
+        inicio = 0
+        for m in _TOKEN.finditer(text):
+            if campo is not None:
+                self._set_campo(campo, text[inicio:m.start()])
+                campo = None
+            if m.group(1) is not None:
+                events.extend(self.close_option())
+                self._plataforma = m.group(1).strip()
+                self.plataformas[self._plataforma] = []
+            elif m.group(2) is not None:
+                events.extend(self.close_option())
+                if self._plataforma is not None:
+                    self._opcao = OpcaoPost(numero=int(m.group(2)))
+            elif self._opcao is not None:
+                campo = _CAMPOS[m.group(3)]
+                inicio = m.end()
+        if campo is not None:
+            self._set_campo(campo, text[inicio:])
+        return events
+
+    def _set_campo(self, campo: str, valor: str):
+        valor = _limpar(valor)
+        if campo == "hashtags":
+            self._opcao.hashtags = [h for h in _SEPARADOR_HASHTAGS.split(valor) if h]
+        elif campo == "sugestao":
+            self._opcao.sugestao = valor
+        elif not self._opcao.legenda:
+            self._opcao.legenda = valor
+
+    def close_option(self) -> list:
+        """Fecha a opção em andamento, registrando os campos ausentes."""
+        opcao, self._opcao = self._opcao, None
+        if opcao is None:
+            return []
+        opcoes = self.plataformas[self._plataforma]
+        opcoes.append(opcao)
+        for campo in CAMPOS_OBRIGATORIOS.get(self._plataforma, CAMPOS_PADRAO):
+            if not getattr(opcao, campo):
+                self.faltando.append(f"{self._plataforma} / OPÇÃO {opcao.numero}: {campo}")
+        return [(self._plataforma, len(opcoes) - 1, opcao)]
+
+    def result(self) -> RespostaAnalisada:
+        faltando = list(self.faltando)
+        faltando.extend(f"{nome}: nenhuma opção" for nome, opcoes in self.plataformas.items() if not opcoes)
+        return RespostaAnalisada(self.plataformas, faltando)
+
+
+def parse_response(text: str) -> RespostaAnalisada:
+    """Analisa a resposta da IA em uma única passada."""
+    analisador = _Analisador()
+    analisador.consume(text)
+    analisador.close_option()
+    return analisador.result()
+
+
+# Rótulo do texto principal de cada seção, como nos blocos de formatação dos templates.
+_ROTULO_LEGENDA = {"LINKEDIN": "Texto do Post", "TWITTER/X": "Tweet"}
+
+
+def render_response(resposta: RespostaAnalisada) -> str:
+    """Reescreve o resultado no formato da IA; `parse_response(render_response(r))` reproduz `r`."""
+    linhas = []
+    for plataforma, opcoes in resposta.plataformas.items():
+        linhas.append(f"**[SAÍDA PARA {plataforma}]**")
+        for opcao in opcoes:
+            linhas.append(f"**[OPÇÃO {opcao.numero}]**")
+            linhas.append(f"- **{_ROTULO_LEGENDA.get(plataforma, 'Legenda')}:** {opcao.legenda}")
+            if opcao.sugestao:
+                linhas.append(f"- **Sugestão de Mídia:** {opcao.sugestao}")
+            if opcao.hashtags:
+                linhas.append(f"- **Hashtags:** {' '.join(opcao.hashtags)}")
+        linhas.append("---")
+    return "\n".join(linhas[:-1])
+
+
+def parse_ai_response(text: str) -> dict:
+    """Analisa a resposta de texto da IA e a estrutura em um dicionário."""
+    return parse_response(text).to_dict()["plataformas"]
+
+
+def parse_topics(raw_response: str) -> list[str]:
+    """Extrai os temas da lista numerada retornada pela IA."""
+    return [line.split('. ', 1)[1] for line in raw_response.strip().split('\n') if '. ' in line]
+
+
+class StreamingParser:
+    """Analisa a resposta em partes, emitindo cada opção assim que ela termina.
+
+    Uma seção está completa quando o próximo marcador (`[SAÍDA PARA …]` ou
+    `[OPÇÃO N]`) aparece no texto, ou quando o stream é encerrado. Os eventos
+    têm a forma (plataforma, indice_opcao, opcao) e, ao final, `result` é igual
+    ao retorno de `parse_response` para o texto completo.
+    """
+
+    def __init__(self):
+        self._analisador = _Analisador()
+        self._buffer = ""
+        self._busca = 1
+
+    def feed(self, chunk: str) -> list:
+        """Acrescenta um trecho e retorna as opções que ficaram completas."""
+        self._buffer += chunk
+        ultima = None
+        for m in _FRONTEIRA.finditer(self._buffer, self._busca):
+            ultima = m
+        if ultima is None:
+            # Recua o suficiente para reencontrar um marcador que chegou cortado.
+            self._busca = max(1, len(self._buffer) - 32)
+            return []
+        segmento, self._buffer = self._buffer[:ultima.start()], self._buffer[ultima.start():]
+        self._busca = 1
+        events = self._analisador.consume(segmento)
+        events.extend(self._analisador.close_option())
+        return events
+
+    def close(self) -> list:
+        """Encerra o stream e retorna as opções restantes."""
+        events = self._analisador.consume(self._buffer)
+        self._buffer = ""
+        events.extend(self._analisador.close_option())
+        return events
+
+    @property
+    def result(self) -> RespostaAnalisada:
+        return self._analisador.result()
@@ -0,0 +1,221 @@
+# core/similarity.py
+
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos, apenas entre threads.
+    fcntl = None
+
+from .database import get_database_url
+from .prompt_builder import PLATAFORMAS
+
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "true").strip().lower() in ("1", "true", "yes", "sim", "on")
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.75))
+SIMILARITY_DIM = int(os.getenv("SIMILARITY_DIM", 256))
+
+# Muda sempre que a forma de calcular os vetores mudar; o nome do arquivo inclui a versão.
+EMBEDDING_VERSION = 2
+
+_PALAVRA = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "por", "com", "sem", "sobre", "que", "ao", "aos", "pelo", "pela",
+}
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas e sem acentos, para que "ortodôntico" e "ortodontico" coincidam."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _features(text: str):
+    """Palavras e trigramas de caracteres de cada palavra (cobre plural, gênero e pequenas variações)."""
+    for palavra in _PALAVRA.findall(_normalize(text)):
+        if palavra in _STOPWORDS:
+            continue
+        yield palavra
+        marcada = f" {palavra} "
+        for i in range(len(marcada) - 2):
+            yield marcada[i:i + 3]
+
+
+def embed(tema: str, dim: int = SIMILARITY_DIM) -> np.ndarray:
+    """Vetoriza o tema por hashing (sem rede nem modelo treinado). Retorna um vetor float32 de norma 1."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in _features(tema):
+        # crc32 é estável entre processos, ao contrário de hash().
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def objetivo_key(objetivo: str) -> int:
+    """Chave do objetivo normalizado (sem acentos, caixa, pontuação, stopwords nem ordem das palavras).
+
+    O objetivo não entra no vetor: pedidos com objetivos diferentes nunca são
+    considerados parecidos, por mais próximo que seja o tema.
+    """
+    palavras = sorted(p for p in _PALAVRA.findall(_normalize(objetivo)) if p not in _STOPWORDS)
+    return zlib.crc32(" ".join(palavras).encode("utf-8"))
+
+
+def redes_mask(redes_sociais) -> int:
+    """Codifica o conjunto de redes sociais em um inteiro (a ordem não importa)."""
+    return sum(1 << PLATAFORMAS.index(rede) for rede in set(redes_sociais) if rede in PLATAFORMAS)
+
+
+def default_index_path() -> str:
+    """Arquivo do índice ao lado do banco SQLite (ou no diretório atual para outros bancos)."""
+    path = os.getenv("SIMILARITY_INDEX_PATH")
+    if path:
+        return path
+    from sqlalchemy.engine import make_url
+    url = make_url(get_database_url())
+    base = "personapost"
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        base = os.path.splitext(url.database)[0]
+    return f"{base}.similarity-v{EMBEDDING_VERSION}-{SIMILARITY_DIM}.idx"
+
+
+class SimilarityIndex:
+    """Índice vetorial local das gerações anteriores.
+
+    Cada registro guarda o id da geração, a persona, as redes sociais, a chave
+    do objetivo e o vetor float32 do tema. O arquivo só cresce por anexação e é mapeado em memória
+    (np.memmap), de modo que abrir o índice não lê os vetores do disco. As
+    anexações são feitas sob uma trava do arquivo (também entre processos) e
+    ignoram ids já indexados, então o índice nunca tem registros repetidos e
+    `len(index)` é o número de gerações cobertas.
+    """
+
+    def __init__(self, path: str | None = None, dim: int = SIMILARITY_DIM):
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype([("id", "<i8"), ("persona", "<i8"), ("redes", "<i8"), ("objetivo", "<i8"), ("vetor", "<f4", (dim,))])
+        self._records = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.hits = 0
+
+    def _resolve_path(self) -> str:
+        if self.path is None:
+            self.path = default_index_path()
+        return self.path
+
+    def exists(self) -> bool:
+        return os.path.exists(self._resolve_path())
+
+    @contextmanager
+    def _append_lock(self):
+        """Trava o arquivo para anexação: threads pelo lock do índice, processos por flock."""
+        with self._lock, open(self._resolve_path(), "ab") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _remap(self):
+        """Mapeia o arquivo novamente se ele cresceu (inclusive por anexações de outro processo)."""
+        path = self._resolve_path()
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = 0
+        # Ignora um registro incompleto no final (escrita interrompida).
+        count = size // self.dtype.itemsize
+        if count == 0:
+            self._records, self._size = None, 0
+        elif count * self.dtype.itemsize != self._size:
+            self._records = np.memmap(path, dtype=self.dtype, mode="r", shape=(count,))
+            self._size = count * self.dtype.itemsize
+        return self._records
+
+    def __len__(self) -> int:
+        with self._lock:
+            records = self._remap()
+        return 0 if records is None else len(records)
+
+    def ids(self) -> np.ndarray:
+        """Ids das gerações já indexadas."""
+        with self._lock:
+            records = self._remap()
+        return np.empty(0, dtype="<i8") if records is None else np.array(records["id"])
+
+    def add_many(self, items) -> int:
+        """Anexa registros (generation_id, persona_id, redes_sociais, objetivo, tema). Retorna quantos entraram.
+
+        Ids que já estão no arquivo (ex.: gravados por outro worker durante uma
+        sincronização) são ignorados.
+        """
+        items = list(items)
+        if not items:
+            return 0
+        records = np.zeros(len(items), dtype=self.dtype)
+        for i, (generation_id, persona_id, redes_sociais, objetivo, tema) in enumerate(items):
+            records[i] = (generation_id, persona_id or 0, redes_mask(redes_sociais), objetivo_key(objetivo), embed(tema, self.dim))
+        with self._append_lock() as f:
+            existing = self._remap()
+            if existing is not None:
+                records = records[~np.isin(records["id"], existing["id"])]
+            _, first = np.unique(records["id"], return_index=True)
+            records = records[np.sort(first)]
+            if len(records):
+                # Um único write em modo append: leitores nunca veem um registro pela metade.
+                f.write(records.tobytes())
+                f.flush()
+            self._remap()
+        return len(records)
+
+    def add(self, generation_id: int, persona_id: int, redes_sociais, objetivo: str, tema: str):
+        self.add_many([(generation_id, persona_id, redes_sociais, objetivo, tema)])
+
+    def search(self, persona_id: int, redes_sociais, objetivo: str, tema: str,
+               threshold: float = SIMILARITY_THRESHOLD, limit: int = 1) -> list[tuple[int, float]]:
+        """Retorna [(generation_id, similaridade)] da mesma persona, redes sociais e objetivo, acima do limiar."""
+        with self._lock:
+            records = self._remap()
+            self.searches += 1
+        if records is None:
+            return []
+        # Filtra primeiro pelos campos inteiros (barato) e só então calcula o cosseno dos candidatos.
+        candidates = np.flatnonzero(
+            (records["persona"] == (persona_id or 0))
+            & (records["redes"] == redes_mask(redes_sociais))
+            & (records["objetivo"] == objetivo_key(objetivo))
+        )
+        if len(candidates) == 0:
+            return []
+        # Os vetores já têm norma 1: o cosseno é o produto escalar, calculado para todos de uma vez.
+        scores = records["vetor"][candidates] @ embed(tema, self.dim)
+        top = [i for i in np.argsort(scores)[::-1][:limit] if scores[i] >= threshold]
+        if top:
+            with self._lock:
+                self.hits += 1
+        return [(int(records["id"][candidates[i]]), float(scores[i])) for i in top]
+
+    def stats(self) -> dict:
+        with self._lock:
+            records = self._remap()
+            return {
+                "entries": 0 if records is None else len(records),
+                "bytes": self._size,
+                "searches": self.searches,
+                "hits": self.hits,
+            }
+
+
+similarity_index = SimilarityIndex()
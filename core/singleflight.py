@@ -0,0 +1,54 @@
+# core/singleflight.py
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Agrupa chamadas idênticas simultâneas em uma única execução.
+
+    O primeiro chamador de uma chave executa a função; os que chegam enquanto
+    ela está em andamento aguardam o mesmo resultado (ou a mesma exceção).
+    Nada é guardado depois que a chamada termina.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def _join(self, key) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.executed += 1
+            return future, True
+
+    def _run(self, key, future: Future, fn, args, kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._calls.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._calls.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def do(self, key, fn, *args, **kwargs):
+        """Executa `fn` ou aguarda a execução idêntica já em andamento."""
+        future, leader = self._join(key)
+        if leader:
+            return self._run(key, future, fn, args, kwargs)
+        return future.result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,155 @@
+# core/template_registry.py
+
+"""Templates de post pré-compilados, versionados e com orçamento de tokens.
+
+Cada combinação de redes é compilada uma única vez: o prefixo estável vira uma
+string pronta e as seções de persona e de pedido viram sequências imutáveis de
+(literal, campo). Montar um prompt é só juntar os fragmentos com os valores, e o
+tamanho estimado é conhecido antes de montar o texto.
+"""
+
+import os
+import string
+from dataclasses import dataclass
+from itertools import combinations
+
+from . import prompt_templates
+from .metrics import TOKEN_BUCKETS, metrics
+
+TEMPLATE_VERSION = prompt_templates.TEMPLATE_VERSION
+# Acima deste total estimado, os campos longos da persona são compactados.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 1500))
+# Tamanho mínimo preservado de cada campo compactado.
+PERSONA_FIELD_MIN_CHARS = int(os.getenv("PERSONA_FIELD_MIN_CHARS", 200))
+
+# Mesma aproximação de `llm_client.estimate_tokens`: cerca de 4 caracteres por token.
+CHARS_PER_TOKEN = 4
+# Campos da persona que podem ser encurtados, do primeiro ao último a ser cortado.
+_COMPACTAVEIS = ("descricao_da_persona", "tom_de_voz")
+_RETICENCIAS = "…"
+
+
+@dataclass(frozen=True, slots=True)
+class PromptParts:
+    """Prompt dividido do mais estável para o mais variável; `text` é o prompt completo."""
+    prefix: str
+    persona: str
+    request: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.persona + self.request
+
+
+Fragments = tuple[tuple[str, str | None], ...]
+
+
+def _compile(template: str) -> Fragments:
+    """Converte um template de `str.format` em uma sequência de (literal, nome do campo ou None)."""
+    return tuple((literal, field) for literal, field, _, _ in string.Formatter().parse(template))
+
+
+def _render(fragments: Fragments, values: dict) -> str:
+    return "".join([literal + values[field] if field is not None else literal for literal, field in fragments])
+
+
+def _static_chars(fragments: Fragments) -> int:
+    return sum(len(literal) for literal, _ in fragments)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+    redes: tuple[str, ...]
+    prefix: str
+    persona: Fragments
+    request: Fragments
+    static_chars: int
+
+    def estimate_tokens(self, values: dict) -> int:
+        return (self.static_chars + sum(len(v) for v in values.values())) // CHARS_PER_TOKEN + 1
+
+    def render(self, values: dict) -> PromptParts:
+        return PromptParts(self.prefix, _render(self.persona, values), _render(self.request, values))
+
+
+def compile_template(redes: tuple[str, ...]) -> CompiledTemplate:
+    prefix = prompt_templates.PROMPT_PREFIX
+    for rede, bloco in prompt_templates.PLATFORM_BLOCKS.items():
+        prefix = prefix.replace(f"{{bloco_{rede}}}", bloco if rede in redes else "")
+    persona = _compile(prompt_templates.PROMPT_PERSONA)
+    request = _compile(prompt_templates.PROMPT_REQUEST)
+    return CompiledTemplate(redes, prefix, persona, request, len(prefix) + _static_chars(persona) + _static_chars(request))
+
+
+def _truncate(value: str, max_chars: int) -> str:
+    """Corta no último espaço antes do limite, marcando o corte com reticências."""
+    if len(value) <= max_chars:
+        return value
+    corte = value[:max_chars - len(_RETICENCIAS)]
+    if " " in corte:
+        corte = corte.rsplit(" ", 1)[0]
+    return corte + _RETICENCIAS
+
+
+def compact_values(values: dict, excess_tokens: int, min_chars: int = PERSONA_FIELD_MIN_CHARS) -> dict:
+    """Encurta os campos longos da persona até remover `excess_tokens` (ou até o mínimo de cada campo)."""
+    values = dict(values)
+    excess = excess_tokens * CHARS_PER_TOKEN
+    for field in _COMPACTAVEIS:
+        if excess <= 0:
+            break
+        atual = values[field]
+        alvo = max(min_chars, len(atual) - excess)
+        # Só o começo do campo é percorrido: o restante seria cortado de qualquer forma.
+        cortado = len(atual) > 2 * alvo
+        novo = " ".join((atual[:2 * alvo] if cortado else atual).split())
+        novo = _truncate(novo, alvo)
+        if cortado and not novo.endswith(_RETICENCIAS):
+            novo = novo[:alvo - len(_RETICENCIAS)] + _RETICENCIAS
+        values[field] = novo
+        excess -= len(atual) - len(novo)
+    return values
+
+
+class TemplateRegistry:
+    """Todas as combinações de redes compiladas na criação; `build` aplica o orçamento de tokens."""
+
+    def __init__(self, budget_tokens: int = PROMPT_TOKEN_BUDGET):
+        self.version = TEMPLATE_VERSION
+        self.budget_tokens = budget_tokens
+        self.order = tuple(prompt_templates.PLATFORM_BLOCKS)
+        self._templates = {
+            combo: compile_template(combo)
+            for n in range(len(self.order) + 1) for combo in combinations(self.order, n)
+        }
+
+    def get(self, redes_sociais) -> CompiledTemplate:
+        return self._templates[tuple(rede for rede in self.order if rede in redes_sociais)]
+
+    @staticmethod
+    def values(persona: dict, objetivo: str, tema: str) -> dict:
+        return {
+            "nome_da_persona": str(persona.get('nome') or ''),
+            "descricao_da_persona": str(persona.get('descricao') or ''),
+            "tom_de_voz": str(persona.get('tom_de_voz') or ''),
+            "objetivo": str(objetivo or ''),
+            "tema": str(tema or ''),
+        }
+
+    def estimate_tokens(self, persona: dict, objetivo: str, tema: str, redes_sociais: list[str]) -> int:
+        """Tokens estimados do prompt, sem montá-lo."""
+        return self.get(redes_sociais).estimate_tokens(self.values(persona, objetivo, tema))
+
+    def build(self, persona: dict, objetivo: str, tema: str, redes_sociais: list[str]) -> PromptParts:
+        template = self.get(redes_sociais)
+        values = self.values(persona, objetivo, tema)
+        tokens = template.estimate_tokens(values)
+        if tokens > self.budget_tokens:
+            values = compact_values(values, tokens - self.budget_tokens)
+            metrics.inc("prompt_compactions_total")
+            tokens = template.estimate_tokens(values)
+        metrics.observe("prompt_tokens_estimate", tokens, buckets=TOKEN_BUCKETS)
+        return template.render(values)
+
+
+template_registry = TemplateRegistry()
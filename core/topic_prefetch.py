@@ -0,0 +1,145 @@
+# core/topic_prefetch.py
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from .database import session_scope
+from .llm_client import generate_content
+from .models import TopicSuggestion
+from .prompt_builder import build_topics_prompt
+from .response_parser import parse_topics
+
+TOPIC_PREFETCH_WORKERS = int(os.getenv("TOPIC_PREFETCH_WORKERS", 1))
+TOPIC_PREFETCH_MAX_PENDING = int(os.getenv("TOPIC_PREFETCH_MAX_PENDING", 50))
+TOPIC_PREFETCH_RETRY_SECONDS = float(os.getenv("TOPIC_PREFETCH_RETRY_SECONDS", 300))
+# Versões de persona mantidas em memória (sugestões e falhas recentes); o BD guarda todas.
+TOPIC_PREFETCH_MEMORY_ENTRIES = int(os.getenv("TOPIC_PREFETCH_MEMORY_ENTRIES", 1024))
+
+
+def persona_version(persona: dict) -> str:
+    """Versão da persona para fins de sugestão de temas: muda quando nome ou descrição mudam."""
+    conteudo = f"{persona.get('nome') or ''}\0{persona.get('descricao') or ''}"
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+class TopicPrefetcher:
+    """Calcula as sugestões de temas em segundo plano e as guarda por versão da persona.
+
+    O trabalho roda em um pool pequeno e com fila limitada, e as chamadas ao
+    Gemini usam a prioridade de segundo plano do limitador global, para nunca
+    disputar cota com as gerações interativas.
+    """
+
+    def __init__(self, workers: int = TOPIC_PREFETCH_WORKERS, max_pending: int = TOPIC_PREFETCH_MAX_PENDING,
+                 memory_entries: int = TOPIC_PREFETCH_MEMORY_ENTRIES):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topic-prefetch")
+        self._max_pending = max_pending
+        self._memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._pending = set()
+        self._failed = OrderedDict()
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _remember(self, entries: OrderedDict, key: tuple, value):
+        """Guarda o valor em um dos LRUs; chamado com o lock adquirido."""
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self._memory_entries:
+            entries.popitem(last=False)
+
+    def get(self, persona: dict) -> list[str] | None:
+        """Retorna as sugestões já calculadas para a versão atual da persona, se houver.
+
+        Uma lista vazia gravada por versões anteriores conta como ausente.
+        """
+        key = (persona["id"], persona_version(persona))
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        with session_scope() as db:
+            row = db.query(TopicSuggestion.temas).filter(
+                TopicSuggestion.persona_id == key[0], TopicSuggestion.versao == key[1]
+            ).first()
+        if row is None or not row.temas:
+            return None
+        with self._lock:
+            self._remember(self._memory, key, row.temas)
+        return row.temas
+
+    def save(self, persona: dict, temas: list[str]):
+        """Grava as sugestões da versão atual da persona, substituindo as anteriores.
+
+        Uma lista vazia não é gravada: a próxima consulta volta a pedir à IA.
+        """
+        if not temas:
+            return
+        key = (persona["id"], persona_version(persona))
+        try:
+            with session_scope() as db:
+                row = db.query(TopicSuggestion).filter(
+                    TopicSuggestion.persona_id == key[0], TopicSuggestion.versao == key[1]
+                ).first()
+                if row is None:
+                    db.add(TopicSuggestion(persona_id=key[0], versao=key[1], temas=temas, criado_em=datetime.utcnow()))
+                else:
+                    row.temas = temas
+                    row.criado_em = datetime.utcnow()
+        except IntegrityError:
+            # Outro worker gravou a mesma versão ao mesmo tempo.
+            pass
+        with self._lock:
+            self._remember(self._memory, key, temas)
+            self._failed.pop(key, None)
+
+    def schedule(self, persona: dict) -> bool:
+        """Agenda o cálculo das sugestões, se ainda não existirem. Custa apenas uma consulta em memória."""
+        key = (persona["id"], persona_version(persona))
+        with self._lock:
+            if key in self._memory or key in self._pending:
+                return False
+            if key in self._failed:
+                if time.monotonic() < self._failed[key]:
+                    return False
+                del self._failed[key]
+            if len(self._pending) >= self._max_pending:
+                self.dropped += 1
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._run, dict(persona), key)
+        return True
+
+    def _run(self, persona: dict, key: tuple):
+        try:
+            if self.get(persona) is not None:
+                return
+            raw_response = generate_content(build_topics_prompt(persona), background=True, task="topics")
+            if not raw_response:
+                raise RuntimeError("a IA não retornou sugestões")
+            temas = parse_topics(raw_response)
+            if not temas:
+                raise RuntimeError("nenhum tema encontrado na resposta da IA")
+            self.save(persona, temas)
+        except Exception as e:
+            print(f"Erro ao pré-calcular temas da persona {persona.get('nome')}: {e}")
+            # Evita reagendar a cada rerun enquanto a falha persiste.
+            with self._lock:
+                self._remember(self._failed, key, time.monotonic() + TOPIC_PREFETCH_RETRY_SECONDS)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"stored": len(self._memory), "pending": len(self._pending), "dropped": self.dropped}
+
+
+topic_prefetcher = TopicPrefetcher()
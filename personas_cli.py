@@ -0,0 +1,46 @@
+# personas_cli.py
+
+import argparse
+
+from core.database import create_db_and_tables
+from core.persona_io import IMPORT_BATCH_SIZE, export_personas, import_personas, read_persona_rows
+
+
+def cmd_import(args):
+    result = import_personas(args.session_id, read_persona_rows(args.input), batch_size=args.batch_size)
+    for linha, erro in result.erros:
+        print(f"Linha {linha}: {erro}")
+    print("---------------------------------------")
+    print(f"Lidas: {result.lidas} | Gravadas: {result.gravadas} | Inválidas: {result.invalidas} | "
+          f"Lotes: {result.lotes} | Tempo: {result.duracao_s:.2f}s ({result.linhas_por_segundo:.0f} linhas/s)")
+
+
+def cmd_export(args):
+    total, elapsed = export_personas(args.output, session_id=args.session_id, batch_size=args.batch_size)
+    rate = total / elapsed if elapsed else 0.0
+    print(f"Exportadas: {total} | Tempo: {elapsed:.2f}s ({rate:.0f} linhas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação e exportação de personas em massa (CSV ou JSONL).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    importar = subparsers.add_parser("import", help="Importa personas (colunas nome, descricao, tom_de_voz)")
+    importar.add_argument("input", help="Arquivo de entrada (.csv ou .jsonl)")
+    importar.add_argument("--session-id", required=True, help="Sessão que receberá as personas")
+    importar.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Linhas por transação")
+    importar.set_defaults(func=cmd_import)
+
+    exportar = subparsers.add_parser("export", help="Exporta personas para um arquivo")
+    exportar.add_argument("output", help="Arquivo de saída (.csv ou .jsonl)")
+    exportar.add_argument("--session-id", help="Exporta apenas esta sessão (padrão: todas)")
+    exportar.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Linhas lidas do BD por bloco")
+    exportar.set_defaults(func=cmd_export)
+
+    args = parser.parse_args()
+    create_db_and_tables()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
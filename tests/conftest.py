@@ -0,0 +1,26 @@
+# tests/conftest.py
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Lidas na importação do core: BD descartável e LLM local, sem chave, rede ou espera.
+_TMP = tempfile.mkdtemp(prefix="personapost-tests-")
+os.environ.update({
+    "LLM_BACKEND": "fake",
+    "DATABASE_URL": f"sqlite:///{os.path.join(_TMP, 'tests.db')}",
+    "FAKE_LLM_LATENCY_MS": "0",
+    "FAKE_LLM_JITTER_MS": "0",
+    "GEMINI_RPM": "1000000",
+    "GEMINI_TPM": "1000000000",
+})
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from core.database import create_db_and_tables
+    create_db_and_tables()
@@ -0,0 +1,118 @@
+# tests/test_jobs.py
+
+import threading
+import time
+
+import pytest
+
+from core.database import session_scope
+from core.jobs import (
+    EXECUTANDO,
+    FALHOU,
+    JOB_MAX_ATTEMPTS,
+    PENDENTE,
+    LeaseLostError,
+    claim_job,
+    complete_job,
+    expire_stale_jobs,
+    fail_job,
+    keep_lease,
+    submit_job,
+    update_progress,
+)
+from core.models import GenerationJob
+
+PERSONA = {"id": 1, "nome": "Clínica Sorriso", "descricao": "Clínica odontológica.", "tom_de_voz": "Leve"}
+
+
+@pytest.fixture(autouse=True)
+def fila_vazia():
+    with session_scope() as db:
+        db.query(GenerationJob).delete()
+
+
+def _enfileirar(n: int) -> list[int]:
+    with session_scope() as db:
+        return [submit_job(db, "sessao", PERSONA, "Engajar", f"tema {i}", ["instagram"]) for i in range(n)]
+
+
+def _reservar(worker_id: str, lease_seconds: float = 300):
+    with session_scope() as db:
+        return claim_job(db, worker_id, lease_seconds=lease_seconds)
+
+
+def test_workers_concorrentes_nunca_reservam_o_mesmo_job():
+    ids = _enfileirar(40)
+    reservados = {}
+    inicio = threading.Barrier(8)
+
+    def worker(nome):
+        inicio.wait()
+        while (job := _reservar(nome)) is not None:
+            reservados.setdefault(job.id, []).append(nome)
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(reservados) == sorted(ids)
+    assert all(len(workers) == 1 for workers in reservados.values())
+
+
+def test_job_com_prazo_vencido_volta_a_ser_reservado():
+    [job_id] = _enfileirar(1)
+    primeiro = _reservar("w1", lease_seconds=-1)
+    assert primeiro.id == job_id
+
+    segundo = _reservar("w2")
+
+    assert segundo.id == job_id
+    assert segundo.tentativas == 2
+    with session_scope() as db:
+        job = db.get(GenerationJob, job_id)
+        assert (job.status, job.worker) == (EXECUTANDO, "w2")
+
+
+def test_prazo_vencido_na_ultima_tentativa_marca_o_job_como_falho():
+    [job_id] = _enfileirar(1)
+    for i in range(JOB_MAX_ATTEMPTS):
+        assert _reservar(f"w{i}", lease_seconds=-1).id == job_id
+
+    assert _reservar("outro") is None
+    with session_scope() as db:
+        assert expire_stale_jobs(db) == 1
+        assert db.get(GenerationJob, job_id).status == FALHOU
+
+
+def test_prazo_renovado_enquanto_o_job_roda():
+    [job_id] = _enfileirar(1)
+    assert _reservar("w1", lease_seconds=0.3).id == job_id
+
+    with keep_lease(job_id, "w1", interval=0.05, lease_seconds=0.3):
+        time.sleep(0.6)
+        assert _reservar("w2") is None
+
+    time.sleep(0.4)
+    assert _reservar("w2").id == job_id
+
+
+def test_worker_que_perdeu_a_reserva_nao_altera_o_job():
+    [job_id] = _enfileirar(1)
+    assert _reservar("w1", lease_seconds=-1).id == job_id
+    assert _reservar("w2").id == job_id
+
+    with session_scope() as db:
+        with pytest.raises(LeaseLostError):
+            update_progress(db, job_id, "w1", {"instagram": []})
+        assert not complete_job(db, job_id, "w1", generation_id=123)
+        assert not fail_job(db, job_id, "w1", "erro antigo")
+
+    with session_scope() as db:
+        job = db.get(GenerationJob, job_id)
+        assert (job.status, job.worker, job.generation_id, job.erro, job.parcial) == (EXECUTANDO, "w2", None, None, None)
+
+    with session_scope() as db:
+        assert fail_job(db, job_id, "w2", "erro atual")
+        assert db.get(GenerationJob, job_id).status == PENDENTE
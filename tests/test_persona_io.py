@@ -0,0 +1,25 @@
+# tests/test_persona_io.py
+
+from core.persona_io import import_personas, read_persona_rows
+from core.persona_repository import persona_repository
+
+
+def test_linhas_invalidas_nao_interrompem_a_importacao(tmp_path):
+    arquivo = tmp_path / "personas.jsonl"
+    arquivo.write_text(
+        '{"nome": "Clínica Sorriso", "descricao": "Clínica odontológica.", "tom_de_voz": "Leve"}\n'
+        '{"nome": "quebrada", \n'
+        "[1, 2]\n"
+        '{"nome": "Sem tom", "descricao": "Falta o tom de voz."}\n'
+        '{"nome": "Padaria Central", "descricao": "Pães artesanais.", "tom_de_voz": "Acolhedor"}\n',
+        encoding="utf-8",
+    )
+
+    result = import_personas("sessao-importacao", read_persona_rows(str(arquivo)), batch_size=1)
+
+    assert (result.lidas, result.gravadas, result.invalidas) == (5, 2, 3)
+    assert [linha for linha, _ in result.erros] == [2, 3, 4]
+    assert "JSON inválido" in result.erros[0][1]
+    assert "objeto JSON" in result.erros[1][1]
+    nomes = [p["nome"] for p in persona_repository.list_for_session("sessao-importacao")]
+    assert nomes == ["Clínica Sorriso", "Padaria Central"]
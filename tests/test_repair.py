@@ -0,0 +1,61 @@
+# tests/test_repair.py
+
+import re
+
+from core.fake_llm import fake_response_text
+from core.prompt_builder import build_prompt
+from core.prompt_templates import OPCOES_POR_PLATAFORMA
+from core.repair import Lacuna, find_gaps, merge_repair, repair_response
+from core.response_parser import OpcaoPost, RespostaAnalisada, parse_response
+
+PERSONA = {"nome": "Clínica Sorriso", "descricao": "Clínica odontológica com público jovem.", "tom_de_voz": "Leve e divertido"}
+REDES = ["instagram", "linkedin"]
+
+
+def _resposta_completa() -> str:
+    return fake_response_text(build_prompt(PERSONA, "Engajar", "Clareamento dental", REDES), seed=3)
+
+
+def _sem_opcao(text: str, plataforma: str, numero: int) -> str:
+    """Remove uma opção da seção indicada, até o próximo marcador."""
+    secao = text.index(f"[SAÍDA PARA {plataforma}]")
+    inicio = text.index(f"**[OPÇÃO {numero}]**", secao)
+    fim = re.compile(r"\*\*\[(OPÇÃO|SAÍDA)").search(text, inicio + 1)
+    return text[:inicio] + (text[fim.start():] if fim else "")
+
+
+def test_resposta_completa_nao_tem_lacunas():
+    assert find_gaps(parse_response(_resposta_completa()), REDES) == []
+
+
+def test_repair_preenche_opcao_ausente():
+    parcial = _sem_opcao(_resposta_completa(), "INSTAGRAM", 2)
+    assert find_gaps(parse_response(parcial), REDES) == [Lacuna("instagram", [2])]
+
+    reparado = parse_response(repair_response(parcial, PERSONA, "Engajar", "Clareamento dental", REDES))
+
+    assert find_gaps(reparado, REDES) == []
+    assert [o.numero for o in reparado.plataformas["INSTAGRAM"]] == list(range(1, OPCOES_POR_PLATAFORMA + 1))
+    # As opções que já estavam completas são mantidas.
+    assert reparado.plataformas["INSTAGRAM"][0] == parse_response(parcial).plataformas["INSTAGRAM"][0]
+
+
+def test_repair_preenche_rede_ausente():
+    completa = _resposta_completa()
+    parcial = completa[:completa.index("**[SAÍDA PARA LINKEDIN]**")]
+    assert find_gaps(parse_response(parcial), REDES) == [Lacuna("linkedin", list(range(1, OPCOES_POR_PLATAFORMA + 1)))]
+
+    reparado = parse_response(repair_response(parcial, PERSONA, "Engajar", "Clareamento dental", REDES))
+
+    assert find_gaps(reparado, REDES) == []
+    assert list(reparado.plataformas) == ["INSTAGRAM", "LINKEDIN"]
+
+
+def test_merge_repair_usa_a_ordem_de_chegada_quando_o_modelo_renumera():
+    resultado = RespostaAnalisada({"LINKEDIN": [OpcaoPost(1, "primeira", None, ["#a"])]}, [])
+    reparo = RespostaAnalisada({"LINKEDIN": [OpcaoPost(7, "nova", None, ["#b"])]}, [])
+
+    merged = merge_repair(resultado, reparo, [Lacuna("linkedin", [2])])
+
+    assert [(o.numero, o.legenda) for o in merged.plataformas["LINKEDIN"]] == [(1, "primeira"), (2, "nova")]
+    assert merged.faltando == []
@@ -0,0 +1,71 @@
+# tests/test_response_parser.py
+
+import random
+
+import pytest
+
+from core.fake_llm import fake_response_text
+from core.prompt_builder import build_prompt
+from core.response_parser import StreamingParser, parse_response
+
+PERSONA = {"nome": "Clínica Sorriso", "descricao": "Clínica odontológica com público jovem.", "tom_de_voz": "Leve e divertido"}
+
+RESPOSTA_COM_RUIDO = """Aqui estão suas opções:
+
+**[SAÍDA PARA INSTAGRAM]**
+**[OPÇÃO 1]**
+- **Legenda:** Sorria sem medo! 😁
+- **Sugestão de Mídia:** Foto da equipe sorrindo.
+- **Hashtags:** #sorriso, #odontologia #saude
+---
+**[OPÇÃO 2]**
+- **Legenda:** Seu sorriso merece cuidado.
+- **Hashtags:** #cuidado
+**[SAÍDA PARA TWITTER/X]**
+**[OPÇÃO 1]**
+- **Tweet:** Já agendou sua limpeza? 🦷
+- **Hashtags:** #dentista
+"""
+
+
+def _respostas():
+    for redes in (["instagram"], ["linkedin", "twitter_x"], ["instagram", "linkedin", "twitter_x"]):
+        yield fake_response_text(build_prompt(PERSONA, "Engajar", "Clareamento dental", redes), seed=1)
+    yield RESPOSTA_COM_RUIDO
+
+
+def _em_trechos(text: str, rng: random.Random) -> list[str]:
+    cortes = sorted(rng.sample(range(1, len(text)), rng.randint(1, min(40, len(text) - 1))))
+    return [text[a:b] for a, b in zip([0, *cortes], [*cortes, len(text)])]
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_streaming_igual_ao_parse_response_com_cortes_aleatorios(seed):
+    rng = random.Random(seed)
+    for text in _respostas():
+        parser = StreamingParser()
+        eventos = []
+        for trecho in _em_trechos(text, rng):
+            eventos.extend(parser.feed(trecho))
+        eventos.extend(parser.close())
+
+        esperado = parse_response(text)
+        assert parser.result == esperado
+        assert len(eventos) == sum(len(opcoes) for opcoes in esperado.plataformas.values())
+
+
+def test_streaming_caractere_a_caractere():
+    parser = StreamingParser()
+    for caractere in RESPOSTA_COM_RUIDO:
+        parser.feed(caractere)
+    parser.close()
+    assert parser.result == parse_response(RESPOSTA_COM_RUIDO)
+
+
+def test_parse_response_extrai_campos_e_aponta_faltantes():
+    resultado = parse_response(RESPOSTA_COM_RUIDO)
+    instagram = resultado.plataformas["INSTAGRAM"]
+    assert instagram[0].hashtags == ["#sorriso", "#odontologia", "#saude"]
+    assert instagram[0].sugestao == "Foto da equipe sorrindo."
+    assert resultado.plataformas["TWITTER/X"][0].legenda == "Já agendou sua limpeza? 🦷"
+    assert resultado.faltando == ["INSTAGRAM / OPÇÃO 2: sugestao"]
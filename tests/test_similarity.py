@@ -0,0 +1,25 @@
+# tests/test_similarity.py
+
+from core.similarity import SIMILARITY_THRESHOLD, SimilarityIndex, embed
+
+
+def _indice(tmp_path) -> SimilarityIndex:
+    index = SimilarityIndex(str(tmp_path / "similaridade.idx"))
+    index.add(1, 7, ["instagram"], "Engajar pacientes", "Uso de aparelhos ortodônticos")
+    return index
+
+
+def test_tema_reescrito_com_mesmo_objetivo_e_encontrado(tmp_path):
+    matches = _indice(tmp_path).search(7, ["instagram"], "engajar  os pacientes!", "aparelho ortodôntico: uso")
+    assert [generation_id for generation_id, _ in matches] == [1]
+    assert matches[0][1] >= SIMILARITY_THRESHOLD
+
+
+def test_objetivo_diferente_nao_e_encontrado(tmp_path):
+    index = _indice(tmp_path)
+    assert index.search(7, ["instagram"], "Vender mais", "Uso de aparelhos ortodônticos") == []
+    assert index.search(7, ["instagram"], "Aumentar engajamento", "Uso de aparelhos ortodônticos") == []
+
+
+def test_tema_diferente_fica_abaixo_do_limiar():
+    assert embed("Uso de aparelhos ortodônticos") @ embed("Clareamento dental") < SIMILARITY_THRESHOLD
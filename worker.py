@@ -0,0 +1,38 @@
+# worker.py
+
+import argparse
+import signal
+
+from dotenv import load_dotenv
+from core.database import create_db_and_tables
+from core.jobs import JOB_POLL_SECONDS, JobWorkerPool
+from core.llm_client import configure_llm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Processa a fila de gerações (jobs) gravada no banco de dados.")
+    parser.add_argument("--workers", type=int, default=2, help="Número de jobs processados em paralelo")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_SECONDS, help="Espera, em segundos, quando a fila está vazia")
+    args = parser.parse_args()
+
+    load_dotenv()
+    try:
+        configure_llm()
+    except ValueError as ve:
+        print(ve)
+        return
+    create_db_and_tables()
+
+    pool = JobWorkerPool(args.workers, args.poll_interval).start()
+    print(f"Worker iniciado com {args.workers} threads. Ctrl+C para encerrar.")
+
+    signal.signal(signal.SIGINT, lambda *_: pool.request_stop())
+    signal.signal(signal.SIGTERM, lambda *_: pool.request_stop())
+    while not pool.wait(1):
+        pass
+    print("Encerrando: aguardando os jobs em andamento...")
+    pool.stop()
+
+
+if __name__ == "__main__":
+    main()